@@ -10,10 +10,12 @@ to instantiate an |EmpiricalInterpolatedOperator|.
 
 As a convenience, the :func:`interpolate_operators` method allows to perform
 the empirical interpolation of the |Operators| of a given discretization with
-a single function call.
+a single function call. Parametric |Functions| can be decomposed into
+an affine expansion using :func:`interpolate_function`.
 """
 
 import numpy as np
+from scipy.linalg import solve_triangular
 
 from pymor.core.logger import getLogger
 from pymor.algorithms.pod import pod
@@ -22,6 +24,7 @@ from pymor.parallel.dummy import dummy_pool
 from pymor.parallel.interfaces import RemoteObjectInterface
 from pymor.parallel.manager import RemoteObjectManager
 from pymor.vectorarrays.interfaces import VectorArrayInterface
+from pymor.vectorarrays.numpy import NumpyVectorSpace
 
 
 def ei_greedy(U, error_norm=None, atol=None, rtol=None, max_interpolation_dofs=None,
@@ -69,6 +72,9 @@ def ei_greedy(U, error_norm=None, atol=None, rtol=None, max_interpolation_dofs=N
             :triangularity_errors:  Sequence of maximum absolute values of interoplation
                                     matrix coefficients in the upper triangle (should
                                     be near zero).
+            :selected_vectors:      Indices of the vectors in `U` from which the collateral
+                                    basis vectors have been computed (only available if
+                                    no `pool` is used).
     """
 
     if pool:  # dispatch to parallel implemenation
@@ -88,6 +94,7 @@ def ei_greedy(U, error_norm=None, atol=None, rtol=None, max_interpolation_dofs=N
     collateral_basis = U.empty()
     max_errs = []
     triangularity_errs = []
+    selected_vectors = []
 
     if copy:
         U = U.copy()
@@ -132,6 +139,7 @@ def ei_greedy(U, error_norm=None, atol=None, rtol=None, max_interpolation_dofs=N
         interpolation_dofs = np.hstack((interpolation_dofs, new_dof))
         collateral_basis.append(new_vec)
         max_errs.append(max_err)
+        selected_vectors.append(max_err_ind)
 
         # update U and ERR
         new_dof_values = U.dofs([new_dof])
@@ -149,7 +157,7 @@ def ei_greedy(U, error_norm=None, atol=None, rtol=None, max_interpolation_dofs=N
         logger.info('Interpolation matrix is not lower triangular with maximum error of {}'
                     .format(triangularity_errs[-1]))
 
-    data = {'errors': max_errs, 'triangularity_errors': triangularity_errs}
+    data = {'errors': max_errs, 'triangularity_errors': triangularity_errs, 'selected_vectors': selected_vectors}
 
     return interpolation_dofs, collateral_basis, data
 
@@ -318,6 +326,110 @@ def interpolate_operators(d, operator_names, parameter_sample, error_norm=None,
     return ei_d, data
 
 
+def interpolate_function(function, parameter_sample, evaluation_points, atol=None, rtol=None,
+                         max_interpolation_dofs=None):
+    """Affine decomposition of a parametric |Function| by empirical interpolation.
+
+    The `function` is evaluated at `evaluation_points` for all |Parameters| in
+    `parameter_sample`. Using a greedy search w.r.t. the maximum norm, interpolation
+    points and a collateral basis are determined for these evaluations. The resulting
+    empirical interpolant of `function` is returned as a |LincombFunction| of
+    non-parametric :class:`~pymor.functions.ei.EmpiricalInterpolationBasisFunction`
+    instances with :class:`~pymor.functions.ei.EmpiricalInterpolationCoefficient`
+    |ParameterFunctionals| as coefficients.
+
+    Since each collateral basis function is a linear combination of `function` evaluated
+    for some of the |Parameters| in `parameter_sample`, the interpolant can be evaluated
+    at arbitrary points, whereas its interpolation property only holds at the chosen
+    interpolation points.
+
+    If neither `atol` nor `rtol` is specified, the search continues until the
+    approximation errors are dominated by round-off, which usually leads to an
+    ill-conditioned interpolation.
+
+    For vector- or matrix-valued functions, each component at each evaluation point is
+    treated as a separate interpolation DOF.
+
+    Parameters
+    ----------
+    function
+        The parametric |Function| to interpolate.
+    parameter_sample
+        A list of |Parameters| for which `function` is evaluated to generate the
+        interpolation data.
+    evaluation_points
+        |NumPy array| of shape `(..., function.dim_domain)` of points at which
+        `function` is evaluated. The interpolation points are selected from these
+        points.
+    atol
+        Stop the greedy search if the largest approximation error is below this threshold.
+    rtol
+        Stop the greedy search if the largest relative approximation error is below this threshold.
+    max_interpolation_dofs
+        Stop the greedy search if the number of interpolation DOFs reaches this value.
+
+    Returns
+    -------
+    ei_function
+        The interpolated |Function|.
+    data
+        Dict containing the following fields:
+
+            :interpolation_points:  |NumPy array| of the selected interpolation points.
+            :errors:                Sequence of maximum approximation errors during
+                                    greedy search.
+    """
+    from pymor.functions.basic import LincombFunction
+    from pymor.functions.ei import (EmpiricalInterpolationBasisFunction, EmpiricalInterpolationCoefficient,
+                                    EmpiricalInterpolationCoefficients)
+
+    logger = getLogger('pymor.algorithms.ei.interpolate_function')
+
+    parameter_sample = [function.parse_parameter(mu) for mu in parameter_sample]
+    evaluation_points = evaluation_points.reshape((-1, function.dim_domain))
+    num_components = int(np.prod(function.shape_range))
+
+    with logger.block('Evaluating function for {} parameters ...'.format(len(parameter_sample))):
+        R = np.array([function(evaluation_points, mu=mu).ravel() for mu in parameter_sample])
+
+    with logger.block('Performing EI-Greedy:'):
+        dofs, basis, greedy_data = ei_greedy(NumpyVectorSpace.make_array(R), error_norm=lambda U: U.sup_norm(),
+                                             atol=atol, rtol=rtol, max_interpolation_dofs=max_interpolation_dofs,
+                                             pool=None)
+
+    if len(dofs) == 0:
+        raise ValueError('No interpolation DOFs could be selected (function vanishes on all evaluation points).')
+
+    # express the collateral basis in terms of the selected snapshots: the j-th basis vector is
+    # the interpolation error of the j-th selected snapshot, normalized at the j-th interpolation DOF,
+    # so that basis[j] = sum_k T[j, k] * R[selected[k]]
+    selected = greedy_data['selected_vectors']
+    interpolation_matrix = basis.dofs(dofs).T
+    S = R[selected][:, dofs]
+    T = np.zeros((len(dofs), len(dofs)))
+    for j in range(len(dofs)):
+        c = solve_triangular(interpolation_matrix[:j, :j], S[j, :j], lower=True) if j else np.zeros(0)
+        value = S[j, j] - interpolation_matrix[j, :j].dot(c)
+        T[j, :j] = - c.dot(T[:j, :j]) / value
+        T[j, j] = 1. / value
+
+    points = evaluation_points[dofs // num_components]
+    components = dofs % num_components
+    interpolation_matrix = np.tril(interpolation_matrix)
+    selected_parameters = [parameter_sample[i] for i in selected]
+
+    functions = [EmpiricalInterpolationBasisFunction(function, selected_parameters[:j + 1], T[j, :j + 1],
+                                                     name='{}_ei_basis_{}'.format(function.name, j))
+                 for j in range(len(dofs))]
+    all_coefficients = EmpiricalInterpolationCoefficients(function, points, components, interpolation_matrix)
+    coefficients = [EmpiricalInterpolationCoefficient(all_coefficients, j,
+                                                      name='{}_ei_coefficient_{}'.format(function.name, j))
+                    for j in range(len(dofs))]
+    ei_function = LincombFunction(functions, coefficients, name='{}_ei'.format(function.name))
+
+    return ei_function, {'interpolation_points': points, 'errors': greedy_data['errors']}
+
+
 def _interpolate_operators_build_evaluations(mu, d=None, operators=None, evaluations=None):
     U = d.solve(mu)
     for op in operators:
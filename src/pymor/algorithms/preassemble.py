@@ -2,12 +2,19 @@
 # Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
 # License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
 
+import numpy as np
+import scipy.sparse as sps
+
 from pymor.algorithms.rules import RuleTable, match_class, match_generic
+from pymor.core.defaults import defaults
+from pymor.core.logger import getLogger
 from pymor.discretizations.interfaces import DiscretizationInterface
 from pymor.operators.basic import ProjectedOperator
-from pymor.operators.constructions import (LincombOperator, Concatenation,
-                                           AffineOperator, AdjointOperator, SelectionOperator)
+from pymor.operators.constructions import (LincombOperator, Concatenation, ComponentProjection, IdentityOperator,
+                                           ZeroOperator, AffineOperator, AdjointOperator, SelectionOperator)
 from pymor.operators.interfaces import OperatorInterface
+from pymor.operators.numpy import NumpyMatrixOperator
+from pymor.vectorarrays.numpy import NumpyVectorSpace
 
 
 def preassemble(obj):
@@ -48,3 +55,169 @@ class PreAssembleRules(RuleTable):
     @match_class(OperatorInterface)
     def action_identity(self, op):
         return op
+
+
+@defaults('max_fill_in')
+def fuse_matrices(obj, max_fill_in=1.):
+    """Fuse parameter-independent |Operator| trees into single matrices.
+
+    Non-parametric |Concatenations| of |NumpyMatrixOperators| and
+    |ComponentProjections| are replaced by a single |NumpyMatrixOperator|
+    holding the matrix product (|ComponentProjections| become row or column
+    selections). Non-parametric |LincombOperators| are assembled after their
+    components have been fused. Parametric operators are left untouched,
+    but their children are fused, so affine decompositions are preserved.
+
+    To avoid fill-in blowup, two matrices are only multiplied if the number
+    of non-zero entries of the product does not exceed `max_fill_in` times
+    the number of non-zero entries of both factors. The estimated reduction
+    of floating point operations per operator application is logged.
+
+    Parameters
+    ----------
+    obj
+        Either a |Discretization| or an |Operator| to fuse.
+    max_fill_in
+        Maximum ratio between the non-zero entries of a fused matrix and
+        the sum of the non-zero entries of its factors.
+
+    Returns
+    -------
+    The fused object.
+    """
+    rules = FuseMatricesRules(max_fill_in)
+    result = rules.apply(obj)
+    if rules.flops_before > 0:
+        getLogger('pymor.algorithms.preassemble.fuse_matrices').info(
+            'Reduced estimated flops per application from {} to {} ({:.1f}% reduction).'.format(
+                rules.flops_before, rules.flops_after, 100 * (1 - rules.flops_after / rules.flops_before)))
+    return result
+
+
+class FuseMatricesRules(RuleTable):
+
+    def __init__(self, max_fill_in):
+        super().__init__(use_caching=True)
+        self.max_fill_in = max_fill_in
+        self.flops_before = self.flops_after = 0
+
+    @match_class(DiscretizationInterface, AffineOperator, SelectionOperator)
+    def action_recurse(self, op):
+        return self.replace_children(op)
+
+    @match_class(Concatenation)
+    def action_Concatenation(self, op):
+        op = self.replace_children(op)
+        if op.parametric:
+            return op
+
+        fused = [op.operators[-1]]
+        for o in op.operators[-2::-1]:
+            product = self._fuse_pair(o, fused[-1])
+            if product is None:
+                fused.append(o)
+            else:
+                fused[-1] = product
+
+        if len(fused) == len(op.operators):
+            return op
+
+        if len(fused) == 1:
+            result = fused[0].with_(solver_options=op.solver_options) if op.solver_options else fused[0]
+        else:
+            result = op.with_(operators=fused[::-1])
+        cost_before, cost_after = _apply_cost(op), _apply_cost(result)
+        if cost_before is not None and cost_after is not None:
+            self.flops_before += cost_before
+            self.flops_after += cost_after
+        return result
+
+    @match_class(LincombOperator)
+    def action_LincombOperator(self, op):
+        op = self.replace_children(op)
+        if op.parametric:
+            return op
+        result = op.assemble()
+        cost_before, cost_after = _apply_cost(op), _apply_cost(result)
+        if cost_before is not None and cost_after is not None:
+            self.flops_before += cost_before
+            self.flops_after += cost_after
+        return result
+
+    @match_class(AdjointOperator)
+    def action_AdjointOperator(self, op):
+        new_operator = self.apply(op.operator)
+        if isinstance(new_operator, NumpyMatrixOperator) and not (op.source_product or op.range_product):
+            return new_operator.T
+        elif new_operator is op.operator:
+            return op
+        else:
+            return op.with_(operator=new_operator)
+
+    @match_class(OperatorInterface)
+    def action_identity(self, op):
+        return op
+
+    def _fuse_pair(self, second, first):
+        """Return the fused concatenation `second(first(U))` or `None`."""
+        matrices = [_as_matrix(o) for o in (second, first)]
+        if any(m is None for m in matrices):
+            return None
+        if isinstance(second, ComponentProjection) and isinstance(first, ComponentProjection):
+            return ComponentProjection(first.components[second.components], first.source)
+
+        A, B = matrices
+        if isinstance(second, ComponentProjection):
+            product = B[second.components]  # row selection, no fill-in possible
+        else:
+            if sps.issparse(A) and sps.issparse(B):
+                product = A.dot(B).tocsc()
+            elif sps.issparse(B):
+                # ndarray.dot does not know about sparse matrices (e.g. column scattering
+                # by a ComponentProjection), so let the sparse matrix do the product
+                product = np.asarray(B.T.dot(A.T).T)
+            else:
+                product = A.dot(B)
+                if sps.issparse(product):
+                    product = product.toarray()
+                product = np.asarray(product)
+            if _nnz(product) > self.max_fill_in * (_nnz(A) + _nnz(B)):
+                self.logger.debug('Not fusing {} and {} due to fill-in.'.format(second.name, first.name))
+                return None
+
+        source_id = first.source.id
+        range_id = second.range.id
+        return NumpyMatrixOperator(product, source_id=source_id, range_id=range_id,
+                                   name='{}_{}'.format(second.name, first.name))
+
+
+def _as_matrix(op):
+    if isinstance(op, NumpyMatrixOperator):
+        return op._matrix
+    elif isinstance(op, ComponentProjection) and isinstance(op.source, NumpyVectorSpace):
+        n = len(op.components)
+        return sps.csr_matrix((np.ones(n), (np.arange(n), op.components)), shape=(n, op.source.dim))
+    else:
+        return None
+
+
+def _nnz(matrix):
+    return matrix.nnz if sps.issparse(matrix) else matrix.size
+
+
+def _apply_cost(op):
+    """Estimated number of floating point operations for applying `op` to a single vector."""
+    if isinstance(op, NumpyMatrixOperator):
+        return 2 * _nnz(op._matrix)
+    elif isinstance(op, ComponentProjection):
+        return len(op.components)
+    elif isinstance(op, (IdentityOperator, ZeroOperator)):
+        return 0
+    elif isinstance(op, Concatenation):
+        costs = [_apply_cost(o) for o in op.operators]
+        return None if None in costs else sum(costs)
+    elif isinstance(op, LincombOperator):
+        costs = [_apply_cost(o) for o in op.operators]
+        return None if None in costs else sum(costs) + 2 * op.range.dim * len(op.operators)
+    else:
+        return None
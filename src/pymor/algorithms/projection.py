@@ -10,7 +10,7 @@ from pymor.core.exceptions import RuleNotMatchingError
 from pymor.operators.basic import ProjectedOperator
 from pymor.operators.constructions import (LincombOperator, Concatenation, ConstantOperator,
                                            ZeroOperator, AffineOperator, AdjointOperator, SelectionOperator,
-                                           VectorArrayOperator)
+                                           VectorArrayOperator, LowRankOperator, LowRankUpdatedOperator)
 from pymor.operators.ei import EmpiricalInterpolatedOperator, ProjectedEmpiciralInterpolatedOperator
 from pymor.operators.interfaces import OperatorInterface
 from pymor.operators.numpy import NumpyMatrixOperator
@@ -103,6 +103,23 @@ class ProjectRules(RuleTable):
             return ConstantOperator(projected_value, NumpyVectorSpace(len(source_basis), op.source.id),
                                     name=op.name)
 
+    @match_class(LowRankOperator)
+    def action_LowRankOperator(self, op):
+        range_basis, source_basis, product = self.range_basis, self.source_basis, self.product
+        if range_basis is not None:
+            left = NumpyVectorSpace.make_array(range_basis.inner(op.left, product).T, op.range.id)
+        else:
+            left = op.left
+        if source_basis is not None:
+            right = NumpyVectorSpace.make_array(source_basis.dot(op.right).T, op.source.id)
+        else:
+            right = op.right
+        return LowRankOperator(left, op.core, right, name=op.name)
+
+    @match_class(LowRankUpdatedOperator)
+    def action_LowRankUpdatedOperator(self, op):
+        return self.replace_children(op)
+
     @match_generic(lambda op: op.linear and not op.parametric, 'linear and not parametric')
     def action_apply_basis(self, op):
         range_basis, source_basis, product = self.range_basis, self.source_basis, self.product
@@ -263,10 +280,18 @@ class ProjectToSubbasisRules(RuleTable):
         super().__init__(use_caching=True)
         self.dim_range, self.dim_source = dim_range, dim_source
 
-    @match_class(LincombOperator)
+    @match_class(LincombOperator, LowRankUpdatedOperator)
     def action_recurse(self, op):
         return self.replace_children(op)
 
+    @match_class(LowRankOperator)
+    def action_LowRankOperator(self, op):
+        if not (isinstance(op.range, NumpyVectorSpace) and isinstance(op.source, NumpyVectorSpace)):
+            raise NotImplementedError
+        left = NumpyVectorSpace.make_array(op.left.data[:, :self.dim_range], op.range.id)
+        right = NumpyVectorSpace.make_array(op.right.data[:, :self.dim_source], op.source.id)
+        return LowRankOperator(left, op.core, right, name=op.name)
+
     @match_class(NumpyMatrixOperator)
     def action_NumpyMatrixOperator(self, op):
         # copy instead of just slicing the matrix to ensure contiguous memory
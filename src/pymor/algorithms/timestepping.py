@@ -10,16 +10,21 @@ on |Operators| and |VectorArrays|. In particular, the algorithms
 can also be used to turn an arbitrary stationary |Discretization| provided
 by an external library into an instationary |Discretization|.
 
-Currently, implementations of :func:`explicit_euler` and :func:`implicit_euler`
-time-stepping are provided. The :class:`TimeStepperInterface` defines a
-common interface that has to be fulfilled by the time-steppers used
-by |InstationaryDiscretization|. The classes :class:`ExplicitEulerTimeStepper`
-and :class:`ImplicitEulerTimeStepper` encapsulate :func:`explicit_euler` and
-:func:`implicit_euler` to provide this interface.
+Currently, implementations of :func:`explicit_euler`, :func:`implicit_euler`
+and :func:`explicit_ssp_runge_kutta` time-stepping are provided. The
+:class:`TimeStepperInterface` defines a common interface that has to be
+fulfilled by the time-steppers used by |InstationaryDiscretization|. The classes
+:class:`ExplicitEulerTimeStepper`, :class:`ImplicitEulerTimeStepper` and
+:class:`ExplicitSSPRungeKuttaTimeStepper` encapsulate these functions to
+provide this interface.
 """
 
+import numpy as np
+
 from pymor.core.interfaces import ImmutableInterface, abstractmethod
 from pymor.operators.interfaces import OperatorInterface
+from pymor.operators.numpy import NumpyMatrixOperator
+from pymor.parameters.base import Parameter
 from pymor.vectorarrays.interfaces import VectorArrayInterface
 
 
@@ -119,6 +124,44 @@ class ExplicitEulerTimeStepper(TimeStepperInterface):
         return explicit_euler(operator, rhs, initial_data, initial_time, end_time, self.nt, mu, num_values)
 
 
+class ExplicitSSPRungeKuttaTimeStepper(TimeStepperInterface):
+    """Explicit strong stability preserving Runge-Kutta time-stepper.
+
+    Solves equations of the form ::
+
+        d_t u + A(u, mu, t) = F(mu, t)
+
+    using :func:`explicit_ssp_runge_kutta`.
+
+    Parameters
+    ----------
+    nt
+        If `cfl` is `None`, the number of time-steps the time-stepper will perform.
+        Otherwise, `(end_time - initial_time) / nt` is an upper bound for the
+        adaptively chosen time step sizes. At least one of `nt` and `cfl` has to
+        be specified.
+    order
+        The order of the scheme (1, 2 or 3). For `order == 1`, the scheme
+        is the explicit Euler scheme.
+    cfl
+        If not `None`, the CFL number used to adaptively choose the time step size
+        (see :func:`explicit_ssp_runge_kutta`).
+    """
+
+    def __init__(self, nt=None, order=2, cfl=None):
+        assert nt is not None or cfl is not None
+        assert order in (1, 2, 3)
+        self.nt = nt
+        self.order = order
+        self.cfl = cfl
+
+    def solve(self, initial_time, end_time, initial_data, operator, rhs=None, mass=None, mu=None, num_values=None):
+        if mass is not None:
+            raise NotImplementedError
+        return explicit_ssp_runge_kutta(operator, rhs, initial_data, initial_time, end_time, nt=self.nt,
+                                        order=self.order, cfl=self.cfl, mu=mu, num_values=num_values)
+
+
 def implicit_euler(A, F, M, U0, t0, t1, nt, mu=None, num_values=None, solver_options='operator'):
     assert isinstance(A, OperatorInterface)
     assert isinstance(F, (type(None), OperatorInterface, VectorArrayInterface))
@@ -232,3 +275,157 @@ def explicit_euler(A, F, U0, t0, t1, nt, mu=None, num_values=None):
                 R.append(U)
 
     return R
+
+
+def explicit_ssp_runge_kutta(A, F, U0, t0, t1, nt=None, order=2, cfl=None, mu=None, num_values=None):
+    """Explicit strong stability preserving Runge-Kutta time-stepping.
+
+    Solves `d_t u + A(u, mu, t) = F(mu, t)` with the explicit Euler scheme
+    (`order == 1`), Heun's method (`order == 2`) or the three-stage third order
+    scheme of Shu and Osher (`order == 3`). All schemes are convex combinations
+    of explicit Euler steps, hence they inherit the stability properties
+    (e.g. positivity or total variation diminishing) of the explicit Euler scheme
+    under the same time step restriction.
+
+    If `cfl` is not `None`, the time step size `dt` is chosen in each step
+    as ::
+
+        dt = cfl / max_i J_ii,
+
+    where `J` is the Jacobian of `A` at the current solution. For monotone finite
+    volume schemes, `1 / max_i J_ii` is the largest time step for which all
+    coefficients of the explicit Euler update are non-negative, i.e. this is
+    the CFL condition computed from the derivatives of the numerical fluxes.
+    For non-monotone schemes (e.g. a Lax-Friedrichs flux with too large
+    `lxf_lambda`), this step size does not guarantee stability.
+    The step size is limited further to hit `t1` and the times at which
+    the `num_values` solution vectors are returned exactly.
+
+    If `A` has a `jacobian_diagonal` method (like
+    :class:`~pymor.operators.fv.NonlinearAdvectionOperator`), the diagonal of `J`
+    is computed from the derivatives of the numerical fluxes on the edges without
+    assembling `J`. Otherwise, the Jacobian of `A` has to assemble to a
+    |NumpyMatrixOperator|. For linear, time-independent `A`, the diagonal is only
+    computed once.
+
+    If neither `A` nor `F` depend on the time `_t`, `A` is assembled and
+    `F` is evaluated for `mu` once before the time loop.
+
+    Parameters
+    ----------
+    A
+        The |Operator| A.
+    F
+        The right-hand side F (either |VectorArray| of length 1 or |Operator| with
+        `range.dim == 1`). If `None`, zero right-hand side is assumed.
+    U0
+        The solution vector at `t0`.
+    t0
+        The time at which to begin time-stepping.
+    t1
+        The time until which to perform time-stepping.
+    nt
+        If `cfl` is `None`, the number of time steps. Otherwise, `(t1 - t0) / nt`
+        is an upper bound for the time step size.
+    order
+        The order of the scheme (1, 2 or 3).
+    cfl
+        If not `None`, the CFL number used to choose the time step size.
+    mu
+        |Parameter| for which `A` and `F` are evaluated. The current time is added
+        to `mu` with key `_t`.
+    num_values
+        The number of returned vectors of the solution trajectory. If `None`, the
+        solution at `nt + 1` equidistant times is returned (i.e. each intermediate
+        vector if `cfl` is `None`) or, if `nt` is `None`, only the solution at `t0`
+        and `t1`.
+
+    Returns
+    -------
+    |VectorArray| containing the solution trajectory.
+    """
+    assert isinstance(A, OperatorInterface)
+    assert F is None or isinstance(F, (OperatorInterface, VectorArrayInterface))
+    assert A.source == A.range
+    assert order in (1, 2, 3)
+    assert nt is not None or cfl is not None
+    assert len(U0) == 1
+    assert U0 in A.source
+
+    mu = Parameter({}) if mu is None else mu
+    max_dt = np.inf if nt is None else (t1 - t0) / nt
+    num_values = num_values or (2 if nt is None else nt + 1)
+    output_dt = (t1 - t0) / (num_values - 1)
+
+    F_time_dep = False
+    if isinstance(F, OperatorInterface):
+        assert F.range.dim == 1
+        assert F.source == A.source
+        F_time_dep = F.parametric and '_t' in F.parameter_type
+        if not F_time_dep:
+            F = F.as_vector(mu, space=A.source)
+    elif isinstance(F, VectorArrayInterface):
+        assert len(F) == 1
+        assert F in A.source
+
+    # bind all parameter-dependent data before the time loop
+    A_time_dep = A.parametric and '_t' in A.parameter_type
+    if not A_time_dep:
+        A = A.assemble(mu)
+
+    def L(U, t):
+        mu['_t'] = t
+        R = A.apply(U, mu=mu)
+        R.scal(-1)
+        if F_time_dep:
+            R.axpy(1, F.as_vector(mu, space=A.source))
+        elif F is not None:
+            R.axpy(1, F)
+        return R
+
+    def euler_step(U, t, dt):
+        V = U.copy()
+        V.axpy(dt, L(U, t))
+        return V
+
+    if cfl is not None:
+        def max_jacobian_diagonal(U, t):
+            mu['_t'] = t
+            if hasattr(A, 'jacobian_diagonal'):
+                return A.jacobian_diagonal(U, mu=mu).max()
+            J = A.jacobian(U, mu=mu).assemble(mu)
+            if not isinstance(J, NumpyMatrixOperator):
+                raise NotImplementedError('Cannot compute the diagonal of the Jacobian of {}'.format(A.name))
+            return J._matrix.diagonal().max()
+
+        if A.linear and not A_time_dep:
+            constant_max_diag = max_jacobian_diagonal(U0, t0)
+
+    R = A.source.empty(reserve=num_values)
+    R.append(U0)
+
+    t = t0
+    U = U0.copy()
+    eps = (t1 - t0) * 1e-12
+    while t1 - t > eps:
+        dt = min(max_dt, t1 - t, t0 + len(R) * output_dt - t)
+        if cfl is not None:
+            max_diag = constant_max_diag if A.linear and not A_time_dep else max_jacobian_diagonal(U, t)
+            if max_diag > 0:
+                dt = min(dt, cfl / max_diag)
+
+        if order == 1:
+            U = euler_step(U, t, dt)
+        elif order == 2:
+            U1 = euler_step(U, t, dt)
+            U = U * 0.5 + euler_step(U1, t + dt, dt) * 0.5
+        else:
+            U1 = euler_step(U, t, dt)
+            U2 = U * 0.75 + euler_step(U1, t + dt, dt) * 0.25
+            U = U * (1. / 3.) + euler_step(U2, t + 0.5 * dt, dt) * (2. / 3.)
+        t += dt
+
+        if t - t0 + eps >= len(R) * output_dt:
+            R.append(U)
+
+    return R
@@ -12,7 +12,8 @@ import scipy.sparse.linalg as spsla
 from pymor.algorithms.rules import RuleTable, match_class
 from pymor.operators.block import BlockOperator
 from pymor.operators.constructions import (AdjointOperator, ComponentProjection, Concatenation, IdentityOperator,
-                                           LincombOperator, VectorArrayOperator, ZeroOperator)
+                                           LincombOperator, LowRankOperator, LowRankUpdatedOperator,
+                                           VectorArrayOperator, ZeroOperator)
 from pymor.operators.numpy import NumpyMatrixOperator
 
 
@@ -141,6 +142,23 @@ class ToMatrixRules(RuleTable):
             res = res + op_coefficients[i] * self.apply(op.operators[i])
         return res
 
+    @match_class(LowRankOperator)
+    def action_LowRankOperator(self, op):
+        format = self.format
+        res = op.left.data.T.dot(op.core).dot(op.right.data)
+        if format is not None and format != 'dense':
+            res = getattr(sps, format + '_matrix')(res)
+        return res
+
+    @match_class(LowRankUpdatedOperator)
+    def action_LowRankUpdatedOperator(self, op):
+        res = self.apply(op.operator) + self.apply(op.lr_operator)
+        if not sps.issparse(res):
+            res = np.asarray(res)
+        if self.format is not None and self.format != 'dense':
+            res = getattr(sps, self.format + '_matrix')(res)
+        return res
+
     @match_class(VectorArrayOperator)
     def action_VectorArrayOperator(self, op):
         format = self.format
@@ -16,7 +16,7 @@ from pymor.algorithms.greedy import greedy
 from pymor.algorithms.adaptivegreedy import adaptive_greedy
 from pymor.algorithms.newton import newton
 from pymor.algorithms.pod import pod
-from pymor.algorithms.preassemble import preassemble
+from pymor.algorithms.preassemble import preassemble, fuse_matrices
 from pymor.algorithms.projection import project, project_to_subbasis
 
 from pymor.analyticalproblems.burgers import burgers_problem, burgers_problem_2d
@@ -52,7 +52,7 @@ from pymor.grids.tria import TriaGrid
 from pymor.operators.constructions import (LincombOperator, Concatenation, ComponentProjection, IdentityOperator,
                                            ConstantOperator, ZeroOperator, VectorArrayOperator, VectorOperator,
                                            VectorFunctional, FixedParameterOperator, AdjointOperator,
-                                           SelectionOperator, induced_norm)
+                                           SelectionOperator, LowRankOperator, LowRankUpdatedOperator, induced_norm)
 from pymor.operators.ei import EmpiricalInterpolatedOperator
 from pymor.operators.numpy import NumpyGenericOperator, NumpyMatrixOperator
 
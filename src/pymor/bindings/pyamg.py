@@ -192,51 +192,67 @@ if config.HAVE_PYAMG:
         promoted_type = np.promote_types(matrix.dtype, V.dtype)
         R = np.empty((len(V), matrix.shape[1]), dtype=promoted_type)
 
+        def cached_solver(key, build_options, build):
+            # reuse multigrid hierarchies stored on the operator (see NumpyMatrixOperator.cached_preconditioner)
+            # and return whether the hierarchy has been built for `matrix`
+            if isinstance(op, NumpyMatrixOperator):
+                ml, built_for = op.cached_preconditioner(key, build_options, lambda m: (build(m), m))
+                return ml, built_for is matrix
+            else:
+                return build(matrix), True
+
+        def preconditioned_solve(ml, VV, cycle, accel):
+            # a hierarchy reused from a different parameter value iterates on the wrong matrix,
+            # so it may only be used as a preconditioner for a Krylov method applied to `matrix`
+            krylov = getattr(pyamg.krylov, accel) if isinstance(accel, str) else pyamg.krylov.gmres
+            x, _ = krylov(matrix, VV,
+                          tol=options['tol'],
+                          maxiter=options['maxiter'],
+                          M=ml.aspreconditioner(cycle=cycle))
+            return x
+
         if options['type'] == 'pyamg_solve':
             if len(V) > 0:
-                V_iter = iter(enumerate(V))
-                R[0], ml = pyamg.solve(matrix, next(V_iter)[1],
-                                       tol=options['tol'],
-                                       maxiter=options['maxiter'],
-                                       return_solver=True)
-                for i, VV in V_iter:
-                    R[i] = pyamg.solve(matrix, VV,
-                                       tol=options['tol'],
-                                       maxiter=options['maxiter'],
-                                       existing_solver=ml)
+                ml, exact = cached_solver('pyamg_solve', {},
+                                          lambda m: pyamg.blackbox.solver(
+                                              m, pyamg.blackbox.solver_configuration(m, verb=False)))
+                for i, VV in enumerate(V):
+                    if exact:
+                        R[i] = pyamg.solve(matrix, VV,
+                                           tol=options['tol'],
+                                           maxiter=options['maxiter'],
+                                           existing_solver=ml)
+                    else:
+                        R[i] = preconditioned_solve(ml, VV, 'V', 'gmres')
         elif options['type'] == 'pyamg_rs':
-            ml = pyamg.ruge_stuben_solver(matrix,
-                                          strength=options['strength'],
-                                          CF=options['CF'],
-                                          presmoother=options['presmoother'],
-                                          postsmoother=options['postsmoother'],
-                                          max_levels=options['max_levels'],
-                                          max_coarse=options['max_coarse'],
-                                          coarse_solver=options['coarse_solver'])
+            build_options = {k: options[k] for k in ('strength', 'CF', 'presmoother', 'postsmoother',
+                                                     'max_levels', 'max_coarse', 'coarse_solver')}
+            ml, exact = cached_solver('pyamg_rs', build_options,
+                                      lambda m: pyamg.ruge_stuben_solver(m, **build_options))
             for i, VV in enumerate(V):
-                R[i] = ml.solve(VV,
-                                tol=options['tol'],
-                                maxiter=options['maxiter'],
-                                cycle=options['cycle'],
-                                accel=options['accel'])
+                if exact:
+                    R[i] = ml.solve(VV,
+                                    tol=options['tol'],
+                                    maxiter=options['maxiter'],
+                                    cycle=options['cycle'],
+                                    accel=options['accel'])
+                else:
+                    R[i] = preconditioned_solve(ml, VV, options['cycle'], options['accel'])
         elif options['type'] == 'pyamg_sa':
-            ml = pyamg.smoothed_aggregation_solver(matrix,
-                                                   symmetry=options['symmetry'],
-                                                   strength=options['strength'],
-                                                   aggregate=options['aggregate'],
-                                                   smooth=options['smooth'],
-                                                   presmoother=options['presmoother'],
-                                                   postsmoother=options['postsmoother'],
-                                                   improve_candidates=options['improve_candidates'],
-                                                   max_levels=options['max_levels'],
-                                                   max_coarse=options['max_coarse'],
-                                                   diagonal_dominance=options['diagonal_dominance'])
+            build_options = {k: options[k] for k in ('symmetry', 'strength', 'aggregate', 'smooth',
+                                                     'presmoother', 'postsmoother', 'improve_candidates',
+                                                     'max_levels', 'max_coarse', 'diagonal_dominance')}
+            ml, exact = cached_solver('pyamg_sa', build_options,
+                                      lambda m: pyamg.smoothed_aggregation_solver(m, **build_options))
             for i, VV in enumerate(V):
-                R[i] = ml.solve(VV,
-                                tol=options['tol'],
-                                maxiter=options['maxiter'],
-                                cycle=options['cycle'],
-                                accel=options['accel'])
+                if exact:
+                    R[i] = ml.solve(VV,
+                                    tol=options['tol'],
+                                    maxiter=options['maxiter'],
+                                    cycle=options['cycle'],
+                                    accel=options['accel'])
+                else:
+                    R[i] = preconditioned_solve(ml, VV, options['cycle'], options['accel'])
         else:
             raise ValueError('Unknown solver type')
 
@@ -199,15 +199,23 @@ def apply_inverse(op, V, options=None, least_squares=False, check_finite=True,
                     raise InversionError('bicgstab failed with error code {} (illegal input or breakdown)'.
                                          format(info))
     elif options['type'] == 'scipy_bicgstab_spilu':
-        if Version(scipy.version.version) >= Version('0.19'):
-            ilu = spilu(matrix, drop_tol=options['spilu_drop_tol'], fill_factor=options['spilu_fill_factor'],
-                        drop_rule=options['spilu_drop_rule'], permc_spec=options['spilu_permc_spec'])
+        spilu_options = {k: v for k, v in options.items() if k.startswith('spilu_')}
+
+        def build_ilu(matrix):
+            if Version(scipy.version.version) >= Version('0.19'):
+                return spilu(matrix, drop_tol=options['spilu_drop_tol'], fill_factor=options['spilu_fill_factor'],
+                             drop_rule=options['spilu_drop_rule'], permc_spec=options['spilu_permc_spec'])
+            else:
+                if options['spilu_drop_rule']:
+                    logger = getLogger('pymor.operators.numpy._apply_inverse')
+                    logger.error("ignoring drop_rule in ilu factorization due to old SciPy")
+                return spilu(matrix, drop_tol=options['spilu_drop_tol'], fill_factor=options['spilu_fill_factor'],
+                             permc_spec=options['spilu_permc_spec'])
+
+        if isinstance(op, NumpyMatrixOperator):
+            ilu = op.cached_preconditioner('scipy_spilu', spilu_options, build_ilu)
         else:
-            if options['spilu_drop_rule']:
-                logger = getLogger('pymor.operators.numpy._apply_inverse')
-                logger.error("ignoring drop_rule in ilu factorization due to old SciPy")
-            ilu = spilu(matrix, drop_tol=options['spilu_drop_tol'], fill_factor=options['spilu_fill_factor'],
-                        permc_spec=options['spilu_permc_spec'])
+            ilu = build_ilu(matrix)
         precond = LinearOperator(matrix.shape, ilu.solve)
         for i, VV in enumerate(V):
             R[i], info = bicgstab(matrix, VV, tol=options['tol'], maxiter=options['maxiter'], M=precond)
@@ -68,13 +68,12 @@ try:
 except ImportError:
     from pickle import dumps, HIGHEST_PROTOCOL
 from copyreg import dispatch_table
-from functools import wraps
 import hashlib
 import inspect
 import itertools
 import os
 import time
-from types import FunctionType, BuiltinFunctionType
+from types import FunctionType, BuiltinFunctionType, MethodType
 import uuid
 
 import numpy as np
@@ -279,16 +278,12 @@ class classinstancemethod:
     def __get__(self, instance, cls):
         if cls is None:
             return self
+        # binding via MethodType is much cheaper than creating a new wrapper function
+        # on each attribute access (e.g. for each call of `VectorSpace.make_array`)
         if instance is None:
-            @wraps(self.cls_meth)
-            def the_class_method(*args, **kwargs):
-                return self.cls_meth(cls, *args, **kwargs)
-            return the_class_method
+            return MethodType(self.cls_meth, cls)
         else:
-            @wraps(self.inst_meth)
-            def the_instance_method(*args, **kwargs):
-                return self.inst_meth(instance, *args, **kwargs)
-            return the_instance_method
+            return MethodType(self.inst_meth, instance)
 
     def instancemethod(self, inst_meth):
         inst_meth.__doc__ = inst_meth.__doc__ or self.cls_meth.__doc__
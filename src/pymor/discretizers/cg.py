@@ -4,6 +4,7 @@
 
 from functools import partial
 
+from pymor.algorithms.ei import interpolate_function
 from pymor.algorithms.timestepping import ExplicitEulerTimeStepper, ImplicitEulerTimeStepper
 from pymor.algorithms.preassemble import preassemble as preassemble_
 from pymor.analyticalproblems.elliptic import StationaryProblem
@@ -24,7 +25,7 @@ from pymor.operators.constructions import LincombOperator
 
 def discretize_stationary_cg(analytical_problem, diameter=None, domain_discretizer=None,
                              grid_type=None, grid=None, boundary_info=None,
-                             preassemble=True):
+                             preassemble=True, interpolate_coefficients=None):
     """Discretizes an |StationaryProblem| using finite elements.
 
     Parameters
@@ -48,6 +49,16 @@ def discretize_stationary_cg(analytical_problem, diameter=None, domain_discretiz
         Must be provided if `grid` is specified.
     preassemble
         If `True`, preassemble all operators in the resulting |Discretization|.
+    interpolate_coefficients
+        If not `None`, parametric diffusion, advection and reaction |Functions|
+        which are not already given as |LincombFunctions| are replaced by an
+        affine decomposition computed with
+        :func:`~pymor.algorithms.ei.interpolate_function` at the points where the
+        respective operators evaluate them. In this case, `interpolate_coefficients`
+        has to be a dict of keyword arguments for
+        :func:`~pymor.algorithms.ei.interpolate_function`, which at least contains
+        the training set `parameter_sample`. The resulting system operator is a
+        |LincombOperator| of non-parametric operators, which can be preassembled.
 
     Returns
     -------
@@ -94,6 +105,16 @@ def discretize_stationary_cg(analytical_problem, diameter=None, domain_discretiz
         ReactionOperator  = L2ProductP1
         Functional = L2ProductFunctionalP1
 
+    if interpolate_coefficients is not None:
+        p = p.with_(
+            diffusion=_interpolate_coefficient(p.diffusion, lambda: DiffusionOperator(grid, boundary_info),
+                                               interpolate_coefficients),
+            advection=_interpolate_coefficient(p.advection, lambda: AdvectionOperator(grid, boundary_info),
+                                               interpolate_coefficients),
+            reaction=_interpolate_coefficient(p.reaction, lambda: ReactionOperator(grid, boundary_info),
+                                              interpolate_coefficients)
+        )
+
     Li = [DiffusionOperator(grid, boundary_info, diffusion_constant=0, name='boundary_part')]
     coefficients = [1.]
 
@@ -176,9 +197,23 @@ def discretize_stationary_cg(analytical_problem, diameter=None, domain_discretiz
     return d, data
 
 
+def _interpolate_coefficient(function, operator, options):
+    """Interpolate `function` at the points where `operator()` evaluates its coefficient."""
+    if function is None or not function.parametric or isinstance(function, LincombFunction):
+        return function
+    operator = operator()
+    grid = operator.grid
+    if operator.order is None:
+        evaluation_points = grid.centers(0)
+    else:
+        evaluation_points = grid.quadrature_points(0, order=operator.order)
+    ei_function, _ = interpolate_function(function, evaluation_points=evaluation_points, **options)
+    return ei_function
+
+
 def discretize_instationary_cg(analytical_problem, diameter=None, domain_discretizer=None, grid_type=None,
                                grid=None, boundary_info=None, num_values=None, time_stepper=None, nt=None,
-                               preassemble=True):
+                               preassemble=True, interpolate_coefficients=None):
     """Discretizes an |InstationaryProblem| with an |StationaryProblem| as stationary part
     using finite elements.
 
@@ -212,6 +247,8 @@ def discretize_instationary_cg(analytical_problem, diameter=None, domain_discret
         Euler time stepping.
     preassemble
         If `True`, preassemble all operators in the resulting |Discretization|.
+    interpolate_coefficients
+        See :func:`discretize_stationary_cg`.
 
     Returns
     -------
@@ -234,7 +271,8 @@ def discretize_instationary_cg(analytical_problem, diameter=None, domain_discret
     p = analytical_problem
 
     d, data = discretize_stationary_cg(p.stationary_part, diameter=diameter, domain_discretizer=domain_discretizer,
-                                       grid_type=grid_type, grid=grid, boundary_info=boundary_info)
+                                       grid_type=grid_type, grid=grid, boundary_info=boundary_info,
+                                       interpolate_coefficients=interpolate_coefficients)
 
     if p.initial_data.parametric:
         I = InterpolationOperator(data['grid'], p.initial_data)
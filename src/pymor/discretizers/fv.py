@@ -135,7 +135,8 @@ def discretize_stationary_fv(analytical_problem, diameter=None, domain_discretiz
     if p.nonlinear_advection is not None:
         if num_flux == 'lax_friedrichs':
             L += [nonlinear_advection_lax_friedrichs_operator(grid, boundary_info, p.nonlinear_advection,
-                                                              dirichlet_data=p.dirichlet_data, lxf_lambda=lxf_lambda)]
+                                                              dirichlet_data=p.dirichlet_data, lxf_lambda=lxf_lambda,
+                                                              flux_derivative=p.nonlinear_advection_derivative)]
         elif num_flux == 'upwind':
             L += [nonlinear_advection_upwind_operator(grid, boundary_info, p.nonlinear_advection,
                                                       p.nonlinear_advection_derivative,
@@ -14,7 +14,7 @@ from pymor.grids.tria import TriaGrid
 from pymor.tools.floatcmp import float_cmp
 
 
-def discretize_domain_default(domain_description, diameter=1 / 100, grid_type=None):
+def discretize_domain_default(domain_description, diameter=1 / 100, grid_type=None, reorder=None):
     """Mesh a |DomainDescription| using an appropriate default implementation.
 
     This method can discretize the following |DomainDescriptions|:
@@ -50,6 +50,13 @@ def discretize_domain_default(domain_description, diameter=1 / 100, grid_type=No
     grid_type
         The class of the |Grid| which is to be constructed. If `None`, a default
         choice is made according to the table above.
+    reorder
+        If not `None`, the entities of the generated grid are renumbered using the
+        given method to reduce the bandwidth of the system matrices (see
+        :func:`~pymor.grids.reordering.reordering_permutations`). Only supported for
+        a |PolygonalDomain|, which is meshed with an unstructured triangle grid. Use
+        :func:`~pymor.grids.reordering.reorder_grid` to explicitly convert a |TriaGrid|
+        to a renumbered :class:`~pymor.grids.unstructured.UnstructuredTriangleGrid`.
 
     Returns
     -------
@@ -59,6 +66,10 @@ def discretize_domain_default(domain_description, diameter=1 / 100, grid_type=No
         The generated |BoundaryInfo|.
     """
 
+    if reorder is not None and not isinstance(domain_description, PolygonalDomain):
+        raise NotImplementedError('Renumbering is only supported for unstructured triangle grids, '
+                                  'not for {}'.format(type(domain_description).__name__))
+
     def discretize_RectDomain():
         if grid_type == RectGrid:
             x0i = int(m.ceil(domain_description.width * m.sqrt(2) / diameter))
@@ -174,7 +185,7 @@ def discretize_domain_default(domain_description, diameter=1 / 100, grid_type=No
         from pymor.grids.gmsh import GmshGrid
         from pymor.domaindiscretizers.gmsh import discretize_gmsh
         assert grid_type is None or grid_type is GmshGrid
-        return discretize_gmsh(domain_description, clscale=diameter)
+        return discretize_gmsh(domain_description, clscale=diameter, reorder=reorder)
     else:
         grid_type = grid_type or OnedGrid
         if grid_type is not OnedGrid:
@@ -16,7 +16,7 @@ from pymor.core.logger import getLogger
 
 
 def discretize_gmsh(domain_description=None, geo_file=None, geo_file_path=None, msh_file_path=None,
-                    mesh_algorithm='del2d', clscale=1., options='', refinement_steps=0):
+                    mesh_algorithm='del2d', clscale=1., options='', refinement_steps=0, reorder=None):
     """Mesh a |DomainDescription| or an already existing Gmsh GEO-file using the Gmsh mesher.
 
     Parameters
@@ -42,6 +42,9 @@ def discretize_gmsh(domain_description=None, geo_file=None, geo_file_path=None,
         http://geuz.org/gmsh/doc/texinfo/gmsh.html#Command_002dline-options for all available options.
     refinement_steps
         Number of refinement steps to do after the initial meshing.
+    reorder
+        If not `None`, renumber the vertices and triangles of the generated grid
+        using the given method (see :func:`~pymor.grids.gmsh.load_gmsh`).
 
     Returns
     -------
@@ -185,7 +188,7 @@ def discretize_gmsh(domain_description=None, geo_file=None, geo_file_path=None,
         logger.info('Gmsh took {} s'.format(t_gmsh))
 
         # Create |GmshGrid| and |GmshBoundaryInfo| form the just created MSH-file.
-        grid, bi = load_gmsh(open(msh_file_path))
+        grid, bi = load_gmsh(msh_file_path, reorder=reorder)
     finally:
         # delete tempfiles if they were created beforehand.
         if isinstance(geo_file, tempfile._TemporaryFileWrapper):
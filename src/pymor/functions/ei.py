@@ -0,0 +1,143 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Building blocks for empirically interpolated |Functions|.
+
+Instances of the classes in this module are usually created by
+:func:`~pymor.algorithms.ei.interpolate_function`, which returns a
+|LincombFunction| of :class:`EmpiricalInterpolationBasisFunction` instances
+with :class:`EmpiricalInterpolationCoefficient` instances as linear coefficients,
+which share a common :class:`EmpiricalInterpolationCoefficients` object.
+"""
+
+import numpy as np
+from scipy.linalg import solve_triangular
+
+from pymor.core.interfaces import ImmutableInterface
+from pymor.functions.basic import FunctionBase
+from pymor.parameters.base import Parametric
+from pymor.parameters.interfaces import ParameterFunctionalInterface
+
+
+class EmpiricalInterpolationBasisFunction(FunctionBase):
+    """Non-parametric |Function| given by a linear combination of evaluations of a
+    parametric |Function| for fixed |Parameters|.
+
+    For given `function` f, `parameters` μ_1, ..., μ_k and `coefficients` c_1, ..., c_k,
+    this |Function| evaluates to ::
+
+        c_1 * f(x, μ_1) + ... + c_k * f(x, μ_k)
+
+    Parameters
+    ----------
+    function
+        The parametric |Function| f.
+    parameters
+        The list of |Parameters| μ_i.
+    coefficients
+        The linear coefficients c_i.
+    name
+        The name of the function.
+    """
+
+    def __init__(self, function, parameters, coefficients, name=None):
+        assert len(parameters) == len(coefficients)
+        self.function = function
+        self.parameters = tuple(function.parse_parameter(mu) for mu in parameters)
+        self.coefficients = np.array(coefficients)
+        self.dim_domain = function.dim_domain
+        self.shape_range = function.shape_range
+        self.name = name
+
+    def evaluate(self, x, mu=None):
+        return sum(c * self.function(x, mu=m) for c, m in zip(self.coefficients, self.parameters))
+
+
+class EmpiricalInterpolationCoefficients(ImmutableInterface, Parametric):
+    """Linear coefficients of an empirically interpolated |Function|.
+
+    Evaluates `function` at the interpolation points and computes the
+    coefficients of the interpolant w.r.t. the collateral basis, i.e. ::
+
+        interpolation_matrix^{-1} * [f(x_1, μ)[j_1], ..., f(x_m, μ)[j_m]]
+
+    The coefficients for the last |Parameter| `evaluate` has been called with
+    are cached, such that the :class:`EmpiricalInterpolationCoefficient` functionals
+    sharing this object only require a single evaluation of `function` and
+    a single triangular solve per |Parameter|.
+
+    Parameters
+    ----------
+    function
+        The interpolated |Function| f.
+    interpolation_points
+        Array of shape `(m, function.dim_domain)` of the interpolation points x_i.
+    interpolation_components
+        Array of length `m` of the indices j_i of the components of the
+        (raveled) values of `function` to interpolate at x_i.
+    interpolation_matrix
+        The lower triangular matrix containing the values of the collateral
+        basis at the interpolation points.
+    """
+
+    sid_ignore = ImmutableInterface.sid_ignore | {'_last_coefficients'}
+
+    def __init__(self, function, interpolation_points, interpolation_components, interpolation_matrix):
+        assert interpolation_points.shape == (len(interpolation_components), function.dim_domain)
+        assert interpolation_matrix.shape == (len(interpolation_components),) * 2
+        self.function = function
+        self.interpolation_points = interpolation_points
+        self.interpolation_components = interpolation_components
+        self.interpolation_matrix = interpolation_matrix
+        self.build_parameter_type(function)
+
+    def __len__(self):
+        return len(self.interpolation_components)
+
+    def evaluate(self, mu=None):
+        """Compute the vector of all interpolation coefficients for the given |Parameter| `mu`."""
+        mu = self.parse_parameter(mu)
+        last = getattr(self, '_last_coefficients', None)
+        if last is not None and last[0] == mu:
+            return last[1]
+        values = self.function(self.interpolation_points, mu=mu).reshape((len(self.interpolation_points), -1))
+        values = values[np.arange(len(values)), self.interpolation_components]
+        coefficients = solve_triangular(self.interpolation_matrix, values, lower=True)
+        coefficients.setflags(write=False)
+        self._last_coefficients = (mu, coefficients)
+        return coefficients
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_last_coefficients', None)
+        return state
+
+
+class EmpiricalInterpolationCoefficient(ParameterFunctionalInterface):
+    """Linear coefficient of an empirically interpolated |Function|.
+
+    Returns the `index`-th component of the coefficient vector computed
+    by the given :class:`EmpiricalInterpolationCoefficients`.
+
+    Parameters
+    ----------
+    coefficients
+        The :class:`EmpiricalInterpolationCoefficients` shared by all
+        coefficients of the interpolant.
+    index
+        The index of the coefficient.
+    name
+        The name of the functional.
+    """
+
+    def __init__(self, coefficients, index, name=None):
+        assert 0 <= index < len(coefficients)
+        self.coefficients = coefficients
+        self.index = index
+        self.name = name
+        self.build_parameter_type(coefficients)
+
+    def evaluate(self, mu=None):
+        mu = self.parse_parameter(mu)
+        return self.coefficients.evaluate(mu)[self.index]
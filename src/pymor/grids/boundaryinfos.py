@@ -110,3 +110,66 @@ class SubGridBoundaryInfo(BoundaryInfoInterface):
         assert 1 <= codim < len(self.__masks) + 1, 'Invalid codimension'
         assert boundary_type in self.boundary_types
         return self.__masks[codim - 1][boundary_type]
+
+
+class PermutedBoundaryInfo(BoundaryInfoInterface):
+    """|BoundaryInfo| for a renumbered |Grid| (see :func:`~pymor.grids.reordering.reorder_grid`).
+
+    Parameters
+    ----------
+    grid
+        The renumbered |Grid|.
+    boundary_info
+        The |BoundaryInfo| of the original |Grid|.
+    permutations
+        Tuple, where `permutations[codim][i]` is the index in the original |Grid| of the
+        codim-`codim` entity with index `i` in `grid`.
+    """
+
+    def __init__(self, grid, boundary_info, permutations):
+        assert len(permutations) == grid.dim + 1
+        self.grid = grid
+        self.boundary_types = boundary_info.boundary_types
+        self.__masks = [{t: boundary_info.mask(t, codim)[permutations[codim]] for t in self.boundary_types}
+                        for codim in range(1, grid.dim + 1)]
+
+    def mask(self, boundary_type, codim):
+        assert 1 <= codim < len(self.__masks) + 1, 'Invalid codimension'
+        assert boundary_type in self.boundary_types
+        return self.__masks[codim - 1][boundary_type]
+
+
+class RefinedBoundaryInfo(BoundaryInfoInterface):
+    """|BoundaryInfo| for a refined |Grid| (see :func:`~pymor.grids.refinement.refine_grid`).
+
+    Parameters
+    ----------
+    grid
+        The refined |Grid|.
+    boundary_info
+        The |BoundaryInfo| of the original |Grid|.
+    parents
+        Tuple, where `parents[codim - 1]` is a pair `(codims, indices)` of |NumPy arrays|,
+        such that the codim-`codim` entity with index `i` in `grid` is contained in the
+        codim-`codims[i]` entity with index `indices[i]` of the original |Grid|
+        (`indices[i] == -1` for entities which are not contained in the boundary).
+    """
+
+    def __init__(self, grid, boundary_info, parents):
+        assert len(parents) == grid.dim
+        self.grid = grid
+        self.boundary_types = boundary_info.boundary_types
+        masks = []
+        for codim, (parent_codims, parent_indices) in enumerate(parents, start=1):
+            m = {t: np.zeros(grid.size(codim), dtype=bool) for t in self.boundary_types}
+            for parent_codim in np.unique(parent_codims):
+                selection = (parent_codims == parent_codim) & (parent_indices >= 0)
+                for t in self.boundary_types:
+                    m[t][selection] = boundary_info.mask(t, parent_codim)[parent_indices[selection]]
+            masks.append(m)
+        self.__masks = masks
+
+    def mask(self, boundary_type, codim):
+        assert 1 <= codim < len(self.__masks) + 1, 'Invalid codimension'
+        assert boundary_type in self.boundary_types
+        return self.__masks[codim - 1][boundary_type]
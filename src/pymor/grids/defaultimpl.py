@@ -5,8 +5,10 @@
 import numpy as np
 
 from pymor.core.cache import cached
-from pymor.tools.inverse import inv_transposed_two_by_two
-from pymor.tools.relations import inverse_relation
+from pymor.core.interfaces import abstractmethod
+from pymor.grids.spatialindex import SpatialIndex
+from pymor.tools.relations import inverse_relation_csr
+from pymor.tools.relations_numpy import padded_relation, relation_csr
 
 
 class ConformalTopologicalGridDefaultImplementations(object):
@@ -22,34 +24,30 @@ class ConformalTopologicalGridDefaultImplementations(object):
             # we assume that there is only one geometry type ...
             num_subsubentities = np.unique(SESE[SE[0]]).size
 
-            SSE = np.empty((SE.shape[0], num_subsubentities), dtype=np.int32)
-            SSE.fill(-1)
-
-            for ei in range(SE.shape[0]):
-                X = SESE[SE[ei]].ravel()
-                SSE[ei] = X[np.sort(np.unique(X, return_index=True)[1])]
+            SSE = padded_relation(*_first_occurrences(SESE[SE].reshape((SE.shape[0], -1))))
+            assert SSE.shape[1] == num_subsubentities
 
             return SSE
         else:
             raise NotImplementedError
 
     @cached
-    def _superentities_with_indices(self, codim, superentity_codim):
+    def _superentities_csr(self, codim, superentity_codim):
         assert 0 <= codim <= self.dim, 'Invalid codimension (was {})'.format(codim)
         assert 0 <= superentity_codim <= codim, 'Invalid codimension (was {})'.format(superentity_codim)
         SE = self.subentities(superentity_codim, codim)
-        return inverse_relation(SE, size_rhs=self.size(codim), with_indices=True)
+        return inverse_relation_csr(SE, size_rhs=self.size(codim))
 
-    @cached
+    # only the compact form is cached, the padded arrays are recomputed from it on each call
     def _superentities(self, codim, superentity_codim):
-        return self._superentities_with_indices(codim, superentity_codim)[0]
+        offsets, superentities, _ = self.superentities_csr(codim, superentity_codim)
+        return padded_relation(offsets, superentities)
 
-    @cached
     def _superentity_indices(self, codim, superentity_codim):
-        return self._superentities_with_indices(codim, superentity_codim)[1]
+        offsets, _, superentity_indices = self.superentities_csr(codim, superentity_codim)
+        return padded_relation(offsets, superentity_indices)
 
-    @cached
-    def _neighbours(self, codim, neighbour_codim, intersection_codim):
+    def _intersection_codim(self, codim, neighbour_codim, intersection_codim):
         assert 0 <= codim <= self.dim, 'Invalid codimension'
         assert 0 <= neighbour_codim <= self.dim, 'Invalid codimension'
         if intersection_codim is None:
@@ -58,39 +56,43 @@ class ConformalTopologicalGridDefaultImplementations(object):
             else:
                 intersection_codim = min(codim, neighbour_codim)
         assert max(codim, neighbour_codim) <= intersection_codim <= self.dim, 'Invalid codimension'
+        return intersection_codim
+
+    @cached
+    def _neighbours_csr(self, codim, neighbour_codim, intersection_codim):
+        intersection_codim = self._intersection_codim(codim, neighbour_codim, intersection_codim)
 
         if intersection_codim == min(codim, neighbour_codim):
             if codim < neighbour_codim:
-                return self.subentities(codim, neighbour_codim)
+                return relation_csr(self.subentities(codim, neighbour_codim))
             elif codim > neighbour_codim:
-                return self.superentities(codim, neighbour_codim)
+                return self.superentities_csr(codim, neighbour_codim)[:2]
             else:
-                return np.zeros((self.size(codim), 0), dtype=np.int32)
+                return np.zeros(self.size(codim) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32)
         else:
             EI = self.subentities(codim, intersection_codim)
             ISE = self.superentities(intersection_codim, neighbour_codim)
 
-            NB = np.empty((EI.shape[0], EI.shape[1] * ISE.shape[1]), dtype=np.int32)
-            NB.fill(-1)
-            NB_COUNTS = np.zeros(EI.shape[0], dtype=np.int32)
-
+            # all candidates, in the order of the intersections and their superentities
+            C = ISE[EI].reshape((EI.shape[0], -1))
+            valid = np.repeat(EI >= 0, ISE.shape[1], axis=1) & (C >= 0)
             if codim == neighbour_codim:
-                for ii, i in np.ndenumerate(EI):
-                    if i >= 0:
-                        for _, n in np.ndenumerate(ISE[i]):
-                            if n != ii[0] and n not in NB[ii[0]]:
-                                NB[ii[0], NB_COUNTS[ii[0]]] = n
-                                NB_COUNTS[ii[0]] += 1
-            else:
-                for ii, i in np.ndenumerate(EI):
-                    if i >= 0:
-                        for _, n in np.ndenumerate(ISE[i]):
-                            if n not in NB[ii[0]]:
-                                NB[ii[0], NB_COUNTS[ii[0]]] = n
-                                NB_COUNTS[ii[0]] += 1
+                valid &= C != np.arange(EI.shape[0])[:, np.newaxis]
+            return _first_occurrences(C, valid)
 
-            NB = NB[:NB.shape[0], :NB_COUNTS.max()]
-            return NB
+    @cached
+    def _neighbours(self, codim, neighbour_codim, intersection_codim):
+        intersection_codim = self._intersection_codim(codim, neighbour_codim, intersection_codim)
+
+        if intersection_codim == min(codim, neighbour_codim):
+            if codim < neighbour_codim:
+                return self.subentities(codim, neighbour_codim)
+            elif codim > neighbour_codim:
+                return self.superentities(codim, neighbour_codim)
+            else:
+                return np.zeros((self.size(codim), 0), dtype=np.int32)
+        else:
+            return padded_relation(*self.neighbours_csr(codim, neighbour_codim, intersection_codim))
 
     @cached
     def _boundaries(self, codim):
@@ -127,6 +129,26 @@ class ConformalTopologicalGridDefaultImplementations(object):
         return M
 
 
+def _first_occurrences(C, mask=None):
+    """Remove duplicate entries from each row of `C`, keeping the first occurrences in order.
+
+    Only the entries where `mask` is `True` are considered. The result
+    is returned in CSR format `(offsets, values)`.
+    """
+    num_rows, row_length = C.shape
+    indices = np.arange(C.size) if mask is None else np.nonzero(mask.ravel())[0]
+    rows, values = indices // row_length, C.ravel()[indices]
+    # group equal values of each row, the first occurrence being first in each group
+    order = np.lexsort((indices, values, rows))
+    rows, values = rows[order], values[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (values[1:] != values[:-1])
+    indices = np.sort(indices[order[first]])
+    offsets = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices // row_length, minlength=num_rows), out=offsets[1:])
+    return offsets, C.ravel()[indices].astype(np.int32)
+
+
 class ReferenceElementDefaultImplementations(object):
     """Provides default implementations for |ReferenceElements|."""
 
@@ -170,11 +192,7 @@ class AffineGridDefaultImplementations(object):
         SE = self.subentities(codim - 1, subentity_codim)[P]
         RSE = self.reference_element(codim - 1).subentities(1, subentity_codim - (codim - 1))[I]
 
-        SSE = np.empty_like(RSE)
-        for i in range(RSE.shape[0]):
-            SSE[i, :] = SE[i, RSE[i]]
-
-        return SSE
+        return SE[np.arange(RSE.shape[0])[:, np.newaxis], RSE].astype(RSE.dtype, copy=False)
 
     @cached
     def _embeddings(self, codim):
@@ -193,83 +211,207 @@ class AffineGridDefaultImplementations(object):
             B[INDS] = np.dot(A0[INDS], B1[i]) + B0[INDS]
         return A, B
 
-    @cached
-    def _jacobian_inverse_transposed(self, codim):
-        assert 0 <= codim < self.dim,\
-            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
-        J = self.embeddings(codim)[0]
-        if J.shape[-1] == J.shape[-2] == 2:
-            JIT = inv_transposed_two_by_two(J)
-        else:
-            pinv = np.linalg.pinv
-            JIT = np.array([pinv(j) for j in J]).swapaxes(1, 2)
-        return JIT
-
-    @cached
-    def _integration_elements(self, codim):
-        assert 0 <= codim <= self.dim,\
-            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
-
-        if codim == self.dim:
-            return np.ones(self.size(codim))
-
-        J = self.embeddings(codim)[0]
-        JTJ = np.einsum('eji,ejk->eik', J, J)
-
-        if JTJ.shape[1] == 1:
-            D = JTJ.ravel()
-        elif JTJ.shape[1] == 2:
-            D = (JTJ[:, 0, 0] * JTJ[:, 1, 1] - JTJ[:, 1, 0] * JTJ[:, 0, 1]).ravel()
-        else:
-            def f(A):
-                return np.linalg.det(A)
-            D = np.array([f(j) for j in J])
-
-        return np.sqrt(D)
+    def _embedding_classes(self, codim):
+        return None
 
     @cached
-    def _volumes(self, codim):
-        assert 0 <= codim <= self.dim,\
-            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
-        if codim == self.dim:
-            return np.ones(self.size(self.dim))
-        return self.reference_element(codim).volume * self.integration_elements(codim)
+    def _bounding_box(self):
+        bbox = np.empty((2, self.dim))
+        centers = self.centers(self.dim)
+        for dim in range(self.dim):
+            bbox[0, dim] = np.min(centers[:, dim])
+            bbox[1, dim] = np.max(centers[:, dim])
+        return bbox
 
     @cached
-    def _volumes_inverse(self, codim):
-        return np.reciprocal(self.volumes(codim))
+    def _spatial_index(self):
+        return SpatialIndex(self)
+
+    def _locate(self, points):
+        return self._spatial_index().locate(points)
+
+
+class StructuredGridDefaultImplementations(object):
+    """Provides fast implementations for grids with a regular structure.
+
+    The codim-`codim` entities of such a grid are divided into a few types (e.g.
+    horizontal and vertical edges). The entities of each type are arranged on a
+    regular `(n0, n1)` lattice and are numbered consecutively, first in x0-direction,
+    starting at a given offset. This layout is returned by `_structured_layout(codim)`,
+    which has to be implemented by the grid.
+
+    For such grids, the neighbours of the codim-0 entities computed by the generic
+    implementations of :class:`ConformalTopologicalGridDefaultImplementations` are
+    translation invariant: the neighbours of the entity of type `t` at lattice position
+    `(i, j)` are the entities `(t_k, i + di_k, j + dj_k)` of a fixed stencil, from which
+    the entities outside the lattice are removed. The stencils are read off from a small
+    reference grid `type(self)((5, 5))` using the generic implementations and are then
+    evaluated using index arithmetic only. For grids with less than six codim-0 entities
+    in some direction, the generic implementations are used.
+
+    The boundary entities are found in the same way: for each type of entities, the
+    boundary consists of the first and last few rows and columns of its lattice, which
+    are read off from the reference grid.
+
+    In addition, the embeddings of all entities are computed from the few distinct
+    Jacobians of the codim-0 embeddings returned by `_element_embedding_classes()`,
+    which has to be implemented by the grid as well (see :meth:`_embedding_classes`).
+    """
+
+    _reference_size = 5
+
+    @abstractmethod
+    def _structured_layout(self, codim):
+        """List of tuples `(offset, (n0, n1))` of all entity types or `None` if the grid is not structured."""
+        pass
+
+    @abstractmethod
+    def _element_embedding_classes(self):
+        """Tuple `(A, classes)` such that `embeddings(0)[0] == A[classes]`."""
+        pass
+
+    def _is_structured(self):
+        layout = self._structured_layout(0)
+        return layout is not None and all(min(shape) > self._reference_size for _, shape in layout)
+
+    def _neighbours_csr(self, codim, neighbour_codim, intersection_codim):
+        intersection_codim = self._intersection_codim(codim, neighbour_codim, intersection_codim)
+        if codim == 0 and intersection_codim > min(codim, neighbour_codim) and self._is_structured():
+            return self._structured_neighbours_csr(neighbour_codim, intersection_codim)
+        return super()._neighbours_csr(codim, neighbour_codim, intersection_codim)
 
     @cached
-    def _unit_outer_normals(self):
-        JIT = self.jacobian_inverse_transposed(0)
-        N = np.dot(JIT, self.reference_element(0).unit_outer_normals().T).swapaxes(1, 2)
-        return N / np.apply_along_axis(np.linalg.norm, 2, N)[:, :, np.newaxis]
+    def _structured_neighbours_csr(self, neighbour_codim, intersection_codim):
+        stencil = _reference_stencil(type(self), self._reference_size, neighbour_codim, intersection_codim)
+        return self._apply_stencil(0, neighbour_codim, stencil)
 
-    @cached
-    def _centers(self, codim):
-        assert 0 <= codim <= self.dim,\
-            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
-        A, B = self.embeddings(codim)
-        C = self.reference_element(codim).center()
-        return np.dot(A, C) + B
+    def _boundaries(self, codim):
+        if self._is_structured():
+            return self._structured_boundaries(codim)
+        return super()._boundaries(codim)
 
     @cached
-    def _diameters(self, codim):
-        assert 0 <= codim <= self.dim,\
-            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
-        return np.reshape(self.reference_element(codim).mapped_diameter(self.embeddings(codim)[0]), (-1,))
+    def _structured_boundaries(self, codim):
+        bands = _reference_boundary_bands(type(self), self._reference_size, codim)
+        boundaries = []
+        for (offset, (n0, n1)), (i_low, i_high, j_low, j_high) in zip(self._structured_layout(codim), bands):
+            # all entities of the first and last rows, the first and last entities of the other rows
+            J_outer = np.concatenate((np.arange(j_low), np.arange(n1 - j_high, n1)))
+            J_inner = np.arange(j_low, n1 - j_high)
+            I_outer = np.concatenate((np.arange(i_low), np.arange(n0 - i_high, n0)))
+            B = np.concatenate(((J_outer[:, np.newaxis] * n0 + np.arange(n0)).ravel(),
+                                (J_inner[:, np.newaxis] * n0 + I_outer).ravel()))
+            boundaries.append(np.sort(B) + offset)
+        return np.concatenate(boundaries).astype(np.int32)
+
+    def _structured_positions(self, codim, indices):
+        """Types and lattice positions `(t, i, j)` of the codim-`codim` entities with the given global `indices`."""
+        layout = self._structured_layout(codim)
+        offsets = np.array([o for o, _ in layout])
+        n0 = np.array([shape[0] for _, shape in layout])
+        t = np.searchsorted(offsets, indices, side='right') - 1
+        j, i = np.divmod(indices - offsets[t], n0[t])
+        return t, i, j
+
+    def _apply_stencil(self, codim, target_codim, stencil):
+        """Evaluate a stencil computed by :func:`_reference_stencil` in CSR format."""
+        target_layout = self._structured_layout(target_codim)
+        target_offsets = np.array([o for o, _ in target_layout])
+        target_n0 = np.array([shape[0] for _, shape in target_layout])
+        target_n1 = np.array([shape[1] for _, shape in target_layout])
+        counts, values = [], []
+        for (_, (n0, n1)), (t, di, dj) in zip(self._structured_layout(codim), stencil):
+            I = np.tile(np.arange(n0), n1)[:, np.newaxis] + di
+            J = np.repeat(np.arange(n1), n0)[:, np.newaxis] + dj
+            valid = (I >= 0) & (I < target_n0[t]) & (J >= 0) & (J < target_n1[t])
+            counts.append(np.count_nonzero(valid, axis=1))
+            values.append((target_offsets[t] + J * target_n0[t] + I)[valid].astype(np.int32))
+        offsets = np.zeros(self.size(codim) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(counts), out=offsets[1:])
+        return offsets, np.concatenate(values)
+
+    def _embedding_classes(self, codim):
+        return self._structured_embedding_classes(codim)
 
     @cached
-    def _quadrature_points(self, codim, order, npoints, quadrature_type):
-        P, _ = self.reference_element(codim).quadrature(order, npoints, quadrature_type)
-        A, B = self.embeddings(codim)
-        return np.einsum('eij,kj->eki', A, P) + B[:, np.newaxis, :]
+    def _structured_embedding_classes(self, codim):
+        if codim == 0:
+            return self._element_embedding_classes()
+        A0, classes0 = self._embedding_classes(codim - 1)
+        E = self.superentities(codim, codim - 1)[:, 0]
+        I = self.superentity_indices(codim, codim - 1)[:, 0]
+        A1, _ = self.reference_element(codim - 1).subentity_embedding(1)
+        keys = classes0[E] * len(A1) + I
+        used = np.flatnonzero(np.bincount(keys, minlength=len(A0) * len(A1)))
+        classes = np.empty(len(A0) * len(A1), dtype=np.int32)
+        classes[used] = np.arange(len(used))
+        A = np.array([np.dot(A0[k // len(A1)], A1[k % len(A1)]) for k in used])
+        return A, classes[keys]
 
     @cached
-    def _bounding_box(self):
-        bbox = np.empty((2, self.dim))
-        centers = self.centers(self.dim)
-        for dim in range(self.dim):
-            bbox[0, dim] = np.min(centers[:, dim])
-            bbox[1, dim] = np.max(centers[:, dim])
-        return bbox
+    def _embeddings(self, codim):
+        assert codim > 0, NotImplemented
+        E = self.superentities(codim, codim - 1)[:, 0]
+        I = self.superentity_indices(codim, codim - 1)[:, 0]
+        A0, classes0 = self._embedding_classes(codim - 1)
+        B0 = self.embeddings(codim - 1)[1]
+        _, B1 = self.reference_element(codim - 1).subentity_embedding(1)
+        A, classes = self._embedding_classes(codim)
+        AB1 = np.array([[np.dot(a0, b1) for b1 in B1] for a0 in A0])
+        return A[classes], AB1[classes0[E], I] + B0[E]
+
+
+def _reference_stencil(grid_type, reference_size, neighbour_codim, intersection_codim):
+    """Read off the stencil of a neighbour relation of the codim-0 entities from a small reference grid.
+
+    Returns, for each type of codim-0 entities, a tuple `(t, di, dj)` of arrays of the types
+    and relative lattice positions of the neighbours, in the order of the generic implementation.
+    """
+    key = (grid_type, reference_size, neighbour_codim, intersection_codim)
+    try:
+        return _reference_stencils[key]
+    except KeyError:
+        pass
+    # the reference grid is too small for the structured implementations
+    grid = grid_type((reference_size, reference_size))
+    offsets, values = grid.neighbours_csr(0, neighbour_codim, intersection_codim)
+    center = reference_size // 2
+    stencil = []
+    for offset, (n0, _) in grid._structured_layout(0):
+        e = offset + center * n0 + center
+        t, i, j = grid._structured_positions(neighbour_codim, values[offsets[e]:offsets[e + 1]])
+        stencil.append((t, i - center, j - center))
+    _reference_stencils[key] = stencil
+    return stencil
+
+
+_reference_stencils = {}
+
+
+def _reference_boundary_bands(grid_type, reference_size, codim):
+    """Read off the boundary entities of each type of codim-`codim` entities from a small reference grid.
+
+    Returns, for each type, a tuple `(i_low, i_high, j_low, j_high)` of the numbers of the
+    first and last columns and rows of the lattice which belong to the boundary.
+    """
+    key = (grid_type, reference_size, codim)
+    try:
+        return _reference_bands[key]
+    except KeyError:
+        pass
+    grid = grid_type((reference_size, reference_size))
+    mask = grid.boundary_mask(codim)
+
+    def band_widths(m):
+        # number of leading and trailing boundary entities
+        return (len(m) if m.all() else np.argmin(m)), (len(m) if m.all() else np.argmin(m[::-1]))
+
+    bands = []
+    for offset, (n0, n1) in grid._structured_layout(codim):
+        M = mask[offset:offset + n0 * n1].reshape((n1, n0))
+        bands.append(band_widths(M[n1 // 2]) + band_widths(M[:, n0 // 2]))
+    _reference_bands[key] = bands
+    return bands
+
+
+_reference_bands = {}
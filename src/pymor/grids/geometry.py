@@ -0,0 +1,221 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Precomputed geometric quantities of |AffineGrids|.
+
+The geometric methods of :class:`~pymor.grids.interfaces.AffineGridInterface`
+(:meth:`~pymor.grids.interfaces.AffineGridInterface.volumes`,
+:meth:`~pymor.grids.interfaces.AffineGridInterface.centers`, ...) return
+attributes of a :class:`GridGeometry` bundle, which holds all geometric
+quantities of the entities of a given codimension. The bundle is computed in a
+single vectorized pass from the embeddings of the entities the first time one of
+these quantities is requested.
+
+All bundles are kept in a single LRU cache, whose total memory consumption is
+bounded by the `max_memory` |default| of :func:`geometry_options`. When the
+limit is exceeded, the least recently used bundles are dropped and recomputed
+on their next use.
+"""
+
+from collections import OrderedDict
+import weakref
+
+import numpy as np
+
+from pymor.core.defaults import defaults
+from pymor.tools.inverse import inv_transposed_two_by_two
+
+
+@defaults('dtype', 'max_memory')
+def geometry_options(dtype='float64', max_memory=1024 ** 3):
+    """Options for the computation of :class:`GridGeometry` bundles.
+
+    `dtype` is the floating point type of the computed quantities ('float32'
+    or 'float64'), `max_memory` is the maximum number of bytes of all cached
+    bundles (`None` for no limit).
+    """
+    assert dtype in ('float32', 'float64')
+    return {'dtype': dtype, 'max_memory': max_memory}
+
+
+class GridGeometry(object):
+    """Geometric quantities of the codim-`codim` entities of an |AffineGrid|.
+
+    Do not instantiate directly, use
+    :meth:`~pymor.grids.interfaces.AffineGridInterface.geometry` instead.
+
+    Attributes
+    ----------
+    codim
+        The codimension of the entities.
+    integration_elements
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.integration_elements`.
+    volumes
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.volumes`.
+    volumes_inverse
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.volumes_inverse`.
+    centers
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.centers`.
+    diameters
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.diameters`.
+    jacobian_inverse_transposed
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.jacobian_inverse_transposed`
+        (`None` for `codim == grid.dim`).
+    unit_outer_normals
+        See :meth:`~pymor.grids.interfaces.AffineGridInterface.unit_outer_normals`
+        (`None` for `codim > 0`).
+    nbytes
+        The number of bytes of all arrays held by the bundle.
+    """
+
+    def __init__(self, grid, codim, dtype):
+        self.codim = codim
+        self.dtype = dtype
+        self._grid = weakref.ref(grid)
+        reference_element = grid.reference_element(codim)
+        n = grid.size(codim)
+
+        if codim == grid.dim:
+            self.integration_elements = np.ones(n, dtype=dtype)
+            self.volumes = np.ones(n, dtype=dtype)
+            self.volumes_inverse = np.ones(n, dtype=dtype)
+            self.centers = grid.embeddings(codim)[1].astype(dtype)
+            self.diameters = np.reshape(reference_element.mapped_diameter(grid.embeddings(codim)[0]),
+                                        (-1,)).astype(dtype)
+            self.jacobian_inverse_transposed = None
+            self.unit_outer_normals = None
+            self.quadrature_points_cache = {}
+            return
+
+        A, B = grid.embeddings(codim)
+        # for structured grids, the quantities only need to be computed for the few distinct Jacobians
+        classes = grid._embedding_classes(codim)
+        if classes is not None:
+            A, classes = classes
+
+        def expand(values):
+            return values if classes is None else values[classes]
+
+        JTJ = np.einsum('eji,ejk->eik', A, A)
+        k = JTJ.shape[1]
+        if k == 1:
+            D = JTJ.ravel()
+        elif k == 2:
+            D = JTJ[:, 0, 0] * JTJ[:, 1, 1] - JTJ[:, 1, 0] * JTJ[:, 0, 1]
+        else:
+            D = np.linalg.det(JTJ)
+        self.integration_elements = expand(np.sqrt(D)).astype(dtype)
+        self.volumes = (reference_element.volume * self.integration_elements).astype(dtype)
+        self.volumes_inverse = np.reciprocal(self.volumes)
+        self.centers = (expand(np.dot(A, reference_element.center())) + B).astype(dtype)
+        self.diameters = expand(np.reshape(reference_element.mapped_diameter(A), (-1,))).astype(dtype)
+
+        # transposed pseudo-inverse A (A^T A)^{-1} of the Jacobians
+        if A.shape[1] == A.shape[2] == 2:
+            JIT = inv_transposed_two_by_two(A)
+        elif k == 1:
+            JIT = A / JTJ
+        else:
+            JIT = np.einsum('eij,ejk->eik', A, np.linalg.inv(JTJ))
+        self.jacobian_inverse_transposed = expand(JIT).astype(dtype)
+
+        if codim == 0:
+            N = np.dot(JIT, reference_element.unit_outer_normals().T).swapaxes(1, 2)
+            N /= np.linalg.norm(N, axis=2)[:, :, np.newaxis]
+            self.unit_outer_normals = expand(N).astype(dtype)
+        else:
+            self.unit_outer_normals = None
+        self.quadrature_points_cache = {}
+
+    @property
+    def nbytes(self):
+        arrays = [self.integration_elements, self.volumes, self.volumes_inverse, self.centers, self.diameters,
+                  self.jacobian_inverse_transposed, self.unit_outer_normals]
+        arrays.extend(self.quadrature_points_cache.values())
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def quadrature_points(self, order=None, npoints=None, quadrature_type='default'):
+        """See :meth:`~pymor.grids.interfaces.AffineGridInterface.quadrature_points`."""
+        key = (order, npoints, quadrature_type)
+        try:
+            return self.quadrature_points_cache[key]
+        except KeyError:
+            pass
+        grid = self._grid()
+        P, _ = grid.reference_element(self.codim).quadrature(order, npoints, quadrature_type)
+        A, B = grid.embeddings(self.codim)
+        QP = (np.einsum('eij,kj->eki', A, P) + B[:, np.newaxis, :]).astype(self.dtype)
+        self.quadrature_points_cache[key] = QP
+        _account(self, QP.nbytes)
+        return QP
+
+
+_bundles = OrderedDict()
+_bundle_sizes = {}
+_grids_with_finalizer = set()
+_total_memory = [0]
+
+
+def grid_geometry(grid, codim):
+    """Return the (cached) :class:`GridGeometry` of the codim-`codim` entities of `grid`."""
+    key = (grid.uid, codim)
+    try:
+        bundle = _bundles[key]
+        _bundles.move_to_end(key)
+        return bundle
+    except KeyError:
+        pass
+
+    assert 0 <= codim <= grid.dim, 'Invalid Codimension (must be between 0 and {} but was {})'.format(grid.dim, codim)
+    options = geometry_options()
+    bundle = GridGeometry(grid, codim, np.dtype(options['dtype']))
+    _bundles[key] = bundle
+    _bundle_sizes[key] = 0
+    if grid.uid not in _grids_with_finalizer:
+        _grids_with_finalizer.add(grid.uid)
+        weakref.finalize(grid, _remove_grid, grid.uid)
+    bundle._key = key
+    _account(bundle, bundle.nbytes)
+    return bundle
+
+
+def cached_geometry_memory():
+    """Total number of bytes of all cached :class:`GridGeometry` bundles."""
+    return _total_memory[0]
+
+
+def clear_geometry_cache():
+    """Remove all :class:`GridGeometry` bundles from the cache."""
+    _bundles.clear()
+    _bundle_sizes.clear()
+    _total_memory[0] = 0
+
+
+def _account(bundle, nbytes):
+    key = bundle._key
+    if _bundles.get(key) is not bundle:
+        return
+    _bundle_sizes[key] += nbytes
+    _total_memory[0] += nbytes
+    max_memory = geometry_options()['max_memory']
+    if max_memory is None:
+        return
+    # drop least recently used bundles, but always keep the current one
+    while _total_memory[0] > max_memory and len(_bundles) > 1:
+        old_key = next(iter(_bundles))
+        if old_key == key:
+            _bundles.move_to_end(key)
+            continue
+        _remove(old_key)
+
+
+def _remove(key):
+    del _bundles[key]
+    _total_memory[0] -= _bundle_sizes.pop(key)
+
+
+def _remove_grid(uid):
+    _grids_with_finalizer.discard(uid)
+    for key in [k for k in _bundles if k[0] == uid]:
+        _remove(key)
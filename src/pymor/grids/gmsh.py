@@ -2,24 +2,36 @@
 # Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
 # License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
 
-from collections import defaultdict
+import os
+import time
 
 import numpy as np
-import time
 
 from pymor.core.exceptions import GmshError
 from pymor.core.logger import getLogger
 from pymor.grids.interfaces import BoundaryInfoInterface
+from pymor.grids.reordering import matrix_bandwidth, reordering_permutations
 from pymor.grids.unstructured import UnstructuredTriangleGrid
 
 
-def load_gmsh(gmsh_file):
+def load_gmsh(gmsh_file, cache=False, reorder=None):
     """Parse a Gmsh file and create a corresponding :class:`GmshGrid` and :class:`GmshBoundaryInfo`.
 
+    ASCII and binary MSH-files of format versions 2.2 and 4.1 are supported.
+
     Parameters
     ----------
     gmsh_file
-        File handle of the Gmsh MSH-file.
+        Path or file handle of the Gmsh MSH-file. Binary MSH-files have to be opened in
+        binary mode.
+    cache
+        If `True`, the parsed contents of the MSH-file are stored in `gmsh_file + '.npz'`
+        and are loaded from there as long as this file is newer than the MSH-file.
+        Requires `gmsh_file` to be a path.
+    reorder
+        If not `None`, the vertices and triangles are renumbered using the given method
+        (see :func:`~pymor.grids.reordering.reordering_permutations`) instead of following
+        the order of the MSH-file.
 
     Returns
     -------
@@ -29,18 +41,39 @@ def load_gmsh(gmsh_file):
         The generated :class:`GmshBoundaryInfo`.
     """
     logger = getLogger('pymor.grids.gmsh.load_gmsh')
+    assert not cache or isinstance(gmsh_file, str)
 
-    logger.info('Parsing gmsh file ...')
     tic = time.time()
-    sections = _parse_gmsh_file(gmsh_file)
+    cache_file = gmsh_file + '.npz' if cache else None
+    sections = None
+    if cache and os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(gmsh_file):
+        logger.info('Loading cached gmsh file {} ...'.format(cache_file))
+        sections = _load_sections(cache_file)
+    if sections is None:
+        logger.info('Parsing gmsh file ...')
+        if isinstance(gmsh_file, str):
+            with open(gmsh_file, 'rb') as f:
+                sections = _parse_gmsh_file(f)
+        else:
+            sections = _parse_gmsh_file(gmsh_file)
+        if cache:
+            _save_sections(cache_file, sections)
     toc = time.time()
     t_parse = toc - tic
 
+    if reorder is not None:
+        logger.info('Renumbering vertices and triangles ({}) ...'.format(reorder))
+        tic = time.time()
+        sections = _reorder_sections(sections, reorder)
+        logger.info('Renumbering took {} s'.format(time.time() - tic))
+
     logger.info('Create GmshGrid ...')
     tic = time.time()
     grid = GmshGrid(sections)
     toc = time.time()
     t_grid = toc - tic
+    if reorder is not None:
+        logger.info('Bandwidth of vertex coupling: {}, profile: {}'.format(*matrix_bandwidth(grid, 2)))
 
     logger.info('Create GmshBoundaryInfo ...')
     tic = time.time()
@@ -68,13 +101,11 @@ class GmshGrid(UnstructuredTriangleGrid):
         assert {'Nodes', 'Elements', 'PhysicalNames'} <= set(sections.keys())
         assert set(sections['Elements'].keys()) <= {'line', 'triangle'}
         assert 'triangle' in sections['Elements']
-        assert all(n[1][2] == 0 for n in sections['Nodes'])
-
-        node_ids = dict(zip([n[0] for n in sections['Nodes']], np.arange(len(sections['Nodes']), dtype=np.int32)))
-        vertices = np.array([n[1][0:2] for n in sections['Nodes']])
+        node_tags, coordinates = sections['Nodes']
+        assert np.all(coordinates[:, 2] == 0)
 
-        faces = np.array([[node_ids[nodes[0]], node_ids[nodes[1]], node_ids[nodes[2]]]
-                         for _, _, nodes in sections['Elements']['triangle']])
+        vertices = coordinates[:, :2]
+        faces = _node_indices(node_tags, sections['Elements']['triangle'][2])
         super().__init__(vertices, faces)
 
     def __str__(self):
@@ -97,34 +128,20 @@ class GmshBoundaryInfo(BoundaryInfoInterface):
         self.grid = grid
 
         # Save boundary types.
-        self.boundary_types = [pn[2] for pn in sections['PhysicalNames'] if pn[1] == 1]
-
-        # Compute ids, since Gmsh starts numbering with 1 instead of 0.
-        name_ids = dict(zip([pn[0] for pn in sections['PhysicalNames']], np.arange(len(sections['PhysicalNames']),
-                                                                                   dtype=np.int32)))
-        node_ids = dict(zip([n[0] for n in sections['Nodes']], np.arange(len(sections['Nodes']), dtype=np.int32)))
-
-        if 'line' in sections['Elements']:
-            superentities = grid.superentities(2, 1)
-
-            # find the edge for given vertices.
-            def find_edge(vertices):
-                edge_set = set(superentities[vertices[0]]).intersection(superentities[vertices[1]]) - {-1}
-                if len(edge_set) != 1:
-                    raise ValueError
-                return next(iter(edge_set))
-
-            line_ids = {l[0]: find_edge([node_ids[l[2][0]], node_ids[l[2][1]]]) for l in sections['Elements']['line']}
+        boundary_names = [pn for pn in sections['PhysicalNames'] if pn[1] == 1]
+        self.boundary_types = [pn[2] for pn in boundary_names]
 
         # compute boundary masks for all boundary types.
-        masks = {}
-        for bt in self.boundary_types:
-            masks[bt] = [np.array([False]*grid.size(1)), np.array([False]*grid.size(2))]
-            masks[bt][0][[line_ids[l[0]] for l in sections['Elements']['line']]] = \
-                [(bt == sections['PhysicalNames'][name_ids[l[1][0]]][2]) for l in sections['Elements']['line']]
-            ind = np.array([node_ids[n] for l in sections['Elements']['line'] for n in l[2]])
-            val = masks[bt][0][[line_ids[l[0]] for l in sections['Elements']['line'] for n in l[2]]]
-            masks[bt][1][ind[val]] = True
+        masks = {bt: [np.zeros(grid.size(1), dtype=bool), np.zeros(grid.size(2), dtype=bool)]
+                 for bt in self.boundary_types}
+        if 'line' in sections['Elements']:
+            _, physical_tags, nodes = sections['Elements']['line']
+            line_vertices = _node_indices(sections['Nodes'][0], nodes)
+            line_edges = _find_edges(grid, line_vertices)
+            for tag, _, bt in boundary_names:
+                lines = physical_tags == tag
+                masks[bt][0][line_edges[lines]] = True
+                masks[bt][1][line_vertices[lines].ravel()] = True
 
         self._masks = masks
 
@@ -134,152 +151,452 @@ class GmshBoundaryInfo(BoundaryInfoInterface):
         return self._masks[boundary_type][codim - 1]
 
 
-def _parse_gmsh_file(f):
+def _node_indices(node_tags, nodes):
+    """Translate Gmsh node tags to (0-based) vertex indices."""
+    sorter = np.argsort(node_tags, kind='mergesort')
+    ind = np.searchsorted(node_tags, nodes, sorter=sorter)
+    ind[ind == len(node_tags)] = 0
+    ind = sorter[ind]
+    if np.any(node_tags[ind] != nodes):
+        raise GmshError('elements reference undefined nodes')
+    return ind.astype(np.int32)
+
+
+def _reorder_sections(sections, method):
+    node_tags, coordinates = sections['Nodes']
+    element_tags, physical_tags, nodes = sections['Elements']['triangle']
+    vertex_permutation, face_permutation = reordering_permutations(coordinates[:, :2],
+                                                                   _node_indices(node_tags, nodes), method)
+    sections = dict(sections)
+    sections['Nodes'] = (node_tags[vertex_permutation], coordinates[vertex_permutation])
+    sections['Elements'] = dict(sections['Elements'])
+    sections['Elements']['triangle'] = (element_tags[face_permutation], physical_tags[face_permutation],
+                                        nodes[face_permutation])
+    return sections
+
+
+def _find_edges(grid, line_vertices):
+    """Find the edges of `grid` given by pairs of vertex indices."""
+    num_vertices = grid.size(2)
+    edge_vertices = np.sort(grid.subentities(1, 2), axis=1).astype(np.int64)
+    edge_keys = edge_vertices[:, 0] * num_vertices + edge_vertices[:, 1]
+    line_vertices = np.sort(line_vertices, axis=1).astype(np.int64)
+    line_keys = line_vertices[:, 0] * num_vertices + line_vertices[:, 1]
+    sorter = np.argsort(edge_keys)
+    ind = np.searchsorted(edge_keys, line_keys, sorter=sorter)
+    ind[ind == len(edge_keys)] = 0
+    edges = sorter[ind]
+    if np.any(edge_keys[edges] != line_keys):
+        raise GmshError('line elements do not coincide with edges of the grid')
+    return edges
+
 
-    allowed_sections = ['Nodes', 'Elements', 'PhysicalNames', 'Periodic', 'NodeData',
-                        'ElementData', 'ElementNodeData']
+# Parsing of MSH-files
+#
+# The parsed sections are stored in a dict with the following entries:
+#
+#   'Nodes'          tuple (node tags, (num_nodes, 3)-array of coordinates)
+#   'Elements'       dict mapping 'line'/'triangle' to a tuple
+#                    (element tags, physical tags, (num_elements, num_element_nodes)-array of node tags)
+#   'PhysicalNames'  list of tuples (physical tag, dimension, name)
 
-    supported_sections = ['Nodes', 'Elements', 'PhysicalNames']
+ELEMENT_TYPES = {1: 'line', 2: 'triangle', 15: 'point'}
+ELEMENT_NODES = {1: 2, 2: 3, 15: 1}
 
+ALLOWED_SECTIONS = ['Nodes', 'Elements', 'PhysicalNames', 'Entities', 'PartitionedEntities', 'Periodic',
+                    'GhostElements', 'Parametrizations', 'NodeData', 'ElementData', 'ElementNodeData',
+                    'InterpolationScheme']
+
+SUPPORTED_SECTIONS = {'2.2': ['Nodes', 'Elements', 'PhysicalNames'],
+                      '4.1': ['Nodes', 'Elements', 'PhysicalNames', 'Entities']}
+
+_CACHE_VERSION = 1
+
+
+def _parse_gmsh_file(f):
+    data = getattr(f, 'buffer', f).read()
+    if isinstance(data, str):
+        data = data.encode()
+
+    # header
+    line, pos = _read_line(data, 0)
+    if line != b'$MeshFormat':
+        raise GmshError('expected $MeshFormat, got {}'.format(line.decode(errors='replace')))
+    line, pos = _read_line(data, pos)
+    header = line.decode(errors='replace').split()
+    if len(header) != 3:
+        raise GmshError('header {} has {} fields, expected 3'.format(' '.join(header), len(header)))
+    version = header[0]
+    if version not in SUPPORTED_SECTIONS:
+        raise GmshError('wrong file format version: got {}, expected 2.2 or 4.1'.format(version))
     try:
+        file_type = int(header[1])
+    except ValueError:
+        raise GmshError('malformed header: expected integer, got {}'.format(header[1]))
+    if file_type not in (0, 1):
+        raise GmshError('wrong file type: got {}, expected 0 (ASCII) or 1 (binary)'.format(file_type))
+    try:
+        data_size = int(header[2])
+    except ValueError:
+        raise GmshError('malformed header: expected integer, got {}'.format(header[2]))
+
+    binary = file_type == 1
+    if binary:
+        if data_size != 8:
+            raise GmshError('unsupported data size {}, expected 8'.format(data_size))
+        one = data[pos:pos + 4]
+        if one == np.array(1, dtype='<i4').tobytes():
+            byteorder = '<'
+        elif one == np.array(1, dtype='>i4').tobytes():
+            byteorder = '>'
+        else:
+            raise GmshError('malformed binary header: cannot determine byte order')
+        pos += 4
+    line, pos = _read_line(data, _skip_whitespace(data, pos))
+    if line != b'$EndMeshFormat':
+        raise GmshError('expected $EndMeshFormat, got {}'.format(line.decode(errors='replace')))
+
+    # sections
+    sections = {}
+    entities = {}
+    while True:
+        pos = _skip_whitespace(data, pos)
+        if pos == len(data):
+            break
+        line, pos = _read_line(data, pos)
+        if not line.startswith(b'$'):
+            raise GmshError('expected section name, got {}'.format(line.decode(errors='replace')))
+        section = line[1:].decode(errors='replace')
+        if section not in ALLOWED_SECTIONS:
+            raise GmshError('unknown section type: {}'.format(section))
+        if section not in SUPPORTED_SECTIONS[version]:
+            raise GmshError('unsupported section type: {}'.format(section))
+        if section in sections:
+            raise GmshError('only one {} section allowed'.format(section))
+        end_marker = b'$End' + section.encode()
+
+        if section == 'PhysicalNames' or not binary:
+            end = data.find(end_marker, pos)
+            if end == -1:
+                raise GmshError('file ended while in section {}'.format(section))
+            content = data[pos:end]
+            if section == 'PhysicalNames':
+                sections[section] = _parse_names(content)
+            elif version == '2.2':
+                sections[section] = (_parse_nodes_ascii_2(content) if section == 'Nodes' else
+                                     _parse_elements_ascii_2(content))
+            else:
+                reader = _TokenReader(content)
+                sections[section] = _parse_section_4(section, reader, entities)
+                if not reader.at_end():
+                    raise GmshError('malformed {} section'.format(section))
+            pos = end
+        else:
+            reader = _BinaryReader(data, pos, byteorder)
+            if version == '2.2':
+                sections[section] = (_parse_nodes_binary_2(reader) if section == 'Nodes' else
+                                     _parse_elements_binary_2(reader))
+            else:
+                sections[section] = _parse_section_4(section, reader, entities)
+            pos = _skip_whitespace(data, reader.pos)
+
+        line, pos = _read_line(data, pos)
+        if line != end_marker:
+            raise GmshError('expected {}, got {}'.format(end_marker.decode(), line.decode(errors='replace')))
+
+    sections.pop('Entities', None)
+    for section in ('Nodes', 'Elements'):
+        if section not in sections:
+            raise GmshError('missing {} section'.format(section))
+    sections.setdefault('PhysicalNames', [])
+    return sections
 
-        l = next(f).strip()
-        if l != '$MeshFormat':
-            raise GmshError('expected $MeshFormat, got {}'.format(l))
 
-        l = next(f).strip()
-        header = l.split(' ')
-        if len(header) != 3:
-            raise GmshError('header {} has {} fields, expected 3'.format(l, len(header)))
+def _read_line(data, pos):
+    end = data.find(b'\n', pos)
+    if end == -1:
+        if pos >= len(data):
+            raise GmshError('unexpected end of file')
+        end = len(data)
+    return data[pos:end].strip(), end + 1
 
-        if header[0] != '2.2':
-            raise GmshError('wrong file format version: got {}, expected 2.2'.format(header[0]))
 
-        try:
-            file_type = int(header[1])
-        except ValueError:
-            raise GmshError('malformed header: expected integer, got {}'.format(header[1]))
+def _skip_whitespace(data, pos):
+    while pos < len(data) and data[pos:pos + 1].isspace():
+        pos += 1
+    return pos
 
-        if file_type != 0:
-            raise GmshError('wrong file type: only ASCII gmsh files are supported')
 
-        try:
-            data_size = int(header[2])    # NOQA
-        except ValueError:
-            raise GmshError('malformed header: expected integer, got {}'.format(header[2]))
+class _TokenReader:
+    """Sequential access to the numbers of an ASCII section."""
 
-        l = next(f).strip()
-        if l != '$EndMeshFormat':
-            raise GmshError('expected $EndMeshFormat, got {}'.format(l))
+    def __init__(self, content):
+        self.tokens = _tokens(content, np.float64)
+        self.pos = 0
 
-    except StopIteration:
-        raise GmshError('unexcpected end of file')
+    def read(self, dtype, count):
+        if self.pos + count > len(self.tokens):
+            raise GmshError('unexpected end of section')
+        values = self.tokens[self.pos:self.pos + count].astype(dtype)
+        self.pos += count
+        return values
 
-    in_section = False
-    sections = defaultdict(list)
+    def at_end(self):
+        return self.pos == len(self.tokens)
 
-    for l in f:
-        l = l.strip()
-        if l == '':
-            continue
-        if not in_section:
-            if not l.startswith('$'):
-                raise GmshError('expected section name, got {}'.format(l))
-            section = l[1:]
-            if section not in allowed_sections:
-                raise GmshError('unknown section type: {}'.format(section))
-            if section not in supported_sections:
-                raise GmshError('unsupported section type: {}'.format(section))
-            if section in sections:
-                raise GmshError('only one {} section allowed'.format(section))
-            in_section = True
-        elif l.startswith('$'):
-            if l != '$End' + section:
-                raise GmshError('expected $End{}, got {}'.format(section, l))
-            in_section = False
-        else:
-            sections[section].append(l)
-
-    if in_section:
-        raise GmshError('file ended while in section {}'.format(section))
-
-    # now we parse each section ...
-
-    def parse_nodes(nodes):
-        try:
-            num_nodes = int(nodes[0])
-        except ValueError:
-            raise GmshError('first line of nodes sections is not a number: {}'.format(nodes[0]))
-        if len(nodes) != num_nodes + 1:
-            raise GmshError('number-of-nodes field does not match number of lines in nodes section')
-
-        nodes = [n.split(' ') for n in nodes[1:]]
-        if not all(len(n) == 4 for n in nodes):
-            raise GmshError('malformed nodes section')
-
-        try:
-            nodes = [(int(a), (float(b), float(c), float(d))) for a, b, c, d in nodes]
-        except ValueError:
-            raise GmshError('malformed nodes section')
-
-        return nodes
-
-    def parse_elements(elements):
-        try:
-            num_elements = int(elements[0])
-        except ValueError:
-            raise GmshError('first line of elements sections is not a number: {}'.format(elements[0]))
-        if len(elements) != num_elements + 1:
-            raise GmshError('number-of-elements field does not match number of lines in elements section')
-
-        elements = [e.split(' ') for e in elements[1:]]
-        try:
-            elements = [tuple(int(f) for f in e) for e in elements]
-        except ValueError:
-            raise GmshError('malformed elements section')
 
-        element_types = {1: 'line', 2: 'triangle'}
-        element_nodes = {'line': 2, 'triangle': 3}
+class _BinaryReader:
+    """Sequential access to the binary data of a section."""
 
-        def parse_line(fields):
-            if fields[1] not in element_types:
-                raise GmshError('element type {} not supported'.format(fields[0]))
-            element_type = element_types[fields[1]]
-            num_nodes = element_nodes[element_type]
-            num_tags = fields[2]
-            if len(fields) != num_nodes + num_tags + 3:
-                raise GmshError('malformed elements section')
-            return element_type, (fields[0], tuple(fields[3:3 + num_tags]), fields[3 + num_tags:])
+    def __init__(self, data, pos, byteorder):
+        self.data = data
+        self.pos = pos
+        self.byteorder = byteorder
 
-        elements_by_type = defaultdict(list)
-        for e in elements:
-            t, l = parse_line(e)
-            elements_by_type[t].append(l)
+    def read(self, dtype, count):
+        dtype = np.dtype(dtype).newbyteorder(self.byteorder)
+        if self.pos + count * dtype.itemsize > len(self.data):
+            raise GmshError('unexpected end of file')
+        values = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.pos)
+        self.pos += count * dtype.itemsize
+        return values
 
-        return elements_by_type
 
-    def parse_names(physical_names):
-        try:
-            num_elements = int(physical_names[0])
-        except ValueError:
-            raise GmshError('first line of physical names sections is not a number: {}'.format(physical_names[0]))
-        if len(physical_names) != num_elements + 1:
-            raise GmshError('number-of-names field does not match number of lines in physical names section')
+_WHITESPACE = np.zeros(256, dtype=bool)
+_WHITESPACE[np.frombuffer(b' \t\n\r\x0b\x0c', dtype=np.uint8)] = True
 
-        physical_names = [pn.split(' ') for pn in physical_names[1:]]
-        if not all(len(pn) == 3 for pn in physical_names):
-            raise GmshError('malformed physical names section')
 
-        try:
-            physical_names = [(int(b), int(a), str(c).replace('"', '')) for a, b, c in physical_names]
-        except ValueError:
-            raise GmshError('malformed physical names section')
+def _token_starts(content):
+    """Positions of the first characters of all whitespace separated tokens in `content`."""
+    whitespace = _WHITESPACE[np.frombuffer(content, dtype=np.uint8)]
+    return np.flatnonzero(~whitespace & np.concatenate(([True], whitespace[:-1])))
 
-        return physical_names
 
-    parser_map = {'Nodes': parse_nodes, 'Elements': parse_elements, 'PhysicalNames': parse_names}
+def _tokens(content, dtype, token_starts=None):
+    """Parse all whitespace separated numbers in `content`.
 
-    for k, v in sections.items():
-        sections[k] = parser_map[k](v)
+    `token_starts` can be passed if the result of :func:`_token_starts` is already known.
+    """
+    tokens = np.fromstring(content, dtype=dtype, sep=' ')
+    if token_starts is None:
+        token_starts = _token_starts(content)
+    if len(tokens) != len(token_starts):
+        raise GmshError('malformed section: could not parse all numbers')
+    return tokens
 
-    return sections
+
+def _split_count(content, section):
+    """Split off the first line of a section, containing the number of entries."""
+    line, pos = _read_line(content, _skip_whitespace(content, 0))
+    try:
+        return int(line), content[pos:]
+    except ValueError:
+        raise GmshError('first line of {} section is not a number: {}'.format(section, line.decode(errors='replace')))
+
+
+def _element_sections(types, element_tags, physical_tags, nodes_by_type):
+    elements = {}
+    for t in np.unique(types):
+        if t not in ELEMENT_TYPES:
+            raise GmshError('element type {} not supported'.format(t))
+        if ELEMENT_TYPES[t] == 'point':
+            continue
+        ind = np.flatnonzero(types == t)
+        elements[ELEMENT_TYPES[t]] = (element_tags[ind], physical_tags[ind], nodes_by_type(t, ind))
+    return elements
+
+
+def _parse_nodes_ascii_2(content):
+    num_nodes, content = _split_count(content, 'nodes')
+    nodes = _tokens(content, np.float64)
+    if len(nodes) != 4 * num_nodes:
+        raise GmshError('number-of-nodes field does not match number of lines in nodes section')
+    nodes = nodes.reshape((-1, 4))
+    return nodes[:, 0].astype(np.int64), nodes[:, 1:].copy()
+
+
+def _parse_elements_ascii_2(content):
+    num_elements, content = _split_count(content, 'elements')
+    token_starts = _token_starts(content)
+    tokens = _tokens(content, np.int64, token_starts)
+
+    # as the number of fields varies between the lines, we determine the position
+    # of the first token of each line from the raw characters
+    chars = np.frombuffer(content, dtype=np.uint8)
+    token_lines = np.searchsorted(np.flatnonzero(chars == ord('\n')), token_starts)
+    line_starts = np.flatnonzero(np.concatenate(([True], token_lines[1:] != token_lines[:-1])))[:len(token_lines)]
+    if len(line_starts) != num_elements:
+        raise GmshError('number-of-elements field does not match number of lines in elements section')
+    if num_elements == 0:
+        return {}
+
+    line_lengths = np.diff(np.append(line_starts, len(tokens)))
+    types = tokens[line_starts + 1]
+    num_tags = tokens[line_starts + 2]
+    unsupported = ~np.in1d(types, list(ELEMENT_NODES))
+    if np.any(unsupported):
+        raise GmshError('element type {} not supported'.format(types[unsupported][0]))
+    num_nodes = np.zeros(max(ELEMENT_NODES) + 1, dtype=np.int64)
+    num_nodes[list(ELEMENT_NODES)] = list(ELEMENT_NODES.values())
+    if np.any(line_lengths != 3 + num_tags + num_nodes[types]):
+        raise GmshError('malformed elements section')
+    physical_tags = np.where(num_tags > 0, tokens[np.minimum(line_starts + 3, len(tokens) - 1)], 0)
+
+    def nodes_by_type(t, ind):
+        first_node = line_starts[ind] + 3 + num_tags[ind]
+        return tokens[first_node[:, np.newaxis] + np.arange(ELEMENT_NODES[t])]
+
+    return _element_sections(types, tokens[line_starts], physical_tags, nodes_by_type)
+
+
+def _parse_nodes_binary_2(reader):
+    num_nodes = _read_count(reader)
+    nodes = reader.read([('tag', 'i4'), ('x', 'f8', 3)], num_nodes)
+    return nodes['tag'].astype(np.int64), nodes['x'].astype(np.float64)
+
+
+def _parse_elements_binary_2(reader):
+    num_elements = _read_count(reader)
+    types, element_tags, physical_tags, nodes = [], [], [], []
+    read = 0
+    while read < num_elements:
+        element_type, count, num_tags = reader.read('i4', 3)
+        if element_type not in ELEMENT_NODES:
+            raise GmshError('element type {} not supported'.format(element_type))
+        if count <= 0 or read + count > num_elements:
+            raise GmshError('malformed elements section')
+        block = reader.read('i4', count * (1 + num_tags + ELEMENT_NODES[element_type]))
+        block = block.reshape((count, 1 + num_tags + ELEMENT_NODES[element_type]))
+        types.append(np.full(count, element_type))
+        element_tags.append(block[:, 0])
+        physical_tags.append(block[:, 1] if num_tags > 0 else np.zeros(count, dtype=np.int32))
+        nodes.append(block[:, 1 + num_tags:])
+        read += count
+    if num_elements == 0:
+        return {}
+
+    types = np.concatenate(types)
+    block_offsets = np.cumsum([0] + [len(n) for n in nodes])
+
+    def nodes_by_type(t, ind):
+        blocks = [n for n, tt in zip(nodes, types[block_offsets[:-1]]) if tt == t]
+        return np.concatenate(blocks).astype(np.int64)
+
+    return _element_sections(types, np.concatenate(element_tags).astype(np.int64),
+                             np.concatenate(physical_tags).astype(np.int64), nodes_by_type)
+
+
+def _read_count(reader):
+    """Read the number of entries in the ASCII line preceding binary section data."""
+    line, pos = _read_line(reader.data, _skip_whitespace(reader.data, reader.pos))
+    try:
+        count = int(line)
+    except ValueError:
+        raise GmshError('expected number of entries, got {}'.format(line.decode(errors='replace')))
+    reader.pos = pos
+    return count
+
+
+def _parse_section_4(section, reader, entities):
+    if section == 'Entities':
+        return _parse_entities_4(reader, entities)
+    elif section == 'Nodes':
+        return _parse_nodes_4(reader)
+    else:
+        return _parse_elements_4(reader, entities)
+
+
+def _parse_entities_4(reader, entities):
+    counts = reader.read('u8', 4)
+    for dim, count in enumerate(counts):
+        for _ in range(int(count)):
+            tag = int(reader.read('i4', 1)[0])
+            reader.read('f8', 3 if dim == 0 else 6)
+            physical_tags = reader.read('i4', int(reader.read('u8', 1)[0]))
+            entities[(dim, tag)] = int(physical_tags[0]) if len(physical_tags) else 0
+            if dim > 0:
+                reader.read('i4', int(reader.read('u8', 1)[0]))
+    return entities
+
+
+def _parse_nodes_4(reader):
+    num_blocks, num_nodes, _, _ = reader.read('u8', 4)
+    tags, coordinates = [], []
+    for _ in range(int(num_blocks)):
+        dim, _, parametric = reader.read('i4', 3)
+        count = int(reader.read('u8', 1)[0])
+        tags.append(reader.read('u8', count).astype(np.int64))
+        num_coordinates = 3 + dim if parametric else 3
+        coordinates.append(reader.read('f8', count * num_coordinates).reshape((count, num_coordinates))[:, :3])
+    tags = np.concatenate(tags) if tags else np.zeros(0, dtype=np.int64)
+    if len(tags) != num_nodes:
+        raise GmshError('number-of-nodes field does not match number of nodes in nodes section')
+    return tags, np.concatenate(coordinates).astype(np.float64) if coordinates else np.zeros((0, 3))
+
+
+def _parse_elements_4(reader, entities):
+    num_blocks, num_elements, _, _ = reader.read('u8', 4)
+    blocks = {}
+    for _ in range(int(num_blocks)):
+        dim, entity, element_type = reader.read('i4', 3)
+        count = int(reader.read('u8', 1)[0])
+        if element_type not in ELEMENT_NODES:
+            raise GmshError('element type {} not supported'.format(element_type))
+        block = reader.read('u8', count * (1 + ELEMENT_NODES[element_type])).astype(np.int64)
+        block = block.reshape((count, 1 + ELEMENT_NODES[element_type]))
+        physical_tags = np.full(count, entities.get((int(dim), int(entity)), 0), dtype=np.int64)
+        blocks.setdefault(int(element_type), []).append((block, physical_tags))
+    if sum(len(b) for bs in blocks.values() for b, _ in bs) != num_elements:
+        raise GmshError('number-of-elements field does not match number of elements in elements section')
+
+    elements = {}
+    for element_type, bs in blocks.items():
+        if ELEMENT_TYPES[element_type] == 'point':
+            continue
+        block = np.concatenate([b for b, _ in bs])
+        elements[ELEMENT_TYPES[element_type]] = (block[:, 0], np.concatenate([p for _, p in bs]), block[:, 1:])
+    return elements
+
+
+def _parse_names(content):
+    num_names, content = _split_count(content, 'physical names')
+    physical_names = content.decode(errors='replace').strip().splitlines()
+    if len(physical_names) != num_names:
+        raise GmshError('number-of-names field does not match number of lines in physical names section')
+
+    physical_names = [pn.split(None, 2) for pn in physical_names]
+    if not all(len(pn) == 3 for pn in physical_names):
+        raise GmshError('malformed physical names section')
+
+    try:
+        physical_names = [(int(b), int(a), str(c).strip().replace('"', '')) for a, b, c in physical_names]
+    except ValueError:
+        raise GmshError('malformed physical names section')
+
+    return physical_names
+
+
+def _save_sections(path, sections):
+    arrays = {'version': np.array(_CACHE_VERSION),
+              'node_tags': sections['Nodes'][0], 'node_coordinates': sections['Nodes'][1],
+              'names_tags': np.array([pn[0] for pn in sections['PhysicalNames']], dtype=np.int64),
+              'names_dims': np.array([pn[1] for pn in sections['PhysicalNames']], dtype=np.int64),
+              'names': np.array([pn[2] for pn in sections['PhysicalNames']], dtype=np.str_)}
+    for element_type, (element_tags, physical_tags, nodes) in sections['Elements'].items():
+        arrays[element_type + '_tags'] = element_tags
+        arrays[element_type + '_physical_tags'] = physical_tags
+        arrays[element_type + '_nodes'] = nodes
+    # write to a file object, so that np.savez does not append another '.npz' suffix
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _load_sections(path):
+    with np.load(path) as arrays:
+        if arrays['version'] != _CACHE_VERSION:
+            return None
+        return {'Nodes': (arrays['node_tags'], arrays['node_coordinates']),
+                'Elements': {t: (arrays[t + '_tags'], arrays[t + '_physical_tags'], arrays[t + '_nodes'])
+                             for t in ('line', 'triangle') if t + '_tags' in arrays},
+                'PhysicalNames': [(int(tag), int(dim), str(name)) for tag, dim, name in
+                                  zip(arrays['names_tags'], arrays['names_dims'], arrays['names'])]}
@@ -9,6 +9,7 @@ from pymor.core.cache import CacheableInterface, cached
 from pymor.grids.defaultimpl import (ConformalTopologicalGridDefaultImplementations,
                                      ReferenceElementDefaultImplementations,
                                      AffineGridDefaultImplementations,)
+from pymor.grids.geometry import grid_geometry
 
 
 class ConformalTopologicalGridInterface(ConformalTopologicalGridDefaultImplementations, CacheableInterface):
@@ -62,6 +63,22 @@ class ConformalTopologicalGridInterface(ConformalTopologicalGridDefaultImplement
         """
         return self._superentity_indices(codim, superentity_codim)
 
+    def superentities_csr(self, codim, superentity_codim):
+        """Compact representation of :meth:`superentities` and :meth:`superentity_indices`.
+
+        Returns a tuple `(offsets, superentities, superentity_indices)` of |NumPy arrays|
+        such that `superentities[offsets[e]:offsets[e+1]]` are the global indices of the
+        codim-`superentity_codim` superentities of the codim-`codim` entity `e`, sorted by
+        global index, and `superentity_indices[offsets[e]:offsets[e+1]]` are the local
+        indices of `e` in these superentities. In contrast to :meth:`superentities`, no
+        padding with -1 is required, which saves memory for entities of high valence.
+
+        The default implementation is to compute the result from
+        `subentities(superentity_codim, codim)`. The padded arrays returned by
+        :meth:`superentities` and :meth:`superentity_indices` are derived from it.
+        """
+        return self._superentities_csr(codim, superentity_codim)
+
     def neighbours(self, codim, neighbour_codim, intersection_codim=None):
         """`retval[e,n]` is the global index of the `n`-th codim-`neighbour_codim` entitiy of the
         codim-`codim` entity `e` that shares with `e` a subentity of codimension `intersection_codim`.
@@ -75,6 +92,15 @@ class ConformalTopologicalGridInterface(ConformalTopologicalGridDefaultImplement
         """
         return self._neighbours(codim, neighbour_codim, intersection_codim)
 
+    def neighbours_csr(self, codim, neighbour_codim, intersection_codim=None):
+        """Compact representation of :meth:`neighbours`.
+
+        Returns a tuple `(offsets, neighbours)` of |NumPy arrays| such that
+        `neighbours[offsets[e]:offsets[e+1]]` are the entries of
+        `neighbours(codim, neighbour_codim, intersection_codim)[e]` without padding.
+        """
+        return self._neighbours_csr(codim, neighbour_codim, intersection_codim)
+
     def boundary_mask(self, codim):
         """`retval[e]` is true iff the codim-`codim` entity with global index
         `e` is a boundary entity.
@@ -239,36 +265,50 @@ class AffineGridInterface(AffineGridDefaultImplementations, ConformalTopological
         """
         return self._embeddings(codim)
 
+    def geometry(self, codim):
+        """Returns the :class:`~pymor.grids.geometry.GridGeometry` bundle of all geometric quantities
+        of the codim-`codim` entities.
+
+        The bundle is computed on first access and kept in a memory-bounded cache
+        (see :mod:`pymor.grids.geometry`). The methods :meth:`jacobian_inverse_transposed`,
+        :meth:`integration_elements`, :meth:`volumes`, :meth:`volumes_inverse`,
+        :meth:`unit_outer_normals`, :meth:`centers`, :meth:`diameters` and
+        :meth:`quadrature_points` return attributes of this bundle.
+        """
+        return grid_geometry(self, codim)
+
     def jacobian_inverse_transposed(self, codim):
         """`retval[e]` is the transposed (pseudo-)inverse of the Jacobian of `embeddings(codim)[e]`.
         """
-        return self._jacobian_inverse_transposed(codim)
+        assert 0 <= codim < self.dim,\
+            'Invalid Codimension (must be between 0 and {} but was {})'.format(self.dim, codim)
+        return grid_geometry(self, codim).jacobian_inverse_transposed
 
     def integration_elements(self, codim):
         """`retval[e]` is given as `sqrt(det(A^T*A))`, where `A = embeddings(codim)[0][e]`."""
-        return self._integration_elements(codim)
+        return grid_geometry(self, codim).integration_elements
 
     def volumes(self, codim):
         """`retval[e]` is the (dim-`codim`)-dimensional volume of the codim-`codim` entity with global index `e`."""
-        return self._volumes(codim)
+        return grid_geometry(self, codim).volumes
 
     def volumes_inverse(self, codim):
         """`retval[e] = 1 / volumes(codim)[e]`."""
-        return self._volumes_inverse(codim)
+        return grid_geometry(self, codim).volumes_inverse
 
     def unit_outer_normals(self):
         """`retval[e,i]` is the unit outer normal to the i-th codim-1 subentity
         of the codim-0 entitiy with global index `e`.
         """
-        return self._unit_outer_normals()
+        return grid_geometry(self, 0).unit_outer_normals
 
     def centers(self, codim):
         """`retval[e]` is the barycenter of the codim-`codim` entity with global index `e`."""
-        return self._centers(codim)
+        return grid_geometry(self, codim).centers
 
     def diameters(self, codim):
         """`retval[e]` is the diameter of the codim-`codim` entity with global index `e`."""
-        return self._diameters(codim)
+        return grid_geometry(self, codim).diameters
 
     def quadrature_points(self, codim, order=None, npoints=None, quadrature_type='default'):
         """`retval[e]` is an array of quadrature points in global coordinates
@@ -280,12 +320,34 @@ class AffineGridInterface(AffineGridDefaultImplementations, ConformalTopological
             np.dot(f(quadrature_points(codim, order)[e]), reference_element(codim).quadrature(order)[1]) *
             integration_elements(codim)[e].  # NOQA
         """
-        return self._quadrature_points(codim, order, npoints, quadrature_type)
+        return grid_geometry(self, codim).quadrature_points(order, npoints, quadrature_type)
 
     def bounding_box(self):
         """returns a `(2, dim)`-shaped array containing lower/upper bounding box coordinates."""
         return self._bounding_box()
 
+    def locate(self, points):
+        """Find the codim-0 entities containing the given points.
+
+        Returns a tuple `(elements, coordinates)`, where `elements[i]` is the global
+        index of the codim-0 entity containing `points[i]` (`-1` if there is no such entity)
+        and `coordinates[i]` are the coordinates of `points[i]` w.r.t. the reference
+        element of this entity, i.e. `points[i] == A[elements[i]].dot(coordinates[i]) + B[elements[i]]`,
+        where `A, B = embeddings(0)` (`NaN` if there is no such entity). For simplicial
+        reference elements, the barycentric coordinates of `points[i]` are given by
+        `(1 - sum(coordinates[i]), *coordinates[i])`. Points on the common boundary of
+        several entities are assigned to one of these entities.
+
+        The entities are found using a :class:`~pymor.grids.spatialindex.SpatialIndex`,
+        which is built on the first call and cached.
+
+        Parameters
+        ----------
+        points
+            |NumPy array| of shape `(num_points, dim)`.
+        """
+        return self._locate(points)
+
 
 class AffineGridWithOrthogonalCentersInterface(AffineGridInterface):
     """|AffineGrid| with an additional `orthogonal_centers` method."""
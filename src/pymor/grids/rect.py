@@ -4,11 +4,13 @@
 
 import numpy as np
 
+from pymor.core.cache import cached
+from pymor.grids.defaultimpl import StructuredGridDefaultImplementations
 from pymor.grids.interfaces import AffineGridWithOrthogonalCentersInterface
 from pymor.grids.referenceelements import square
 
 
-class RectGrid(AffineGridWithOrthogonalCentersInterface):
+class RectGrid(StructuredGridDefaultImplementations, AffineGridWithOrthogonalCentersInterface):
     """Basic implementation of a rectangular |Grid| on a rectangular domain.
 
     The global face, edge and vertex indices are given as follows ::
@@ -60,23 +62,15 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
         self.x1_diameter = self.x1_width / self.x1_num_intervals
         self.diameter_max = max(self.x0_diameter, self.x1_diameter)
         self.diameter_min = min(self.x0_diameter, self.x1_diameter)
-        n_elements = self.x0_num_intervals * self.x1_num_intervals
         ni0, ni1 = num_intervals
+        self.__sizes = (ni0 * ni1,
+                        (ni0 + 1 - identify_left_right) * ni1 + ni0 * (ni1 + 1 - identify_bottom_top),
+                        (ni0 + 1 - identify_left_right) * (ni1 + 1 - identify_bottom_top))
 
-        # TOPOLOGY
-
-        # mapping of structured indices to global indices
-        structured_to_global_0 = np.arange(ni0 * ni1, dtype=np.int32).reshape((ni1, ni0)).swapaxes(0, 1)
-        structured_to_global_2 = (np.arange((ni0 + 1) * (ni1 + 1), dtype=np.int32)
-                                  .reshape(((ni1 + 1), (ni0 + 1))).swapaxes(0, 1))
-        self._structured_to_global = [structured_to_global_0, None, structured_to_global_2]
-        global_to_structured_0 = np.empty((ni0 * ni1, 2), dtype=np.int32)
-        global_to_structured_0[:, 0] = np.tile(np.arange(ni0, dtype=np.int32), ni1)
-        global_to_structured_0[:, 1] = np.repeat(np.arange(ni1, dtype=np.int32), ni0)
-        global_to_structured_1 = np.empty(((ni0 + 1) * (ni1 + 1), 2), dtype=np.int32)
-        global_to_structured_1[:, 0] = np.tile(np.arange(ni0 + 1, dtype=np.int32), ni1 + 1)
-        global_to_structured_1[:, 1] = np.repeat(np.arange(ni1 + 1, dtype=np.int32), ni0 + 1)
-        self._global_to_structured = [global_to_structured_0, None, global_to_structured_1]
+    @cached
+    def _element_subentities(self):
+        ni0, ni1 = self.num_intervals
+        identify_left_right, identify_bottom_top = self.identify_left_right, self.identify_bottom_top
 
         # calculate subentities -- codim-0
         codim1_subentities = np.empty((ni1, ni0, 4), dtype=np.int32)
@@ -89,7 +83,7 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
             codim1_subentities[:, :,  1] = codim1_subentities[:, :, 3] + 1
         offset = np.max(codim1_subentities[:, :, [1, 3]]) + 1
         codim1_subentities[:, :, 0] = (np.arange(ni0 * ni1) + offset).reshape((ni1, ni0))
-        codim1_subentities[:, :, 2] = codim1_subentities[:, :, 0] + num_intervals[0]
+        codim1_subentities[:, :, 2] = codim1_subentities[:, :, 0] + ni0
         if identify_bottom_top:
             codim1_subentities[-1, :, 2] = codim1_subentities[0, :, 0]
         codim1_subentities = codim1_subentities.reshape((-1, 4))
@@ -113,22 +107,32 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
             codim2_subentities[-1, :, 2] = codim2_subentities[0, :, 1]
         codim2_subentities = codim2_subentities.reshape((-1, 4))
 
-        self.__subentities = (codim1_subentities, codim2_subentities)
+        return codim1_subentities, codim2_subentities
 
-        # calculate number of elements
-        self.__sizes = (n_elements,
-                        np.max(codim1_subentities) + 1,
-                        np.max(codim2_subentities) + 1)
+    def _element_embedding_classes(self):
+        # all codim-0 entities have the same Jacobian
+        return (np.diag([self.x0_diameter, self.x1_diameter])[np.newaxis, :, :],
+                np.zeros(self.size(0), dtype=np.int32))
 
-        # GEOMETRY
-
-        # embeddings
+    @cached
+    def _element_embeddings(self):
         x0_shifts = np.arange(self.x0_num_intervals) * self.x0_diameter + self.x0_range[0]
         x1_shifts = np.arange(self.x1_num_intervals) * self.x1_diameter + self.x1_range[0]
         shifts = np.array(np.meshgrid(x0_shifts, x1_shifts)).reshape((2, -1))
-        A = np.tile(np.diag([self.x0_diameter, self.x1_diameter]), (n_elements, 1, 1))
-        B = shifts.T
-        self.__embeddings = (A, B)
+        A, classes = self._element_embedding_classes()
+        return A[classes], shifts.T
+
+    def _structured_layout(self, codim):
+        if self.identify_left_right or self.identify_bottom_top:
+            return None
+        ni0, ni1 = self.num_intervals
+        if codim == 0:
+            return [(0, (ni0, ni1))]
+        elif codim == 1:
+            # vertical edges, then horizontal edges
+            return [(0, (ni0 + 1, ni1)), ((ni0 + 1) * ni1, (ni0, ni1 + 1))]
+        else:
+            return [(0, (ni0 + 1, ni1 + 1))]
 
     def __reduce__(self):
         return (RectGrid,
@@ -160,13 +164,13 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
             if subentity_codim == 0:
                 return np.arange(self.size(0), dtype='int32')[:, np.newaxis]
             else:
-                return self.__subentities[subentity_codim - 1]
+                return self._element_subentities()[subentity_codim - 1]
         else:
             return super().subentities(codim, subentity_codim)
 
     def embeddings(self, codim=0):
         if codim == 0:
-            return self.__embeddings
+            return self._element_embeddings()
         else:
             return super().embeddings(codim)
 
@@ -181,7 +185,7 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
         """
         if self.identify_left_right or self.identify_bottom_top or codim not in (0, 2):
             raise NotImplementedError
-        return self._structured_to_global[codim]
+        return self._structured_to_global(codim)
 
     def global_to_structured(self, codim):
         """Returns an array which maps global codim-`codim` indices to structured indices.
@@ -191,7 +195,18 @@ class RectGrid(AffineGridWithOrthogonalCentersInterface):
         """
         if self.identify_left_right or self.identify_bottom_top or codim not in (0, 2):
             raise NotImplementedError
-        return self._global_to_structured[codim]
+        return self._global_to_structured(codim)
+
+    @cached
+    def _structured_to_global(self, codim):
+        (_, (n0, n1)), = self._structured_layout(codim)
+        return np.arange(n0 * n1, dtype=np.int32).reshape((n1, n0)).swapaxes(0, 1)
+
+    @cached
+    def _global_to_structured(self, codim):
+        (_, (n0, n1)), = self._structured_layout(codim)
+        _, i, j = self._structured_positions(codim, np.arange(n0 * n1, dtype=np.int32))
+        return np.array([i, j], dtype=np.int32).T
 
     def vertex_coordinates(self, dim):
         """Returns an array of the x_dim coordinates of the grid vertices.
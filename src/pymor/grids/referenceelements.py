@@ -96,7 +96,7 @@ class Line(ReferenceElementInterface):
         return np.array([0.5])
 
     def mapped_diameter(self, A):
-        return np.apply_along_axis(np.linalg.norm, -2, A)
+        return np.linalg.norm(A, axis=-2)
 
     def quadrature_info(self):
         return {'gauss': GaussQuadratures.orders}, {'gauss': list(map(len, GaussQuadratures.points))}
@@ -187,8 +187,8 @@ class Square(ReferenceElementInterface):
     def mapped_diameter(self, A):
         V0 = np.dot(A, np.array([1., 1.]))
         V1 = np.dot(A, np.array([1., -1]))
-        VN0 = np.apply_along_axis(np.linalg.norm, -1, V0)
-        VN1 = np.apply_along_axis(np.linalg.norm, -1, V1)
+        VN0 = np.linalg.norm(V0, axis=-1)
+        VN1 = np.linalg.norm(V1, axis=-1)
         return np.max((VN0, VN1), axis=0)
 
     def quadrature_info(self):
@@ -274,14 +274,14 @@ class Triangle(ReferenceElementInterface):
         V0 = np.dot(A, np.array([-1., 1.]))
         V1 = np.dot(A, np.array([0., -1.]))
         V2 = np.dot(A, np.array([1., 0.]))
-        VN0 = np.apply_along_axis(np.linalg.norm, -1, V0)
-        VN1 = np.apply_along_axis(np.linalg.norm, -1, V1)
-        VN2 = np.apply_along_axis(np.linalg.norm, -1, V2)
+        VN0 = np.linalg.norm(V0, axis=-1)
+        VN1 = np.linalg.norm(V1, axis=-1)
+        VN2 = np.linalg.norm(V2, axis=-1)
         return np.max((VN0, VN1, VN2), axis=0)
 
     def quadrature_info(self):
-        return ({'center': (1,), 'edge_centers': (2,)},
-                {'center': (1,), 'edge_centers': (3,)})
+        return ({'center': (1,), 'edge_centers': (2,), 'dunavant': (4,)},
+                {'center': (1,), 'edge_centers': (3,), 'dunavant': (6,)})
 
     def quadrature(self, order=None, npoints=None, quadrature_type='default'):
         assert order is not None or npoints is not None, 'must specify "order" or "npoints"'
@@ -289,8 +289,13 @@ class Triangle(ReferenceElementInterface):
         if quadrature_type == 'default':
             if order == 1 or npoints == 1:
                 quadrature_type = 'center'
+            elif (order is not None and order > 2) or npoints == 6:
+                quadrature_type = 'dunavant'
             else:
                 quadrature_type = 'edge_centers'
+        if quadrature_type == 'dunavant' and order is not None and order > 4:
+            raise NotImplementedError('triangle quadratures are only available for orders 1 to 4 '
+                                      '(requested order {})'.format(order))
 
         if quadrature_type == 'center':
             assert order is None or order == 1
@@ -303,8 +308,18 @@ class Triangle(ReferenceElementInterface):
             # L, A = self.subentity_embedding(1)
             # return np.array(L.dot(self.sub_reference_element().center()) + A), np.ones(3) / len(A) * self.volume
             return np.array(([0.5, 0.5], [0, 0.5], [0.5, 0])), np.ones(3) / 3 * self.volume
+        elif quadrature_type == 'dunavant':
+            # symmetric 6-point rule of degree 4, see
+            # D. A. Dunavant, High degree efficient symmetrical Gaussian quadrature rules for the triangle,
+            # Int. J. Numer. Meth. Engng. 21 (1985), 1129-1148
+            assert npoints is None or npoints == 6
+            a, b = 0.445948490915965, 0.091576213509771
+            P = np.array(([a, a], [1 - 2 * a, a], [a, 1 - 2 * a],
+                          [b, b], [1 - 2 * b, b], [b, 1 - 2 * b]))
+            W = np.array([0.223381589678011] * 3 + [0.109951743655322] * 3) * self.volume
+            return P, W
         else:
-            raise NotImplementedError('quadrature_type must be "center" or "edge_centers"')
+            raise NotImplementedError('quadrature_type must be "center", "edge_centers" or "dunavant"')
 
 
 triangle = Triangle()
@@ -0,0 +1,195 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Uniform and local refinement of triangle grids.
+
+:func:`refine_grid` refines all triangles of a grid (red refinement) or only
+marked triangles (red-green refinement). Along with the refined grid, sparse
+|NumpyMatrixOperators| are returned which transfer vertex values (CG) and cell
+values (FV) between the original and the refined grid, so that, e.g., snapshots
+computed on a coarse grid can be used on a finer one.
+"""
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from pymor.core.logger import getLogger
+from pymor.grids.boundaryinfos import RefinedBoundaryInfo
+from pymor.grids.referenceelements import triangle
+from pymor.grids.unstructured import UnstructuredTriangleGrid
+from pymor.operators.numpy import NumpyMatrixOperator
+
+
+def refine_grid(grid, marked=None, boundary_info=None):
+    """Refine a triangle grid.
+
+    Red refinement divides a triangle into four similar triangles by connecting
+    the midpoints of its edges. Green refinement bisects a triangle by connecting
+    the midpoint of one edge with the opposite vertex. If `marked` is not `None`,
+    all marked triangles are red refined. To obtain a conforming grid, triangles
+    with two or three refined edges are red refined as well (until no such triangle
+    is left) and triangles with one refined edge are green refined.
+
+    Green triangles are not coarsened before further refinement, so repeated local
+    refinement of the same region may degrade the shape regularity of the grid.
+
+    Parameters
+    ----------
+    grid
+        The |Grid| to refine. Has to be a non-periodic |AffineGrid| of triangles.
+    marked
+        |NumPy array| of the indices of the codim-0 entities to refine or `None` to
+        refine all codim-0 entities.
+    boundary_info
+        The |BoundaryInfo| of `grid` or `None`.
+
+    Returns
+    -------
+    grid
+        The refined :class:`~pymor.grids.unstructured.UnstructuredTriangleGrid`. The
+        vertices of `grid` keep their indices, the vertex with index
+        `grid.size(2) + i` is the midpoint of the edge `data['refined_edges'][i]`
+        of `grid`. The children of each codim-0 entity are numbered consecutively
+        in the order of their parents.
+    boundary_info
+        The corresponding :class:`~pymor.grids.boundaryinfos.RefinedBoundaryInfo`
+        (`None` if `boundary_info` is `None`).
+    data
+        Dict with the following keys:
+
+            :parents:           |NumPy array| of the indices of the codim-0 entities
+                                of `grid` containing the codim-0 entities of the
+                                refined grid.
+            :refined_edges:     |NumPy array| of the indices of the codim-1 entities
+                                of `grid` which have been bisected.
+            :cg_prolongation:   |NumpyMatrixOperator| mapping vectors of vertex values
+                                (CG) on `grid` to their piecewise linear interpolant
+                                on the refined grid.
+            :cg_restriction:    |NumpyMatrixOperator| mapping vectors of vertex values
+                                on the refined grid to their values at the vertices
+                                of `grid` (left inverse of `cg_prolongation`).
+            :fv_prolongation:   |NumpyMatrixOperator| mapping vectors of cell values
+                                (FV) on `grid` to the refined grid.
+            :fv_restriction:    |NumpyMatrixOperator| mapping vectors of cell values on
+                                the refined grid to their averages over the codim-0
+                                entities of `grid` (left inverse of `fv_prolongation`).
+    """
+    logger = getLogger('pymor.grids.refinement.refine_grid')
+    assert grid.reference_element is triangle
+    faces, edges = grid.subentities(0, 2), grid.subentities(0, 1)
+    num_vertices, num_faces = grid.size(2), grid.size(0)
+
+    # vertex coordinates from the corners of the triangles, which only agree for non-periodic grids
+    A, B = grid.embeddings(0)
+    corners = [B + sum(A[:, :, j] * c for j, c in enumerate(corner)) for corner in triangle.subentity_embedding(2)[1]]
+    vertices = np.empty((num_vertices, 2))
+    for j, X in enumerate(corners):
+        vertices[faces[:, j]] = X
+    assert all(np.allclose(vertices[faces[:, j]], X) for j, X in enumerate(corners)), \
+        'periodic grids cannot be refined'
+    del corners
+
+    # the local edge j of a triangle is opposite to its local vertex j
+    edge_vertices = np.empty((grid.size(1), 2), dtype=np.int32)
+    for j in range(3):
+        edge_vertices[edges[:, j]] = faces[:, [(j + 1) % 3, (j + 2) % 3]]
+
+    # mark the edges to bisect, the closure loop usually terminates after a few iterations
+    edge_marked = np.zeros(grid.size(1), dtype=bool)
+    if marked is None:
+        edge_marked[:] = True
+    else:
+        edge_marked[edges[np.asarray(marked, dtype=np.int32)]] = True
+        while True:
+            counts = edge_marked[edges].sum(axis=1)
+            closure = edges[counts == 2]
+            closure = closure[~edge_marked[closure]]
+            if len(closure) == 0:
+                break
+            edge_marked[closure] = True
+    refined_edges = np.flatnonzero(edge_marked).astype(np.int32)
+    midpoints = np.full(grid.size(1), -1, dtype=np.int32)
+    midpoints[refined_edges] = np.arange(num_vertices, num_vertices + len(refined_edges), dtype=np.int32)
+
+    M = midpoints[edges]
+    refined = M >= 0
+    counts = refined.sum(axis=1)
+    num_children = np.array([1, 2, 4, 4])[counts]
+    offsets = np.cumsum(num_children) - num_children
+    new_faces = np.empty((offsets[-1] + num_children[-1], 3), dtype=np.int32)
+
+    keep = counts == 0
+    new_faces[offsets[keep]] = faces[keep]
+
+    # red refinement, the children preserve the orientation of their parent
+    red = counts >= 2
+    F, M_red, O = faces[red], M[red], offsets[red]
+    new_faces[O] = np.column_stack((F[:, 0], M_red[:, 2], M_red[:, 1]))
+    new_faces[O + 1] = np.column_stack((M_red[:, 2], F[:, 1], M_red[:, 0]))
+    new_faces[O + 2] = np.column_stack((M_red[:, 1], M_red[:, 0], F[:, 2]))
+    new_faces[O + 3] = M_red
+
+    # green refinement, bisection of the refined edge k from the opposite vertex
+    green = counts == 1
+    F, O = faces[green], offsets[green]
+    k = np.argmax(refined[green], axis=1)
+    rows = np.arange(len(F))
+    V_k, V_a, V_b = F[rows, k], F[rows, (k + 1) % 3], F[rows, (k + 2) % 3]
+    M_green = M[green][rows, k]
+    new_faces[O] = np.column_stack((V_k, V_a, M_green))
+    new_faces[O + 1] = np.column_stack((V_k, M_green, V_b))
+
+    new_vertices = np.vstack((vertices, vertices[edge_vertices[refined_edges]].mean(axis=1)))
+    new_grid = UnstructuredTriangleGrid(new_vertices, new_faces)
+    parents = np.repeat(np.arange(num_faces, dtype=np.int32), num_children)
+    logger.info('Refined {} of {} triangles ({} red, {} green) to {} triangles.'
+                .format(num_faces - np.count_nonzero(keep), num_faces, np.count_nonzero(red),
+                        np.count_nonzero(green), len(new_faces)))
+
+    data = {'parents': parents,
+            'refined_edges': refined_edges,
+            'fv_prolongation': _transfer_operator(np.arange(len(new_faces)), parents, np.ones(len(new_faces)),
+                                                  (len(new_faces), num_faces)),
+            'fv_restriction': _transfer_operator(parents, np.arange(len(new_faces)), 1. / num_children[parents],
+                                                 (num_faces, len(new_faces)))}
+
+    # vertex values at the midpoints are averages of the values at the endpoints of the bisected edge
+    I = np.hstack((np.arange(num_vertices), np.repeat(np.arange(num_vertices, len(new_vertices)), 2)))
+    J = np.hstack((np.arange(num_vertices), edge_vertices[refined_edges].ravel()))
+    V = np.hstack((np.ones(num_vertices), np.full(2 * len(refined_edges), 0.5)))
+    data['cg_prolongation'] = _transfer_operator(I, J, V, (len(new_vertices), num_vertices))
+    data['cg_restriction'] = _transfer_operator(np.arange(num_vertices), np.arange(num_vertices),
+                                                np.ones(num_vertices), (num_vertices, len(new_vertices)))
+
+    if boundary_info is None:
+        return new_grid, None, data
+    return new_grid, RefinedBoundaryInfo(new_grid, boundary_info, _boundary_parents(grid, new_grid, refined_edges)), \
+        data
+
+
+def _boundary_parents(grid, new_grid, refined_edges):
+    """Codimensions and indices of the entities of `grid` containing the boundary entities of `new_grid`."""
+    num_vertices = grid.size(2)
+
+    # boundary edges of the refined grid are halves of bisected edges or unrefined boundary edges
+    boundaries = new_grid.boundaries(1)
+    EV = np.sort(new_grid.subentities(1, 2)[boundaries], axis=1)
+    edge_parents = np.full(new_grid.size(1), -1, dtype=np.int32)
+    halves = EV[:, 1] >= num_vertices
+    edge_parents[boundaries[halves]] = refined_edges[EV[halves, 1] - num_vertices]
+    old_boundaries = grid.boundaries(1)
+    old_EV = np.sort(grid.subentities(1, 2)[old_boundaries], axis=1).astype(np.int64)
+    old_keys = old_EV[:, 0] * num_vertices + old_EV[:, 1]
+    order = np.argsort(old_keys)
+    keys = EV[~halves, 0].astype(np.int64) * num_vertices + EV[~halves, 1]
+    edge_parents[boundaries[~halves]] = old_boundaries[order[np.searchsorted(old_keys[order], keys)]]
+
+    # new vertices lie on bisected edges
+    vertex_codims = np.hstack((np.full(num_vertices, 2, dtype=np.int32), np.ones(len(refined_edges), dtype=np.int32)))
+    vertex_parents = np.hstack((np.arange(num_vertices, dtype=np.int32), refined_edges))
+    return ((np.ones(new_grid.size(1), dtype=np.int32), edge_parents), (vertex_codims, vertex_parents))
+
+
+def _transfer_operator(I, J, V, shape):
+    return NumpyMatrixOperator(csc_matrix((V, (I, J)), shape=shape), source_id='STATE', range_id='STATE')
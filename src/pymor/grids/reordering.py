@@ -0,0 +1,212 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Renumbering of unstructured triangle grids.
+
+The numbering of the vertices and triangles of grids read from mesh files
+usually follows the order in which they were created by the mesher. Couplings
+between the degrees of freedom are then scattered over the whole system matrix,
+leading to large bandwidths, poor cache locality of sparse matrix-vector products
+and large fill-in of sparse direct solvers. :func:`reorder_grid` renumbers the
+entities of a grid using either the reverse Cuthill-McKee algorithm or a Hilbert
+space-filling curve.
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix, csc_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+from pymor.core.logger import getLogger
+from pymor.grids.boundaryinfos import PermutedBoundaryInfo
+from pymor.grids.referenceelements import triangle
+from pymor.grids.unstructured import UnstructuredTriangleGrid
+from pymor.operators.numpy import NumpyMatrixOperator
+
+
+def reorder_grid(grid, boundary_info=None, method='rcm'):
+    """Renumber the entities of a triangle grid to improve data locality.
+
+    Parameters
+    ----------
+    grid
+        The |Grid| to renumber. Has to be a non-periodic |AffineGrid| of triangles.
+    boundary_info
+        The |BoundaryInfo| of `grid` or `None`.
+    method
+        The renumbering method, see :func:`reordering_permutations`.
+
+    Returns
+    -------
+    grid
+        The renumbered :class:`~pymor.grids.unstructured.UnstructuredTriangleGrid`.
+    boundary_info
+        The corresponding :class:`~pymor.grids.boundaryinfos.PermutedBoundaryInfo`
+        (`None` if `boundary_info` is `None`).
+    data
+        Dict with the following keys:
+
+            :permutations:  Tuple, where `permutations[codim][i]` is the index of
+                            the codim-`codim` entity of the original grid which has
+                            index `i` in the renumbered grid.
+            :cg_operator:   |NumpyMatrixOperator| mapping vectors of vertex values (CG)
+                            on the original grid to the renumbered grid. The inverse
+                            mapping is given by its transpose.
+            :fv_operator:   |NumpyMatrixOperator| mapping vectors of cell values (FV)
+                            on the original grid to the renumbered grid. The inverse
+                            mapping is given by its transpose.
+            :bandwidth:     Tuple `(original, renumbered)` of the bandwidths of the
+                            vertex coupling (see :func:`matrix_bandwidth`).
+            :profile:       Tuple `(original, renumbered)` of the profiles of the
+                            vertex coupling (see :func:`matrix_bandwidth`).
+    """
+    logger = getLogger('pymor.grids.reordering.reorder_grid')
+    if grid.reference_element is not triangle:
+        raise NotImplementedError('only triangle grids can be renumbered')
+    vertices, faces = grid.centers(2), grid.subentities(0, 2)
+    A, B = grid.embeddings(0)
+    corners = triangle.subentity_embedding(2)[1]
+    if not np.allclose(vertices[faces], B[:, np.newaxis, :] + np.einsum('eij,cj->eci', A, corners)):
+        raise NotImplementedError('periodic grids cannot be renumbered')
+
+    vertex_permutation, face_permutation = reordering_permutations(vertices, faces, method)
+    new_indices = _inverse_permutation(vertex_permutation)
+    new_grid = UnstructuredTriangleGrid(vertices[vertex_permutation], new_indices[faces[face_permutation]])
+
+    # identify the edges of both grids by their vertices
+    def edge_keys(edges):
+        edges = np.sort(edges, axis=1).astype(np.int64)
+        return edges[:, 0] * len(vertices) + edges[:, 1]
+    old_keys = edge_keys(grid.subentities(1, 2))
+    order = np.argsort(old_keys)
+    edge_permutation = order[np.searchsorted(old_keys[order],
+                                             edge_keys(vertex_permutation[new_grid.subentities(1, 2)]))]
+    permutations = (face_permutation, edge_permutation, vertex_permutation)
+
+    bandwidth, profile = matrix_bandwidth(grid, 2)
+    new_bandwidth, new_profile = matrix_bandwidth(new_grid, 2)
+    logger.info('Renumbering ({}) reduced the bandwidth from {} to {} and the profile from {} to {}.'
+                .format(method, bandwidth, new_bandwidth, profile, new_profile))
+
+    data = {'permutations': permutations,
+            'cg_operator': _permutation_operator(vertex_permutation),
+            'fv_operator': _permutation_operator(face_permutation),
+            'bandwidth': (bandwidth, new_bandwidth),
+            'profile': (profile, new_profile)}
+    new_boundary_info = None if boundary_info is None else PermutedBoundaryInfo(new_grid, boundary_info, permutations)
+    return new_grid, new_boundary_info, data
+
+
+def reordering_permutations(vertices, faces, method='rcm'):
+    """Compute a renumbering of the vertices and triangles of a triangle mesh.
+
+    Parameters
+    ----------
+    vertices
+        A (num_vertices, 2)-shaped |array| of the vertex coordinates.
+    faces
+        A (num_faces, 3)-shaped |array| of the vertex indices of the triangles.
+    method
+        Either `'rcm'`, to number the vertices using the reverse Cuthill-McKee
+        algorithm, which minimizes the bandwidth of the vertex coupling, or `'hilbert'`,
+        to number the vertices along a Hilbert curve, which improves the locality of
+        all entities. The triangles are numbered along with their first vertex (`'rcm'`)
+        or along the Hilbert curve through their centers (`'hilbert'`).
+
+    Returns
+    -------
+    vertex_permutation
+        The new vertex `i` is the old vertex `vertex_permutation[i]`.
+    face_permutation
+        The new triangle `i` is the old triangle `face_permutation[i]`.
+    """
+    assert method in ('rcm', 'hilbert')
+    if method == 'rcm':
+        # the vertex adjacency graph, each pair of vertices of each triangle is coupled
+        I, J = np.repeat(faces, 3, axis=1).ravel(), np.tile(faces, [1, 3]).ravel()
+        graph = coo_matrix((np.ones(len(I), dtype=np.int8), (I, J)), shape=(len(vertices),) * 2).tocsr()
+        vertex_permutation = reverse_cuthill_mckee(graph, symmetric_mode=True).astype(np.int32)
+        face_keys = np.min(_inverse_permutation(vertex_permutation)[faces], axis=1)
+    else:
+        vertex_permutation = np.argsort(_hilbert_keys(vertices), kind='mergesort').astype(np.int32)
+        face_keys = _hilbert_keys(np.mean(vertices[faces], axis=1), vertices.min(axis=0), vertices.max(axis=0))
+    face_permutation = np.argsort(face_keys, kind='mergesort').astype(np.int32)
+    return vertex_permutation, face_permutation
+
+
+def matrix_bandwidth(grid, codim):
+    """Bandwidth and profile of the coupling of the codim-`codim` entities of a grid.
+
+    Two codim-0 entities are coupled if they share a codim-1 entity (as for finite
+    volume schemes), two vertices are coupled if they are contained in a common
+    codim-0 entity (as for linear finite elements). The bandwidth is the maximum
+    difference of the indices of coupled entities, the profile (or envelope size)
+    is the sum over all entities `i` of the difference between `i` and the smallest
+    index coupled to `i`. The profile bounds the fill-in of sparse direct solvers
+    using a skyline factorization.
+
+    Parameters
+    ----------
+    grid
+        The |Grid|.
+    codim
+        Either `0` or `grid.dim`.
+
+    Returns
+    -------
+    bandwidth
+        The bandwidth.
+    profile
+        The profile.
+    """
+    assert codim in (0, grid.dim)
+    if codim == 0:
+        SUPE = grid.superentities(1, 0)
+        SUPE = SUPE[SUPE[:, 1] >= 0]
+        I, J = SUPE[:, 0], SUPE[:, 1]
+    else:
+        SE = grid.subentities(0, grid.dim)
+        I, J = np.repeat(SE, SE.shape[1], axis=1).ravel(), np.tile(SE, [1, SE.shape[1]]).ravel()
+    n = grid.size(codim)
+    indices = np.arange(n)
+    # the column indices of each row of a CSR matrix with summed duplicates are sorted
+    C = coo_matrix((np.ones(2 * len(I) + n, dtype=np.int8), (np.hstack((I, J, indices)), np.hstack((J, I, indices)))),
+                   shape=(n, n)).tocsr()
+    C.sum_duplicates()
+    lowest, highest = C.indices[C.indptr[:-1]], C.indices[C.indptr[1:] - 1]
+    return int(np.max(highest - indices)), int(np.sum(indices - lowest))
+
+
+def _inverse_permutation(permutation):
+    inverse = np.empty_like(permutation)
+    inverse[permutation] = np.arange(len(permutation), dtype=permutation.dtype)
+    return inverse
+
+
+def _permutation_operator(permutation):
+    n = len(permutation)
+    return NumpyMatrixOperator(csc_matrix((np.ones(n), (np.arange(n), permutation)), shape=(n, n)),
+                               source_id='STATE', range_id='STATE')
+
+
+def _hilbert_keys(points, lower=None, upper=None, order=16):
+    """Position of `points` on a Hilbert curve through the bounding box `[lower, upper]`."""
+    lower = points.min(axis=0) if lower is None else lower
+    upper = points.max(axis=0) if upper is None else upper
+    n = 2 ** order
+    scale = (n - 1) / np.maximum(upper - lower, np.finfo(float).tiny)
+    X = np.clip(((points - lower) * scale).astype(np.int64), 0, n - 1)
+    x, y = X[:, 0].copy(), X[:, 1].copy()
+    keys = np.zeros(len(points), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant such that the curve is traversed in the canonical orientation
+        flip = ~ry & rx
+        x[flip], y[flip] = n - 1 - x[flip], n - 1 - y[flip]
+        swap = ~ry
+        x[swap], y[swap] = y[swap], x[swap]
+        s //= 2
+    return keys
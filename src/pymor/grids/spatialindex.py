@@ -0,0 +1,127 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Point location in |AffineGrids|.
+
+:meth:`~pymor.grids.interfaces.AffineGridInterface.locate` determines the
+codim-0 entities containing given points using a :class:`SpatialIndex`, a
+uniform grid of buckets covering the bounding box of the grid. Each bucket
+holds the codim-0 entities whose bounding boxes intersect the bucket, so that
+only the few entities of the bucket containing a point have to be tested. The
+index is built once per grid in a vectorized pass and is cached.
+"""
+
+import weakref
+
+import numpy as np
+
+from pymor.core.defaults import defaults
+
+
+@defaults('elements_per_bucket', 'tol')
+def spatial_index_options(elements_per_bucket=2., tol=1e-10):
+    """Options for the construction of a :class:`SpatialIndex`.
+
+    `elements_per_bucket` is the average number of codim-0 entities per bucket
+    for a grid of uniformly sized entities, `tol` is the tolerance (in reference
+    element coordinates) up to which a point is considered to lie inside an entity.
+    """
+    assert elements_per_bucket > 0
+    return {'elements_per_bucket': elements_per_bucket, 'tol': tol}
+
+
+class SpatialIndex(object):
+    """Uniform bucket grid over the codim-0 entities of an |AffineGrid|.
+
+    Do not instantiate directly, use
+    :meth:`~pymor.grids.interfaces.AffineGridInterface.locate` instead.
+
+    Parameters
+    ----------
+    grid
+        The |AffineGrid| to index.
+    """
+
+    def __init__(self, grid):
+        options = spatial_index_options()
+        self._grid = weakref.ref(grid)
+        self.tol = options['tol']
+        # all reference elements are either simplices or cubes
+        reference_element = grid.reference_element
+        self.simplicial = reference_element.size(reference_element.dim) == reference_element.dim + 1
+
+        # the corners of the entities are computed from the embeddings to correctly handle periodic grids
+        A, B = grid.embeddings(0)
+        lower, upper = B.copy(), B.copy()
+        for corner in reference_element.subentity_embedding(reference_element.dim)[1]:
+            X = B + sum(A[:, :, j] * c for j, c in enumerate(corner))
+            np.minimum(lower, X, out=lower)
+            np.maximum(upper, X, out=upper)
+        num_elements = len(B)
+        self.origin = lower.min(axis=0)
+        extent = upper.max(axis=0) - self.origin
+
+        # choose (nearly) cubic buckets such that there are about `elements_per_bucket` entities per bucket
+        num_buckets = max(num_elements / options['elements_per_bucket'], 1.)
+        positive = extent[extent > 0]
+        self.width = (np.prod(positive) / num_buckets) ** (1. / len(positive)) if len(positive) else 1.
+        self.shape = np.maximum(np.ceil(extent / self.width).astype(np.int64), 1)
+
+        # enumerate all buckets intersecting the bounding box of each entity (not only touching it,
+        # as points on the boundary of a bucket are located in the bucket to the right)
+        first = self._bucket_positions(lower)
+        last = np.clip(np.ceil((upper - self.origin) / self.width).astype(np.int64) - 1, first, self.shape - 1)
+        widths = last - first + 1
+        counts = np.prod(widths, axis=1)
+        self.strides = strides = np.cumprod(np.hstack(([1], self.shape[:-1])))
+        entities = np.repeat(np.arange(num_elements, dtype=np.int32), counts)
+        local = np.arange(len(entities)) - np.repeat(np.cumsum(counts) - counts, counts)
+        buckets = np.repeat(first.dot(strides), counts)
+        for d in range(grid.dim):
+            local, position = np.divmod(local, np.repeat(widths[:, d], counts))
+            buckets += position * strides[d]
+
+        # CSR representation of the bucket-entity relation, entities are sorted in each bucket
+        order = np.argsort(buckets * num_elements + entities)
+        self.entities = entities[order]
+        self.offsets = np.zeros(np.prod(self.shape) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(buckets, minlength=np.prod(self.shape)), out=self.offsets[1:])
+
+    def _bucket_positions(self, points):
+        P = np.floor((points - self.origin) / self.width).astype(np.int64)
+        return np.clip(P, 0, self.shape - 1)
+
+    def locate(self, points):
+        """See :meth:`~pymor.grids.interfaces.AffineGridInterface.locate`."""
+        grid, tol = self._grid(), self.tol
+        points = np.asarray(points)
+        assert points.ndim == 2 and points.shape[1] == grid.dim
+        elements = np.full(len(points), -1, dtype=np.int32)
+        coordinates = np.full(points.shape, np.nan)
+
+        # points outside of the bounding box of the grid are tested against the nearest bucket
+        positions = self._bucket_positions(points)
+        buckets = positions.dot(self.strides)
+
+        # test all pairs of points and entities of the corresponding buckets
+        counts = self.offsets[buckets + 1] - self.offsets[buckets]
+        P = np.repeat(np.arange(len(points)), counts)
+        E = self.entities[np.repeat(self.offsets[buckets] - np.cumsum(counts) + counts, counts)
+                          + np.arange(counts.sum())]
+        B = grid.embeddings(0)[1]
+        JIT = grid.jacobian_inverse_transposed(0)
+        X = np.einsum('eji,ej->ei', JIT[E], points[P] - B[E])
+        if self.simplicial:
+            inside = np.all(X >= -tol, axis=1) & (X.sum(axis=1) <= 1 + tol)
+        else:
+            inside = np.all((X >= -tol) & (X <= 1 + tol), axis=1)
+
+        # keep the first entity containing each point
+        hits = np.flatnonzero(inside)
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = P[hits[1:]] != P[hits[:-1]]
+        hits = hits[first]
+        elements[P[hits]] = E[hits]
+        coordinates[P[hits]] = X[hits]
+        return elements, coordinates
@@ -15,6 +15,14 @@ class SubGrid(AffineGridInterface):
     Given a |Grid| and a list of codim-0 entities we construct the minimal
     subgrid of the grid, containing all the given entities.
 
+    For :meth:`indices_from_parent_indices`, dense maps from the indices of the
+    entities of the parent grid to the indices of the subgrid are built on first use,
+    so that only a single lookup per index is required. These maps are not pickled.
+    Using :meth:`extend`, a subgrid can be extended by further codim-0 entities
+    without recomputing the existing part of the subgrid. The extended subgrid takes
+    over the dense maps of the original subgrid and updates them in place (the original
+    subgrid rebuilds its maps when needed).
+
     Parameters
     ----------
     grid
@@ -22,6 +30,11 @@ class SubGrid(AffineGridInterface):
     entities
         |NumPy array| of global indices of the codim-0 entities which
         are to be contained in the subgrid.
+    base
+        If not `None`, a :class:`SubGrid` of `grid` which is extended by `entities`.
+        The entities of `base` keep their indices, the remaining entities are appended
+        in the order of their global indices in `grid`. Use :meth:`extend` instead of
+        passing `base` directly.
 
     Attributes
     ----------
@@ -33,33 +46,67 @@ class SubGrid(AffineGridInterface):
 
     reference_element = None
 
-    def __init__(self, grid, entities):
+    def __init__(self, grid, entities, base=None):
         assert isinstance(grid, AffineGridInterface)
+        assert base is None or base.parent_grid is grid
         self.dim = grid.dim
         self.reference_element = grid.reference_element
 
-        parent_indices = [np.array(np.unique(entities), dtype=np.int32)]
-        assert len(parent_indices[0] == len(entities))
-
-        subentities = [np.arange(len(parent_indices[0]), dtype=np.int32).reshape((-1, 1))]
-
-        for codim in range(1, self.dim + 1):
-            SUBE = grid.subentities(0, codim)[parent_indices[0]]
-            if np.any(SUBE < 0):
-                raise NotImplementedError
-            UI, UI_inv = np.unique(SUBE, return_inverse=True)
-            subentities.append(np.array(UI_inv.reshape(SUBE.shape), dtype=np.int32))
-            parent_indices.append(np.array(UI, dtype=np.int32))
+        entities = np.asarray(entities).ravel()
+        parent_indices, child_indices, subentities = [], [], []
+        for codim in range(self.dim + 1):
+            # the codim-`codim` entities of the new codim-0 entities
+            if codim == 0:
+                SUBE = entities
+            else:
+                SUBE = grid.subentities(0, codim)[new_entities]
+                if np.any(SUBE < 0):
+                    raise NotImplementedError
+            if base is None:
+                indices = np.zeros(0, dtype=np.int32)
+                new_indices, new_subentities = np.unique(SUBE, return_inverse=True)
+                child = None
+            else:
+                # take over the dense map of base and add the new entities
+                indices = base.parent_indices(codim)
+                child = base._child_indices(codim)
+                base.__child_indices[codim] = None
+                new_indices = np.unique(SUBE[child[SUBE] < 0])
+                child[new_indices] = np.arange(len(indices), len(indices) + len(new_indices), dtype=np.int32)
+                new_subentities = child[SUBE]
+            new_indices = new_indices.astype(np.int32)
+            if codim == 0:
+                new_entities = new_indices
+                new_subentities = np.arange(len(indices), len(indices) + len(new_indices), dtype=np.int32)
+            parent_indices.append(np.hstack((indices, new_indices)))
+            child_indices.append(child)
+            new_subentities = new_subentities.astype(np.int32).reshape((len(new_entities), -1))
+            subentities.append(new_subentities if base is None
+                               else np.vstack((base.subentities(0, codim), new_subentities)))
 
         self.__parent_grid = weakref.ref(grid)
         self.__parent_indices = parent_indices
+        self.__child_indices = child_indices
         self.__subentities = subentities
-        embeddings = grid.embeddings(0)
-        self.__embeddings = (embeddings[0][parent_indices[0]], embeddings[1][parent_indices[0]])
+        A, B = grid.embeddings(0)
+        if base is None:
+            self.__embeddings = (A[parent_indices[0]], B[parent_indices[0]])
+        else:
+            base_A, base_B = base.embeddings(0)
+            self.__embeddings = (np.concatenate((base_A, A[new_entities])), np.concatenate((base_B, B[new_entities])))
 
     @property
     def parent_grid(self):
-        return self.__parent_grid()
+        return None if self.__parent_grid is None else self.__parent_grid()
+
+    def extend(self, entities):
+        """Returns a :class:`SubGrid` containing the entities of this subgrid and the given codim-0 `entities`.
+
+        The entities of this subgrid keep their indices in the returned subgrid.
+        """
+        grid = self.parent_grid
+        assert grid is not None, 'parent grid has been destroyed'
+        return SubGrid(grid, entities, base=self)
 
     def parent_indices(self, codim):
         """`retval[e]` is the index of the `e`-th codim-`codim` entity in the parent grid."""
@@ -75,12 +122,27 @@ class SubGrid(AffineGridInterface):
             Not all provided indices correspond to entities contained in the subgrid.
         """
         assert 0 <= codim <= self.dim, 'Invalid codimension'
-        ind = ind.ravel()
-        # TODO Find better implementation of the following
-        R = np.argmax(ind[:, np.newaxis] - self.__parent_indices[codim][np.newaxis, :] == 0, axis=1)
-        if not np.all(self.__parent_indices[codim][R] == ind):
+        ind = np.asarray(ind).ravel()
+        child = self._child_indices(codim)
+        if np.any(ind >= len(child)):
+            raise ValueError('Not all parent indices found')
+        R = child[ind]
+        if np.any(R < 0):
             raise ValueError('Not all parent indices found')
-        return np.array(R, dtype=np.int32)
+        return R
+
+    def _child_indices(self, codim):
+        """Dense map from parent grid indices to subgrid indices of codim-`codim` entities (-1 if missing)."""
+        child = self.__child_indices[codim]
+        if child is None:
+            indices = self.__parent_indices[codim]
+            grid = self.parent_grid
+            # without the parent grid, the map only covers the largest parent index
+            size = grid.size(codim) if grid is not None else (indices.max() + 1 if len(indices) else 0)
+            child = np.full(size, -1, dtype=np.int32)
+            child[indices] = np.arange(len(indices), dtype=np.int32)
+            self.__child_indices[codim] = child
+        return child
 
     def size(self, codim):
         assert 0 <= codim <= self.dim, 'Invalid codimension'
@@ -101,5 +163,6 @@ class SubGrid(AffineGridInterface):
 
     def __getstate__(self):
         d = self.__dict__.copy()
-        del d['_SubGrid__parent_grid']
+        d['_SubGrid__parent_grid'] = None
+        d['_SubGrid__child_indices'] = [None] * (self.dim + 1)
         return d
@@ -5,11 +5,12 @@
 import numpy as np
 
 from pymor.core.cache import cached
+from pymor.grids.defaultimpl import StructuredGridDefaultImplementations
 from pymor.grids.interfaces import AffineGridWithOrthogonalCentersInterface
 from pymor.grids.referenceelements import triangle
 
 
-class TriaGrid(AffineGridWithOrthogonalCentersInterface):
+class TriaGrid(StructuredGridDefaultImplementations, AffineGridWithOrthogonalCentersInterface):
     """Basic implementation of a triangular grid on a rectangular domain.
 
     The global face, edge and vertex indices are given as follows ::
@@ -65,7 +66,6 @@ class TriaGrid(AffineGridWithOrthogonalCentersInterface):
         self.x1_diameter = self.x1_width / x1_num_intervals
         n_elements = x0_num_intervals * x1_num_intervals * 4
 
-        # TOPOLOGY
         n_outer_vertices = (x0_num_intervals + 1 - identify_left_right) * (x1_num_intervals + 1 - identify_bottom_top)
         self.__sizes = (n_elements,
                         ((x0_num_intervals + 1 - identify_left_right) * x1_num_intervals +
@@ -73,6 +73,13 @@ class TriaGrid(AffineGridWithOrthogonalCentersInterface):
                          n_elements),
                         n_outer_vertices + int(n_elements / 4))
 
+    @cached
+    def _element_subentities(self):
+        x0_num_intervals, x1_num_intervals = self.num_intervals
+        identify_left_right, identify_bottom_top = self.identify_left_right, self.identify_bottom_top
+        n_elements = self.size(0)
+        n_outer_vertices = self.size(2) - n_elements // 4
+
         # calculate subentities -- codim-1
         V_EDGE_H_INDICES = np.arange(x0_num_intervals + 1, dtype=np.int32)
         if identify_left_right:
@@ -134,16 +141,10 @@ class TriaGrid(AffineGridWithOrthogonalCentersInterface):
                        VERTEX_NUMERS[:-1, :-1].ravel()]).T
 
         codim2_subentities = np.vstack((V0, V1, V2, V3))
-        self.__subentities = (codim1_subentities, codim2_subentities)
-
-        # GEOMETRY
-
-        # embeddings
-        x0_shifts = np.arange(x0_num_intervals) * self.x0_diameter + (self.x0_range[0] + 0.5 * self.x0_diameter)
-        x1_shifts = np.arange(x1_num_intervals) * self.x1_diameter + (self.x1_range[0] + 0.5 * self.x1_diameter)
-        B = np.tile(np.array(np.meshgrid(x0_shifts, x1_shifts)).reshape((2, -1)).T,
-                    (4, 1))
+        return codim1_subentities, codim2_subentities
 
+    def _element_embedding_classes(self):
+        # the codim-0 entities in each quarter of the numbering have the same Jacobian
         ROT45  = np.array([[1./np.sqrt(2.),   -1./np.sqrt(2.)],
                            [1./np.sqrt(2.),    1./np.sqrt(2.)]])
         ROT135 = np.array([[-1./np.sqrt(2.),  -1./np.sqrt(2.)],
@@ -153,12 +154,34 @@ class TriaGrid(AffineGridWithOrthogonalCentersInterface):
         ROT315 = np.array([[1./np.sqrt(2.),    1./np.sqrt(2.)],
                            [-1./np.sqrt(2.),   1./np.sqrt(2.)]])
         SCAL = np.diag([self.x0_diameter / np.sqrt(2), self.x1_diameter / np.sqrt(2)])
-        A0 = np.tile(SCAL.dot(ROT225), (int(n_elements / 4), 1, 1))
-        A1 = np.tile(SCAL.dot(ROT315), (int(n_elements / 4), 1, 1))
-        A2 = np.tile(SCAL.dot(ROT45), (int(n_elements / 4), 1, 1))
-        A3 = np.tile(SCAL.dot(ROT135), (int(n_elements / 4), 1, 1))
-        A = np.vstack((A0, A1, A2, A3))
-        self.__embeddings = (A, B)
+        A = np.array([SCAL.dot(ROT225), SCAL.dot(ROT315), SCAL.dot(ROT45), SCAL.dot(ROT135)])
+        return A, np.repeat(np.arange(4, dtype=np.int32), self.size(0) // 4)
+
+    @cached
+    def _element_embeddings(self):
+        x0_num_intervals, x1_num_intervals = self.num_intervals
+        x0_shifts = np.arange(x0_num_intervals) * self.x0_diameter + (self.x0_range[0] + 0.5 * self.x0_diameter)
+        x1_shifts = np.arange(x1_num_intervals) * self.x1_diameter + (self.x1_range[0] + 0.5 * self.x1_diameter)
+        B = np.tile(np.array(np.meshgrid(x0_shifts, x1_shifts)).reshape((2, -1)).T,
+                    (4, 1))
+        A, classes = self._element_embedding_classes()
+        return A[classes], B
+
+    def _structured_layout(self, codim):
+        if self.identify_left_right or self.identify_bottom_top:
+            return None
+        ni0, ni1 = self.num_intervals
+        n = ni0 * ni1
+        if codim == 0:
+            return [(k * n, (ni0, ni1)) for k in range(4)]
+        elif codim == 1:
+            # vertical, horizontal and the four types of diagonal edges
+            num_v_edges, num_h_edges = (ni0 + 1) * ni1, ni0 * (ni1 + 1)
+            return ([(0, (ni0 + 1, ni1)), (num_v_edges, (ni0, ni1 + 1))]
+                    + [(num_v_edges + num_h_edges + k * n, (ni0, ni1)) for k in range(4)])
+        else:
+            # outer vertices, then the centers of the squares
+            return [(0, (ni0 + 1, ni1 + 1)), ((ni0 + 1) * (ni1 + 1), (ni0, ni1))]
 
     def __reduce__(self):
         return (TriaGrid,
@@ -190,13 +213,13 @@ class TriaGrid(AffineGridWithOrthogonalCentersInterface):
             if subentity_codim == 0:
                 return np.arange(self.size(0), dtype='int32')[:, np.newaxis]
             else:
-                return self.__subentities[subentity_codim - 1]
+                return self._element_subentities()[subentity_codim - 1]
         else:
             return super().subentities(codim, subentity_codim)
 
     def embeddings(self, codim=0):
         if codim == 0:
-            return self.__embeddings
+            return self._element_embeddings()
         else:
             return super().embeddings(codim)
 
@@ -0,0 +1,273 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Chunked assembly of global matrices and vectors from local contributions.
+
+This module contains the assembly driver shared by the finite element operators in
+:mod:`pymor.operators.cg` and the finite volume operators in :mod:`pymor.operators.fv`.
+Local contributions (element matrices, edge fluxes, ...) are computed for a
+block of `chunk_size` grid entities at a time and are directly summed into the
+`data` array of the resulting CSC matrix. Hence, the local contributions are never
+kept in memory for all entities at once. The memory used for assembly is not bounded
+by `chunk_size`, though: the scatter map, an int64 array of length
+`number of entities × number of local entries`, is computed for all entities and is
+cached together with the sparsity structure (see :func:`cached_grid_structure`).
+With :func:`assemble_csc_data`, the matrices for a whole batch of |Parameters| can be
+assembled at once, sharing a single sparsity structure.
+"""
+
+from collections import OrderedDict
+import threading
+import weakref
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from pymor.core.defaults import defaults
+from pymor.tools.chunking import iterate_chunks
+
+
+_grid_structures = weakref.WeakKeyDictionary()
+
+
+@defaults('max_keys')
+def cached_grid_structure(grid, key, build, max_keys=8):
+    """Return the (cached) value of `build()` for `grid` and `key`.
+
+    Used for structures only depending on the grid (and, e.g., a
+    |BoundaryInfo| identified by `key`), like sparsity patterns and scatter maps
+    of assembled matrices. The structures are kept in a LRU cache attached to
+    `grid`, which holds at most `max_keys` structures per grid and is freed
+    together with the grid.
+    """
+    structures = _grid_structures.get(grid)
+    if structures is None:
+        structures = _grid_structures[grid] = OrderedDict()
+    structure = structures.pop(key, None)
+    if structure is None:
+        structure = build()
+    structures[key] = structure
+    while len(structures) > max_keys:
+        structures.popitem(last=False)
+    return structure
+
+
+@defaults('chunk_size', 'num_threads')
+def accumulate_chunks(local_values, num_local, scatter, size, batch_size=None, chunk_size=10000, num_threads=1):
+    """Sum up local contributions into a global array in chunks.
+
+    Parameters
+    ----------
+    local_values
+        Function which, given a `slice` of local indices, returns the contributions
+        for these indices as a |NumPy array| of shape `(number of indices in slice, k)`
+        (or any shape which can be reshaped to it).
+    num_local
+        The total number of local contributions.
+    scatter
+        Array of length `num_local * k` of the positions in the global array
+        each local value is added to.
+    size
+        The length of the global array.
+    batch_size
+        If not `None`, `local_values` returns the contributions for `batch_size`
+        global arrays at once as an array of shape
+        `(batch_size, number of indices in slice, k)`, which are all summed
+        up using the same `scatter` map. `chunk_size` then refers to the
+        number of local contributions per global array, so the memory used per
+        chunk is proportional to `batch_size * chunk_size * k`.
+    chunk_size
+        Maximum number of local contributions computed at once. If `None`,
+        everything is computed in a single chunk. Apart from the chunks, an index
+        array of length `size` is used for summing up chunks whose positions are
+        scattered over the global array.
+    num_threads
+        If larger than one, chunks are computed concurrently using a thread pool
+        of the given size (see :func:`~pymor.tools.chunking.iterate_chunks`).
+        The summation into the global array is always performed sequentially.
+
+    Returns
+    -------
+    The global |NumPy array| of length `size` or, if `batch_size` is not `None`,
+    the |NumPy array| of shape `(batch_size, size)` of all global arrays.
+    """
+    k = len(scatter) // num_local if num_local else 0
+    b = 1 if batch_size is None else batch_size
+
+    # slots[p] is the index of some local value added to position p in the current chunk; used to
+    # compress the positions of a chunk without sorting them
+    slots = None if num_local == 0 else np.empty(size, dtype=np.intp)
+    slots_lock = threading.Lock()
+
+    def compute(s):
+        values = np.asarray(local_values(s)).reshape((b, -1))
+        positions = scatter[s.start * k:s.stop * k]
+        assert values.shape[1] == len(positions)
+        # only touch the entries of the global array this chunk contributes to: a contiguous range
+        # if the chunk's positions are clustered (well-ordered numbering), else the distinct positions
+        offset = positions.min() if len(positions) else 0
+        length = positions.max() + 1 - offset if len(positions) else 0
+        if length <= 2 * len(positions):
+            target = slice(offset, offset + length)
+            positions = positions - offset
+        else:
+            length = len(positions)
+            with slots_lock:
+                slots[positions] = np.arange(length)
+                representatives = slots[positions]
+            target = positions
+            positions = representatives
+        if b > 1:
+            positions = (positions + length * np.arange(b)[:, np.newaxis]).ravel()
+        values = values.ravel()
+        if np.iscomplexobj(values):
+            part = (np.bincount(positions, weights=values.real, minlength=b * length)
+                    + 1j * np.bincount(positions, weights=values.imag, minlength=b * length))
+        else:
+            part = np.bincount(positions, weights=values, minlength=b * length)
+        part = part.reshape((b, length))
+        if not isinstance(target, slice):
+            # each distinct position has exactly one representative, the other entries of part are zero
+            mask = representatives == np.arange(length)
+            target, part = target[mask], part[:, mask]
+        return target, part
+
+    result = np.zeros((b, size))
+    for target, part in iterate_chunks(compute, num_local, chunk_size, num_threads=num_threads):
+        if np.iscomplexobj(part) and not np.iscomplexobj(result):
+            result = result.astype(np.complex_)
+        result[:, target] += part
+    return result[0] if batch_size is None else result
+
+
+def assemble_csc(grid, local_matrices, num_local, key, dofs, size=None, dirichlet=None):
+    """Sum up local matrices into a global |SciPy| CSC matrix.
+
+    The sparsity structure of the global matrix and the map scattering the
+    local entries to the `data` array of the matrix only depend on the grid
+    and the boundary treatment. They are computed once (symbolic phase) and
+    cached using :func:`cached_grid_structure`, so that each further assembly (e.g.
+    for a new |Parameter|) only consists of computing the local matrices
+    and summing them up chunk by chunk using :func:`accumulate_chunks`
+    (numeric phase).
+
+    Parameters
+    ----------
+    grid
+        The |Grid| for which the matrix is assembled.
+    local_matrices
+        Function which, given a `slice` of local indices, returns the corresponding
+        local matrices as an array of shape `(number of indices in slice, p, p)`.
+    num_local
+        The total number of local matrices.
+    key
+        Hashable key identifying `dofs` for the given `grid`.
+    dofs
+        Function returning the global DOFs of each local matrix as
+        an array of shape `(num_local, p)`.
+    size
+        The number of rows and columns of the matrix. If `None`,
+        `grid.size(grid.dim)` is used.
+    dirichlet
+        Either `None` or a tuple `(boundary_info, clear_rows, clear_columns, clear_diag)`
+        specifying the treatment of Dirichlet DOFs (which are assumed to be the
+        codim-`grid.dim` entities). Rows (columns) corresponding to Dirichlet DOFs are
+        set to zero if `clear_rows` (`clear_columns`) is `True`. In this case, the
+        diagonal entries are set to one, unless `clear_diag` is `True`.
+
+    Returns
+    -------
+    The assembled `csc_matrix`.
+    """
+    size = grid.size(grid.dim) if size is None else size
+    data, indices, indptr = assemble_csc_data(grid, local_matrices, num_local, key, dofs, size, dirichlet)
+    A = csc_matrix((data, indices.copy(), indptr.copy()), shape=(size, size))
+    A.has_sorted_indices = True
+    return A
+
+
+def assemble_csc_data(grid, local_matrices, num_local, key, dofs, size=None, dirichlet=None, batch_size=None):
+    """Sum up local matrices into the `data` arrays of CSC matrices with a common sparsity structure.
+
+    Same as :func:`assemble_csc`, but returns the `data` array and the (cached)
+    index structure of the matrix instead of a `csc_matrix`. If `batch_size` is
+    not `None`, `local_matrices` has to return the local matrices of `batch_size`
+    global matrices at once as an array of shape `(batch_size, number of indices in slice, p, p)`,
+    for instance, the local matrices of a parametric operator for a batch of
+    |Parameters|. All global matrices are assembled in a single vectorized pass
+    and share the same `indices` and `indptr` arrays, such that their `data`
+    arrays can directly be used as snapshot vectors for an affine decomposition or
+    empirical interpolation of the operator.
+
+    Parameters
+    ----------
+    grid, local_matrices, num_local, key, dofs, size, dirichlet
+        See :func:`assemble_csc`.
+    batch_size
+        If not `None`, the number of matrices to assemble at once.
+
+    Returns
+    -------
+    data
+        The `data` array of the matrix or, if `batch_size` is not `None`, the
+        |NumPy array| of shape `(batch_size, nnz)` of the `data` arrays of all matrices.
+    indices
+        The `indices` array of the CSC structure. Must not be modified.
+    indptr
+        The `indptr` array of the CSC structure. Must not be modified.
+    """
+    size = grid.size(grid.dim) if size is None else size
+    if dirichlet is not None:
+        bi, clear_rows, clear_columns, clear_diag = dirichlet
+        if not bi.has_dirichlet:
+            dirichlet = None
+        else:
+            key = (key, bi.uid, clear_rows, clear_columns, clear_diag)
+
+    indices, indptr, scatter, cleared, diag = \
+        cached_grid_structure(grid, ('csc', key), lambda: _assembly_structure(grid, dofs(), size, dirichlet))
+
+    if cleared is not None:
+        k = len(scatter) // num_local
+        b = 1 if batch_size is None else batch_size
+
+        def values(s):
+            return np.where(cleared[s.start * k:s.stop * k], 0, local_matrices(s).reshape((b, -1)))
+    else:
+        values = local_matrices
+
+    data = accumulate_chunks(values, num_local, scatter, len(indices), batch_size=batch_size)
+    if diag is not None:
+        data[..., diag] += 1
+
+    return data, indices, indptr
+
+
+def _assembly_structure(grid, dofs, size, dirichlet):
+    n = size
+    p = dofs.shape[1]
+    I0 = np.repeat(dofs, p, axis=1).ravel()
+    I1 = np.tile(dofs, [1, p]).ravel()
+    num_local_entries = len(I0)
+
+    cleared = None
+    if dirichlet is not None:
+        bi, clear_rows, clear_columns, clear_diag = dirichlet
+        mask = bi.dirichlet_mask(grid.dim)
+        if clear_rows:
+            cleared = mask[I0]
+        if clear_columns:
+            cleared = mask[I1] if cleared is None else cleared | mask[I1]
+        if not clear_diag and (clear_rows or clear_columns):
+            DB = bi.dirichlet_boundaries(grid.dim)
+            I0 = np.hstack((I0, DB))
+            I1 = np.hstack((I1, DB))
+
+    # linear indices of the entries in column-major order
+    entries, scatter = np.unique(I1.astype(np.int64) * n + I0, return_inverse=True)
+    indices = entries % n
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(entries // n, minlength=n), out=indptr[1:])
+    diag = scatter[num_local_entries:] if len(scatter) > num_local_entries else None
+    return indices, indptr, scatter[:num_local_entries], cleared, diag
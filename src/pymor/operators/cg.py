@@ -6,10 +6,11 @@
 """ This module provides some operators for continuous finite element discretizations."""
 
 import numpy as np
-from scipy.sparse import coo_matrix, csc_matrix
+from scipy.sparse import coo_matrix
 
 from pymor.functions.interfaces import FunctionInterface
 from pymor.grids.referenceelements import triangle, line, square
+from pymor.operators.assembly import accumulate_chunks, assemble_csc
 from pymor.operators.numpy import NumpyMatrixBasedOperator
 from pymor.vectorarrays.numpy import NumpyVectorSpace
 
@@ -77,9 +78,6 @@ class L2ProductFunctionalP1(NumpyMatrixBasedOperator):
         g = self.grid
         bi = self.boundary_info
 
-        # evaluate function at all quadrature points -> shape = (g.size(0), number of quadrature points)
-        F = self.function(g.quadrature_points(0, order=self.order), mu=mu)
-
         # evaluate the shape functions at the quadrature points on the reference
         # element -> shape = (number of shape functions, number of quadrature points)
         q, w = g.reference_element.quadrature(order=self.order)
@@ -92,14 +90,18 @@ class L2ProductFunctionalP1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        # integrate the products of the function with the shape functions on each element
-        # -> shape = (g.size(0), number of shape functions)
-        SF_INTS = np.einsum('ei,pi,e,i->ep', F, SF, g.integration_elements(0), w).ravel()
+        X = g.quadrature_points(0, order=self.order)
+        IE = g.integration_elements(0)
+
+        def local_vectors(s):
+            # evaluate function at all quadrature points -> shape = (len(s), number of quadrature points)
+            F = self.function(X[s], mu=mu)
+            # integrate the products of the function with the shape functions on each element
+            # -> shape = (len(s), number of shape functions)
+            return np.einsum('ei,pi,e,i->ep', F, SF, IE[s], w)
 
         # map local DOFs to global DOFs
-        # FIXME This implementation is horrible, find a better way!
-        SF_I = g.subentities(0, g.dim).ravel()
-        I = coo_matrix((SF_INTS, (np.zeros_like(SF_I), SF_I)), shape=(1, g.size(g.dim))).toarray().ravel()
+        I = accumulate_chunks(local_vectors, g.size(0), g.subentities(0, g.dim).ravel(), g.size(g.dim))
 
         # neumann boundary treatment
         if bi is not None and bi.has_neumann and self.neumann_data is not None:
@@ -197,9 +199,6 @@ class L2ProductFunctionalQ1(NumpyMatrixBasedOperator):
         g = self.grid
         bi = self.boundary_info
 
-        # evaluate function at all quadrature points -> shape = (g.size(0), number of quadrature points)
-        F = self.function(g.quadrature_points(0, order=self.order), mu=mu)
-
         # evaluate the shape functions at the quadrature points on the reference
         # element -> shape = (number of shape functions, number of quadrature points)
         q, w = g.reference_element.quadrature(order=self.order)
@@ -211,14 +210,18 @@ class L2ProductFunctionalQ1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        # integrate the products of the function with the shape functions on each element
-        # -> shape = (g.size(0), number of shape functions)
-        SF_INTS = np.einsum('ei,pi,e,i->ep', F, SF, g.integration_elements(0), w).ravel()
+        X = g.quadrature_points(0, order=self.order)
+        IE = g.integration_elements(0)
+
+        def local_vectors(s):
+            # evaluate function at all quadrature points -> shape = (len(s), number of quadrature points)
+            F = self.function(X[s], mu=mu)
+            # integrate the products of the function with the shape functions on each element
+            # -> shape = (len(s), number of shape functions)
+            return np.einsum('ei,pi,e,i->ep', F, SF, IE[s], w)
 
         # map local DOFs to global DOFs
-        # FIXME This implementation is horrible, find a better way!
-        SF_I = g.subentities(0, g.dim).ravel()
-        I = coo_matrix((SF_INTS, (np.zeros_like(SF_I), SF_I)), shape=(1, g.size(g.dim))).toarray().ravel()
+        I = accumulate_chunks(local_vectors, g.size(0), g.subentities(0, g.dim).ravel(), g.size(g.dim))
 
         # neumann boundary treatment
         if bi is not None and bi.has_neumann and self.neumann_data is not None:
@@ -275,6 +278,10 @@ class L2ProductP1(NumpyMatrixBasedOperator):
     coefficient_function
         Coefficient |Function| for product with `shape_range == ()`.
         If `None`, constant one is assumed.
+    order
+        Order of the quadrature rule used for the integration. If `None`,
+        `coefficient_function` is only evaluated at the element centers and
+        a second order rule is used for the products of the shape functions.
     name
         The name of the product.
     """
@@ -282,7 +289,7 @@ class L2ProductP1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, dirichlet_clear_rows=True, dirichlet_clear_columns=False,
-                 dirichlet_clear_diag=False, coefficient_function=None, solver_options=None, name=None):
+                 dirichlet_clear_diag=False, coefficient_function=None, order=None, solver_options=None, name=None):
         assert grid.reference_element in (line, triangle)
         self.source = self.range = CGVectorSpace(grid)
         self.grid = grid
@@ -291,6 +298,7 @@ class L2ProductP1(NumpyMatrixBasedOperator):
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
         self.coefficient_function = coefficient_function
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         self.build_parameter_type(coefficient_function)
@@ -304,49 +312,40 @@ class L2ProductP1(NumpyMatrixBasedOperator):
             SF = [lambda X: 1 - X[..., 0] - X[..., 1],
                   lambda X: X[..., 0],
                   lambda X: X[..., 1]]
-            q, w = triangle.quadrature(order=2)
         elif g.dim == 1:
             SF = [lambda X: 1 - X[..., 0],
                   lambda X: X[..., 0]]
-            q, w = line.quadrature(order=2)
         else:
             raise NotImplementedError
 
+        q, w = g.reference_element.quadrature(order=self.order or 2)
+
         # evaluate the shape functions on the quadrature points
         SFQ = np.array(tuple(f(q) for f in SF))
 
         self.logger.info('Integrate the products of the shape functions on each element')
         # -> shape = (g.size(0), number of shape functions ** 2)
-        if self.coefficient_function is not None:
-            C = self.coefficient_function(self.grid.centers(0), mu=mu)
-            SF_INTS = np.einsum('iq,jq,q,e,e->eij', SFQ, SFQ, w, g.integration_elements(0), C).ravel()
-            del C
+        IE = g.integration_elements(0)
+        if self.coefficient_function is None:
+            def integrand(s):
+                return np.einsum('iq,jq,q,e->eij', SFQ, SFQ, w, IE[s])
+        elif self.order is None:
+            X = g.centers(0)
+
+            def integrand(s):
+                C = self.coefficient_function(X[s], mu=mu)
+                return np.einsum('iq,jq,q,e,e->eij', SFQ, SFQ, w, IE[s], C)
         else:
-            SF_INTS = np.einsum('iq,jq,q,e->eij', SFQ, SFQ, w, g.integration_elements(0)).ravel()
-
-        del SFQ
+            X = g.quadrature_points(0, order=self.order)
 
-        self.logger.info('Determine global dofs ...')
-        SF_I0 = np.repeat(g.subentities(0, g.dim), g.dim + 1, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, g.dim + 1]).ravel()
-
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            if self.dirichlet_clear_rows:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
-            if not self.dirichlet_clear_diag and (self.dirichlet_clear_rows or self.dirichlet_clear_columns):
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+            def integrand(s):
+                C = self.coefficient_function(X[s], mu=mu)
+                return np.einsum('iq,jq,q,e,eq->eij', SFQ, SFQ, w, IE[s], C)
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()  # See DiffusionOperatorP1 for why copy() is necessary
-
-        return A
+        return assemble_csc(g, integrand, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, self.dirichlet_clear_rows, self.dirichlet_clear_columns,
+                                       self.dirichlet_clear_diag))
 
 
 class L2ProductQ1(NumpyMatrixBasedOperator):
@@ -374,6 +373,8 @@ class L2ProductQ1(NumpyMatrixBasedOperator):
     coefficient_function
         Coefficient |Function| for product with `shape_range == ()`.
         If `None`, constant one is assumed.
+    order
+        Order of the quadrature rule used for the integration.
     name
         The name of the product.
     """
@@ -381,7 +382,7 @@ class L2ProductQ1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, dirichlet_clear_rows=True, dirichlet_clear_columns=False,
-                 dirichlet_clear_diag=False, coefficient_function=None, solver_options=None, name=None):
+                 dirichlet_clear_diag=False, coefficient_function=None, order=2, solver_options=None, name=None):
         assert grid.reference_element in {square}
         self.source = self.range = CGVectorSpace(grid)
         self.grid = grid
@@ -390,6 +391,7 @@ class L2ProductQ1(NumpyMatrixBasedOperator):
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
         self.coefficient_function = coefficient_function
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         self.build_parameter_type(coefficient_function)
@@ -407,43 +409,28 @@ class L2ProductQ1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        q, w = square.quadrature(order=2)
+        q, w = square.quadrature(order=self.order)
 
         # evaluate the shape functions on the quadrature points
         SFQ = np.array(tuple(f(q) for f in SF))
 
         self.logger.info('Integrate the products of the shape functions on each element')
         # -> shape = (g.size(0), number of shape functions ** 2)
+        IE = g.integration_elements(0)
         if self.coefficient_function is not None:
-            C = self.coefficient_function(self.grid.quadrature_points(0, order=2), mu=mu)
-            SF_INTS = np.einsum('iq,jq,q,e,eq->eij', SFQ, SFQ, w, g.integration_elements(0), C).ravel()
-            del C
-        else:
-            SF_INTS = np.einsum('iq,jq,q,e->eij', SFQ, SFQ, w, g.integration_elements(0)).ravel()
+            X = g.quadrature_points(0, order=self.order)
 
-        del SFQ
-
-        self.logger.info('Determine global dofs ...')
-        SF_I0 = np.repeat(g.subentities(0, g.dim), 4, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, 4]).ravel()
-
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            if self.dirichlet_clear_rows:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
-            if not self.dirichlet_clear_diag and (self.dirichlet_clear_rows or self.dirichlet_clear_columns):
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+            def integrand(s):
+                C = self.coefficient_function(X[s], mu=mu)
+                return np.einsum('iq,jq,q,e,eq->eij', SFQ, SFQ, w, IE[s], C)
+        else:
+            def integrand(s):
+                return np.einsum('iq,jq,q,e->eij', SFQ, SFQ, w, IE[s])
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()  # See DiffusionOperatorP1 for why copy() is necessary
-
-        return A
+        return assemble_csc(g, integrand, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, self.dirichlet_clear_rows, self.dirichlet_clear_columns,
+                                       self.dirichlet_clear_diag))
 
 
 class DiffusionOperatorP1(NumpyMatrixBasedOperator):
@@ -476,6 +463,9 @@ class DiffusionOperatorP1(NumpyMatrixBasedOperator):
     dirichlet_clear_diag
         If `True`, also set diagonal entries corresponding to Dirichlet boundary DOFs to
         zero. Otherwise they are set to one.
+    order
+        Order of the quadrature rule used for integrating `diffusion_function`.
+        If `None`, `diffusion_function` is only evaluated at the element centers.
     name
         Name of the operator.
     """
@@ -483,7 +473,7 @@ class DiffusionOperatorP1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, diffusion_function=None, diffusion_constant=None,
-                 dirichlet_clear_columns=False, dirichlet_clear_diag=False,
+                 dirichlet_clear_columns=False, dirichlet_clear_diag=False, order=None,
                  solver_options=None, name=None):
         assert grid.reference_element(0) in {triangle, line}, 'A simplicial grid is expected!'
         assert diffusion_function is None \
@@ -497,6 +487,7 @@ class DiffusionOperatorP1(NumpyMatrixBasedOperator):
         self.diffusion_function = diffusion_function
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         if diffusion_function is not None:
@@ -517,53 +508,41 @@ class DiffusionOperatorP1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        self.logger.info('Calulate gradients of shape functions transformed by reference map ...')
-        SF_GRADS = np.einsum('eij,pj->epi', g.jacobian_inverse_transposed(0), SF_GRAD)
-
         self.logger.info('Calculate all local scalar products beween gradients ...')
-        if self.diffusion_function is not None and self.diffusion_function.shape_range == ():
-            D = self.diffusion_function(self.grid.centers(0), mu=mu)
-            SF_INTS = np.einsum('epi,eqi,e,e->epq', SF_GRADS, SF_GRADS, g.volumes(0), D).ravel()
-            del D
-        elif self.diffusion_function is not None:
-            D = self.diffusion_function(self.grid.centers(0), mu=mu)
-            SF_INTS = np.einsum('epi,eqj,e,eij->epq', SF_GRADS, SF_GRADS, g.volumes(0), D).ravel()
-            del D
-        else:
-            SF_INTS = np.einsum('epi,eqi,e->epq', SF_GRADS, SF_GRADS, g.volumes(0)).ravel()
-
-        del SF_GRADS
-
-        if self.diffusion_constant is not None:
-            SF_INTS *= self.diffusion_constant
-
-        self.logger.info('Determine global dofs ...')
-        SF_I0 = np.repeat(g.subentities(0, g.dim), g.dim + 1, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, g.dim + 1]).ravel()
+        JIT = g.jacobian_inverse_transposed(0)
+        V = g.volumes(0)
+        d = self.diffusion_function
+        # the gradients are constant on each element, so only the integrals of d are needed
+        if d is not None and self.order is not None:
+            X = g.quadrature_points(0, order=self.order)
+            _, w = g.reference_element.quadrature(order=self.order)
+            IE = g.integration_elements(0)
+
+            def integrate_d(s):
+                return np.einsum('eq...,q,e->e...', d(X[s], mu=mu), w, IE[s])
+        elif d is not None:
+            X = g.centers(0)
+
+            def integrate_d(s):
+                return np.einsum('e...,e->e...', d(X[s], mu=mu), V[s])
+
+        def integrand(s):
+            SF_GRADS = np.einsum('eij,pj->epi', JIT[s], SF_GRAD)
+            if d is None:
+                return np.einsum('epi,eqi,e->epq', SF_GRADS, SF_GRADS, V[s])
+            elif d.shape_range == ():
+                return np.einsum('epi,eqi,e->epq', SF_GRADS, SF_GRADS, integrate_d(s))
+            else:
+                return np.einsum('epi,eqj,eij->epq', SF_GRADS, SF_GRADS, integrate_d(s))
 
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
+        c = self.diffusion_constant
 
-            if not self.dirichlet_clear_diag:
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+        def local_matrices(s):
+            return integrand(s) if c is None else c * integrand(s)
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()
-
-        # The call to copy() is necessary to resize the data arrays of the sparse matrix:
-        # During the conversion to crs_matrix, entries corresponding with the same
-        # coordinates are summed up, resulting in shorter data arrays. The shortening
-        # is implemented by calling self.prune() which creates the view self.data[:self.nnz].
-        # Thus, the original data array is not deleted and all memory stays allocated.
-
-        return A
+        return assemble_csc(g, local_matrices, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, True, self.dirichlet_clear_columns, self.dirichlet_clear_diag))
 
 
 class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
@@ -596,6 +575,8 @@ class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
     dirichlet_clear_diag
         If `True`, also set diagonal entries corresponding to Dirichlet boundary DOFs to
         zero. Otherwise they are set to one.
+    order
+        Order of the quadrature rule used for the integration.
     name
         Name of the operator.
     """
@@ -603,7 +584,7 @@ class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, diffusion_function=None, diffusion_constant=None,
-                 dirichlet_clear_columns=False, dirichlet_clear_diag=False,
+                 dirichlet_clear_columns=False, dirichlet_clear_diag=False, order=2,
                  solver_options=None, name=None):
         assert grid.reference_element(0) in {square}, 'A square grid is expected!'
         assert diffusion_function is None \
@@ -617,6 +598,7 @@ class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
         self.diffusion_function = diffusion_function
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         if diffusion_function is not None:
@@ -628,7 +610,7 @@ class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
 
         # gradients of shape functions
         if g.dim == 2:
-            q, w = g.reference_element.quadrature(order=2)
+            q, w = g.reference_element.quadrature(order=self.order)
             SF_GRAD = np.array(([q[..., 1] - 1., q[..., 0] - 1.],
                                 [1. - q[..., 1], -q[..., 0]],
                                 [q[..., 1], q[..., 0]],
@@ -636,54 +618,30 @@ class DiffusionOperatorQ1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        self.logger.info('Calulate gradients of shape functions transformed by reference map ...')
-        SF_GRADS = np.einsum('eij,pjc->epic', g.jacobian_inverse_transposed(0), SF_GRAD)
-
         self.logger.info('Calculate all local scalar products beween gradients ...')
-        if self.diffusion_function is not None and self.diffusion_function.shape_range == ():
-            D = self.diffusion_function(self.grid.quadrature_points(0, order=2), mu=mu)
-            SF_INTS = np.einsum('epic,eqic,c,e,ec->epq', SF_GRADS, SF_GRADS, w, g.integration_elements(0), D).ravel()
-            del D
-        elif self.diffusion_function is not None:
-            D = self.diffusion_function(self.grid.quadrature_points(0, order=2), mu=mu)
-            SF_INTS = np.einsum('epic,eqjc,c,e,ecij->epq', SF_GRADS, SF_GRADS, w, g.integration_elements(0), D).ravel()
-            del D
-        else:
-            SF_INTS = np.einsum('epic,eqic,c,e->epq', SF_GRADS, SF_GRADS, w, g.integration_elements(0)).ravel()
-
-        del SF_GRADS
-
-        if self.diffusion_constant is not None:
-            SF_INTS *= self.diffusion_constant
-
-        self.logger.info('Determine global dofs ...')
-
-        SF_I0 = np.repeat(g.subentities(0, g.dim), 4, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, 4]).ravel()
+        JIT = g.jacobian_inverse_transposed(0)
+        IE = g.integration_elements(0)
+        X = g.quadrature_points(0, order=self.order)
+        d = self.diffusion_function
+
+        def integrand(s):
+            SF_GRADS = np.einsum('eij,pjc->epic', JIT[s], SF_GRAD)
+            if d is None:
+                return np.einsum('epic,eqic,c,e->epq', SF_GRADS, SF_GRADS, w, IE[s])
+            D = d(X[s], mu=mu)
+            if d.shape_range == ():
+                return np.einsum('epic,eqic,c,e,ec->epq', SF_GRADS, SF_GRADS, w, IE[s], D)
+            else:
+                return np.einsum('epic,eqjc,c,e,ecij->epq', SF_GRADS, SF_GRADS, w, IE[s], D)
 
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
+        c = self.diffusion_constant
 
-            if not self.dirichlet_clear_diag:
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+        def local_matrices(s):
+            return integrand(s) if c is None else c * integrand(s)
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()
-
-        # The call to copy() is necessary to resize the data arrays of the sparse matrix:
-        # During the conversion to crs_matrix, entries corresponding with the same
-        # coordinates are summed up, resulting in shorter data arrays. The shortening
-        # is implemented by calling self.prune() which creates the view self.data[:self.nnz].
-        # Thus, the original data array is not deleted and all memory stays allocated.
-
-        return A
+        return assemble_csc(g, local_matrices, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, True, self.dirichlet_clear_columns, self.dirichlet_clear_diag))
 
 
 class AdvectionOperatorP1(NumpyMatrixBasedOperator):
@@ -715,6 +673,8 @@ class AdvectionOperatorP1(NumpyMatrixBasedOperator):
     dirichlet_clear_diag
         If `True`, also set diagonal entries corresponding to Dirichlet boundary DOFs to
         zero. Otherwise they are set to one.
+    order
+        Order of the quadrature rule used for the integration.
     name
         Name of the operator.
     """
@@ -722,7 +682,7 @@ class AdvectionOperatorP1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, advection_function=None, advection_constant=None,
-                 dirichlet_clear_columns=False, dirichlet_clear_diag=False,
+                 dirichlet_clear_columns=False, dirichlet_clear_diag=False, order=2,
                  solver_options=None, name=None):
         assert grid.reference_element(0) in {triangle, line}, 'A simplicial grid is expected!'
         assert advection_function is None \
@@ -736,6 +696,7 @@ class AdvectionOperatorP1(NumpyMatrixBasedOperator):
         self.advection_function = advection_function
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         if advection_function is not None:
@@ -757,51 +718,30 @@ class AdvectionOperatorP1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        q, w = g.reference_element.quadrature(order=2)
-
-        self.logger.info('Calulate gradients of shape functions transformed by reference map ...')
-        SF_GRADS = np.einsum('eij,pj->epi', g.jacobian_inverse_transposed(0), SF_GRAD)
-        # SF_GRADS(element, function, component)
+        q, w = g.reference_element.quadrature(order=self.order)
 
         SFQ = np.array(tuple(f(q) for f in SF))
         # SFQ(function, quadraturepoint)
 
         self.logger.info('Calculate all local scalar products beween gradients ...')
-        D = self.advection_function(self.grid.quadrature_points(0, order=2), mu=mu)
-        SF_INTS = - np.einsum('pc,eqi,c,e,eci->eqp', SFQ, SF_GRADS, w, g.integration_elements(0), D).ravel()
-        del D
-        del SF_GRADS
-
-        if self.advection_constant is not None:
-            SF_INTS *= self.advection_constant
+        JIT = g.jacobian_inverse_transposed(0)
+        IE = g.integration_elements(0)
+        X = g.quadrature_points(0, order=self.order)
 
-        self.logger.info('Determine global dofs ...')
-        SF_I0 = np.repeat(g.subentities(0, g.dim), g.dim + 1, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, g.dim + 1]).ravel()
+        def integrand(s):
+            SF_GRADS = np.einsum('eij,pj->epi', JIT[s], SF_GRAD)
+            # SF_GRADS(element, function, component)
+            D = self.advection_function(X[s], mu=mu)
+            return - np.einsum('pc,eqi,c,e,eci->eqp', SFQ, SF_GRADS, w, IE[s], D)
 
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
+        c = self.advection_constant
 
-            if not self.dirichlet_clear_diag:
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+        def local_matrices(s):
+            return integrand(s) if c is None else c * integrand(s)
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()
-
-        # The call to copy() is necessary to resize the data arrays of the sparse matrix:
-        # During the conversion to crs_matrix, entries corresponding with the same
-        # coordinates are summed up, resulting in shorter data arrays. The shortening
-        # is implemented by calling self.prune() which creates the view self.data[:self.nnz].
-        # Thus, the original data array is not deleted and all memory stays allocated.
-
-        return A
+        return assemble_csc(g, local_matrices, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, True, self.dirichlet_clear_columns, self.dirichlet_clear_diag))
 
 
 class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
@@ -833,6 +773,8 @@ class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
     dirichlet_clear_diag
         If `True`, also set diagonal entries corresponding to Dirichlet boundary DOFs to
         zero. Otherwise they are set to one.
+    order
+        Order of the quadrature rule used for the integration.
     name
         Name of the operator.
     """
@@ -840,7 +782,7 @@ class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
     sparse = True
 
     def __init__(self, grid, boundary_info, advection_function=None, advection_constant=None,
-                 dirichlet_clear_columns=False, dirichlet_clear_diag=False,
+                 dirichlet_clear_columns=False, dirichlet_clear_diag=False, order=2,
                  solver_options=None, name=None):
         assert grid.reference_element(0) in {square}, 'A square grid is expected!'
         assert advection_function is None \
@@ -854,6 +796,7 @@ class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
         self.advection_function = advection_function
         self.dirichlet_clear_columns = dirichlet_clear_columns
         self.dirichlet_clear_diag = dirichlet_clear_diag
+        self.order = order
         self.solver_options = solver_options
         self.name = name
         if advection_function is not None:
@@ -865,7 +808,7 @@ class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
 
         # gradients of shape functions
         if g.dim == 2:
-            q, w = g.reference_element.quadrature(order=2)
+            q, w = g.reference_element.quadrature(order=self.order)
             SF_GRAD = np.array(([q[..., 1] - 1., q[..., 0] - 1.],
                                 [1. - q[..., 1], -q[..., 0]],
                                 [q[..., 1], q[..., 0]],
@@ -878,51 +821,28 @@ class AdvectionOperatorQ1(NumpyMatrixBasedOperator):
         else:
             raise NotImplementedError
 
-        self.logger.info('Calulate gradients of shape functions transformed by reference map ...')
-        SF_GRADS = np.einsum('eij,pjc->epic', g.jacobian_inverse_transposed(0), SF_GRAD)
-        # SF_GRADS(element,function,component,quadraturepoint)
-
         SFQ = np.array(tuple(f(q) for f in SF))
         # SFQ(function, quadraturepoint)
 
         self.logger.info('Calculate all local scalar products beween gradients ...')
+        JIT = g.jacobian_inverse_transposed(0)
+        IE = g.integration_elements(0)
+        X = g.quadrature_points(0, order=self.order)
 
-        D = self.advection_function(self.grid.quadrature_points(0, order=2), mu=mu)
-        SF_INTS = - np.einsum('pc,eqic,c,e,eci->eqp', SFQ, SF_GRADS, w, g.integration_elements(0), D).ravel()
-        del D
-        del SF_GRADS
-
-        if self.advection_constant is not None:
-            SF_INTS *= self.advection_constant
+        def integrand(s):
+            SF_GRADS = np.einsum('eij,pjc->epic', JIT[s], SF_GRAD)
+            # SF_GRADS(element,function,component,quadraturepoint)
+            D = self.advection_function(X[s], mu=mu)
+            return - np.einsum('pc,eqic,c,e,eci->eqp', SFQ, SF_GRADS, w, IE[s], D)
 
-        self.logger.info('Determine global dofs ...')
+        c = self.advection_constant
 
-        SF_I0 = np.repeat(g.subentities(0, g.dim), 4, axis=1).ravel()
-        SF_I1 = np.tile(g.subentities(0, g.dim), [1, 4]).ravel()
-
-        self.logger.info('Boundary treatment ...')
-        if bi.has_dirichlet:
-            SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I0], 0, SF_INTS)
-            if self.dirichlet_clear_columns:
-                SF_INTS = np.where(bi.dirichlet_mask(g.dim)[SF_I1], 0, SF_INTS)
-
-            if not self.dirichlet_clear_diag:
-                SF_INTS = np.hstack((SF_INTS, np.ones(bi.dirichlet_boundaries(g.dim).size)))
-                SF_I0 = np.hstack((SF_I0, bi.dirichlet_boundaries(g.dim)))
-                SF_I1 = np.hstack((SF_I1, bi.dirichlet_boundaries(g.dim)))
+        def local_matrices(s):
+            return integrand(s) if c is None else c * integrand(s)
 
         self.logger.info('Assemble system matrix ...')
-        A = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-        del SF_INTS, SF_I0, SF_I1
-        A = csc_matrix(A).copy()
-
-        # The call to copy() is necessary to resize the data arrays of the sparse matrix:
-        # During the conversion to crs_matrix, entries corresponding with the same
-        # coordinates are summed up, resulting in shorter data arrays. The shortening
-        # is implemented by calling self.prune() which creates the view self.data[:self.nnz].
-        # Thus, the original data array is not deleted and all memory stays allocated.
-
-        return A
+        return assemble_csc(g, local_matrices, g.size(0), 'elements', lambda: g.subentities(0, g.dim),
+                            dirichlet=(bi, True, self.dirichlet_clear_columns, self.dirichlet_clear_diag))
 
 
 class RobinBoundaryOperator(NumpyMatrixBasedOperator):
@@ -983,28 +903,28 @@ class RobinBoundaryOperator(NumpyMatrixBasedOperator):
         RI = bi.robin_boundaries(1)
         if g.dim == 1:
             robin_c = self.robin_data[0](g.centers(1)[RI], mu=mu)
-            I = coo_matrix((robin_c, (RI, RI)), shape=(g.size(g.dim), g.size(g.dim)))
-            return csc_matrix(I).copy()
+            return assemble_csc(g, lambda s: robin_c[s], len(RI), ('robin', bi.uid), lambda: RI[:, np.newaxis])
         else:
             xref = g.quadrature_points(1, order=self.order)[RI]
             # xref(robin-index, quadraturepoint-index)
-            if self.robin_data[0].shape_range == ():
-                robin_c = self.robin_data[0](xref, mu=mu)
-            else:
+            if self.robin_data[0].shape_range != ():
                 robin_elements = g.superentities(1, 0)[RI, 0]
                 robin_indices = g.superentity_indices(1, 0)[RI, 0]
                 normals = g.unit_outer_normals()[robin_elements, robin_indices]
-                robin_values = self.robin_data[0](xref, mu=mu)
-                robin_c = np.einsum('ei,eqi->eq', normals, robin_values)
 
-            # robin_c(robin-index, quadraturepoint-index)
             q, w = line.quadrature(order=self.order)
             SF = np.squeeze(np.array([1 - q, q]))
-            SF_INTS = np.einsum('ep,pi,pj,e,p->eij', robin_c, SF, SF, g.integration_elements(1)[RI], w).ravel()
-            SF_I0 = np.repeat(g.subentities(1, g.dim)[RI], 2).ravel()
-            SF_I1 = np.tile(g.subentities(1, g.dim)[RI], [1, 2]).ravel()
-            I = coo_matrix((SF_INTS, (SF_I0, SF_I1)), shape=(g.size(g.dim), g.size(g.dim)))
-            return csc_matrix(I).copy()
+            IE = g.integration_elements(1)[RI]
+
+            def local_matrices(s):
+                if self.robin_data[0].shape_range == ():
+                    robin_c = self.robin_data[0](xref[s], mu=mu)
+                else:
+                    robin_c = np.einsum('ei,eqi->eq', normals[s], self.robin_data[0](xref[s], mu=mu))
+                # robin_c(robin-index, quadraturepoint-index)
+                return np.einsum('ep,pi,pj,e,p->eij', robin_c, SF, SF, IE[s], w)
+
+            return assemble_csc(g, local_matrices, len(RI), ('robin', bi.uid), lambda: g.subentities(1, g.dim)[RI])
 
 
 class InterpolationOperator(NumpyMatrixBasedOperator):
@@ -1031,3 +951,86 @@ class InterpolationOperator(NumpyMatrixBasedOperator):
 
     def _assemble(self, mu=None):
         return self.function.evaluate(self.grid.centers(self.grid.dim), mu=mu).reshape((-1, 1))
+
+
+class ProlongationOperatorP1(NumpyMatrixBasedOperator):
+    """Lagrange interpolation of linear finite element functions onto another grid.
+
+    Maps a P1 function on `source_grid` to the P1 function on `range_grid` which
+    agrees with it at the vertices of `range_grid`. The vertices are located in
+    `source_grid` using :meth:`~pymor.grids.interfaces.AffineGridInterface.locate`.
+    The values at vertices outside of `source_grid` are set to zero.
+
+    For nested grids (e.g. a grid and its refinement), the operator is the natural
+    embedding of the coarse space into the fine space.
+
+    Parameters
+    ----------
+    source_grid
+        The |Grid| of the source space (one- or two-dimensional simplicial grid).
+    range_grid
+        The |Grid| of the range space.
+    name
+        The name of the operator.
+    """
+
+    sparse = True
+    linear = True
+
+    def __init__(self, source_grid, range_grid, name=None):
+        assert source_grid.reference_element in (line, triangle)
+        assert range_grid.dim == source_grid.dim
+        self.source = CGVectorSpace(source_grid)
+        self.range = CGVectorSpace(range_grid)
+        self.source_grid = source_grid
+        self.range_grid = range_grid
+        self.name = name
+
+    def _assemble(self, mu=None):
+        return _lagrange_prolongation(self.source_grid, self.range_grid,
+                                      lambda X: np.hstack((1 - np.sum(X, axis=1)[:, np.newaxis], X)))
+
+
+class ProlongationOperatorQ1(NumpyMatrixBasedOperator):
+    """Lagrange interpolation of bilinear finite element functions onto another grid.
+
+    See :class:`ProlongationOperatorP1`.
+
+    Parameters
+    ----------
+    source_grid
+        The |Grid| of the source space (two-dimensional grid of quadrilaterals).
+    range_grid
+        The |Grid| of the range space.
+    name
+        The name of the operator.
+    """
+
+    sparse = True
+    linear = True
+
+    def __init__(self, source_grid, range_grid, name=None):
+        assert source_grid.reference_element is square
+        assert range_grid.dim == source_grid.dim
+        self.source = CGVectorSpace(source_grid)
+        self.range = CGVectorSpace(range_grid)
+        self.source_grid = source_grid
+        self.range_grid = range_grid
+        self.name = name
+
+    def _assemble(self, mu=None):
+        return _lagrange_prolongation(self.source_grid, self.range_grid,
+                                      lambda X: np.array(((1 - X[:, 0]) * (1 - X[:, 1]),
+                                                          (1 - X[:, 1]) * (X[:, 0]),
+                                                          (X[:, 0]) * (X[:, 1]),
+                                                          (X[:, 1]) * (1 - X[:, 0]))).T)
+
+
+def _lagrange_prolongation(source_grid, range_grid, shape_functions):
+    """Matrix evaluating the shape functions of `source_grid` at the vertices of `range_grid`."""
+    E, X = source_grid.locate(range_grid.centers(range_grid.dim))
+    found = np.flatnonzero(E >= 0)
+    SF = shape_functions(X[found])
+    DOFS = source_grid.subentities(0, source_grid.dim)[E[found]]
+    return coo_matrix((SF.ravel(), (np.repeat(found, SF.shape[1]), DOFS.ravel())),
+                      shape=(range_grid.size(range_grid.dim), source_grid.size(source_grid.dim))).tocsc()
@@ -688,6 +688,169 @@ class AffineOperator(ProxyOperator):
         return self.linear_part.jacobian(U, mu)
 
 
+class LowRankOperator(OperatorBase):
+    """Non-parametric low-rank |Operator| of the form `left @ core @ right^T`.
+
+    Applying the operator to `U` requires the computation of `len(right)` inner
+    products and a linear combination of `len(left)` vectors, i.e. `O(k⋅n)`
+    operations for rank `k` and dimension `n`.
+
+    Parameters
+    ----------
+    left
+        |VectorArray| of length `k` in the operator's range.
+    core
+        |NumPy array| of shape `(len(left), len(right))`.
+    right
+        |VectorArray| of length `k'` in the operator's source.
+    name
+        Name of the operator.
+    """
+
+    linear = True
+
+    def __init__(self, left, core, right, name=None):
+        assert isinstance(left, VectorArrayInterface)
+        assert isinstance(right, VectorArrayInterface)
+        core = np.asarray(core)
+        assert core.shape == (len(left), len(right))
+        self.left = left.copy()
+        self.core = core
+        self.right = right.copy()
+        self.source = right.space
+        self.range = left.space
+        self.name = name
+
+    @property
+    def T(self):
+        return LowRankOperator(self.right, self.core.T, self.left, name=self.name + '_transposed')
+
+    def apply(self, U, mu=None):
+        assert U in self.source
+        return self.left.lincomb(self.core.dot(self.right.dot(U)).T)
+
+    def apply_transpose(self, V, mu=None):
+        assert V in self.range
+        return self.right.lincomb(self.core.T.dot(self.left.dot(V)).T)
+
+    def assemble_lincomb(self, operators, coefficients, solver_options=None, name=None):
+        if not all(isinstance(op, LowRankOperator) for op in operators) or solver_options:
+            return None
+        left = operators[0].left.empty()
+        right = operators[0].right.empty()
+        for op in operators:
+            left.append(op.left)
+            right.append(op.right)
+        from scipy.linalg import block_diag
+        core = block_diag(*(op.core * c for op, c in zip(operators, coefficients)))
+        return LowRankOperator(left, core, right, name=name)
+
+
+class LowRankUpdatedOperator(OperatorBase):
+    """|Operator| of the form `operator + lr_operator` with a |LowRankOperator| `lr_operator`.
+
+    :meth:`apply_inverse` and :meth:`apply_inverse_transpose` are implemented
+    using the Sherman-Morrison-Woodbury formula ::
+
+        (A + L C R^T)^{-1} = A^{-1} - A^{-1} L (I + C R^T A^{-1} L)^{-1} C R^T A^{-1},
+
+    i.e. only the inverse of `operator` (and thus its factorization, if
+    available) is needed. For non-parametric `operator`, `A^{-1} L` is
+    computed only once.
+
+    Parameters
+    ----------
+    operator
+        The linear |Operator| which is updated.
+    lr_operator
+        The |LowRankOperator| to add.
+    solver_options
+        The |solver_options| for the operator. Only used for least squares problems.
+    name
+        Name of the operator.
+    """
+
+    sid_ignore = OperatorBase.sid_ignore | {'_inverse_left', '_inverse_transpose_right'}
+
+    linear = True
+
+    def __init__(self, operator, lr_operator, solver_options=None, name=None):
+        assert isinstance(operator, OperatorInterface) and operator.linear
+        assert isinstance(lr_operator, LowRankOperator)
+        assert operator.source == lr_operator.source and operator.range == lr_operator.range
+        self.operator = operator
+        self.lr_operator = lr_operator
+        self.source = operator.source
+        self.range = operator.range
+        self.solver_options = solver_options
+        self.name = name
+        self.build_parameter_type(operator)
+
+    @property
+    def T(self):
+        options = {'inverse': self.solver_options.get('inverse_transpose'),
+                   'inverse_transpose': self.solver_options.get('inverse')} if self.solver_options else None
+        return LowRankUpdatedOperator(self.operator.T, self.lr_operator.T, solver_options=options,
+                                      name=self.name + '_transposed')
+
+    def apply(self, U, mu=None):
+        assert U in self.source
+        V = self.operator.apply(U, mu=mu)
+        V.axpy(1., self.lr_operator.apply(U))
+        return V
+
+    def apply_transpose(self, V, mu=None):
+        assert V in self.range
+        U = self.operator.apply_transpose(V, mu=mu)
+        U.axpy(1., self.lr_operator.apply_transpose(V))
+        return U
+
+    def assemble(self, mu=None):
+        operator = self.operator.assemble(mu)
+        if operator is self.operator:
+            return self
+        return self.with_(operator=operator)
+
+    def apply_inverse(self, V, mu=None, least_squares=False):
+        assert V in self.range
+        if least_squares:
+            return super().apply_inverse(V, mu=mu, least_squares=True)
+        mu = self.parse_parameter(mu)
+        lr = self.lr_operator
+        if self.operator.parametric or not hasattr(self, '_inverse_left'):
+            inverse_left = self.operator.apply_inverse(lr.left, mu=mu)
+            if not self.operator.parametric:
+                self._inverse_left = inverse_left
+        else:
+            inverse_left = self._inverse_left
+        return self._woodbury(self.operator.apply_inverse(V, mu=mu), inverse_left, lr.core, lr.right)
+
+    def apply_inverse_transpose(self, U, mu=None, least_squares=False):
+        assert U in self.source
+        if least_squares:
+            return super().apply_inverse_transpose(U, mu=mu, least_squares=True)
+        mu = self.parse_parameter(mu)
+        lr = self.lr_operator
+        if self.operator.parametric or not hasattr(self, '_inverse_transpose_right'):
+            inverse_transpose_right = self.operator.apply_inverse_transpose(lr.right, mu=mu)
+            if not self.operator.parametric:
+                self._inverse_transpose_right = inverse_transpose_right
+        else:
+            inverse_transpose_right = self._inverse_transpose_right
+        return self._woodbury(self.operator.apply_inverse_transpose(U, mu=mu), inverse_transpose_right,
+                              lr.core.T, lr.left)
+
+    @staticmethod
+    def _woodbury(X, inverse_left, core, right):
+        small_matrix = np.eye(len(inverse_left)) + core.dot(right.dot(inverse_left))
+        try:
+            coefficients = np.linalg.solve(small_matrix, core.dot(right.dot(X)))
+        except np.linalg.LinAlgError as e:
+            raise InversionError('{}: {}'.format(str(type(e)), str(e)))
+        X.axpy(-1., inverse_left.lincomb(coefficients.T))
+        return X
+
+
 class InverseOperator(OperatorBase):
     """Represents the inverse of a given |Operator|.
 
@@ -12,13 +12,11 @@ from pymor.core.defaults import defaults
 from pymor.core.interfaces import ImmutableInterface, abstractmethod
 from pymor.functions.interfaces import FunctionInterface
 from pymor.grids.interfaces import AffineGridWithOrthogonalCentersInterface
-from pymor.grids.boundaryinfos import SubGridBoundaryInfo
-from pymor.grids.subgrid import SubGrid
+from pymor.operators.assembly import assemble_csc, assemble_csc_data, cached_grid_structure
 from pymor.operators.basic import OperatorBase
-from pymor.operators.constructions import Concatenation, ComponentProjection
 from pymor.operators.numpy import NumpyMatrixBasedOperator, NumpyMatrixOperator
 from pymor.parameters.base import Parametric
-from pymor.tools.inplace import iadd_masked, isub_masked
+from pymor.tools.chunking import chunk_slices
 from pymor.tools.quadratures import GaussQuadratures
 from pymor.vectorarrays.numpy import NumpyVectorSpace
 
@@ -27,6 +25,48 @@ def FVVectorSpace(grid, id_='STATE'):
     return NumpyVectorSpace(grid.size(0), id_)
 
 
+def _edge_dofs(grid):
+    """Indices of the codim-0 entities on both sides of each codim-1 entity.
+
+    For boundary entities, both entries are the index of the single adjacent
+    codim-0 entity.
+    """
+    SUPE = grid.superentities(1, 0)
+    return np.where(SUPE >= 0, SUPE, SUPE[:, :1])
+
+
+def divergence_matrix(grid):
+    """Volume-scaled incidence matrix of the codim-0 and codim-1 entities of a |Grid|.
+
+    Multiplying this `csr_matrix` with a vector of fluxes across the codim-1
+    entities (oriented along the unit outer normal of the first superentity)
+    yields the total flux leaving each codim-0 entity divided by its volume,
+    i.e. the finite volume approximation of the divergence. Applying it to
+    a |NumPy array| of shape `(grid.size(1), k)` treats `k` flux vectors at once.
+
+    The matrix is cached using :func:`~pymor.operators.assembly.cached_grid_structure`.
+    """
+    return cached_grid_structure(grid, 'divergence_matrix', lambda: _divergence_matrix(grid))
+
+
+def _divergence_matrix(grid):
+    # the compact superentity relation is the CSC structure of the incidence matrix:
+    # +1 for the first superentity of each edge, -1 for the second one
+    offsets, cells, _ = grid.superentities_csr(1, 0)
+    signs = -np.ones(len(cells))
+    signs[offsets[:-1]] = 1.
+    D = csc_matrix((signs, cells, offsets), shape=(grid.size(0), grid.size(1))).tocsr()
+    return dia_matrix(([1. / grid.volumes(0)], [0]), shape=(grid.size(0),) * 2) * D
+
+
+def _incidence_matrix(SUPE, num_cells):
+    # +1 for the cell the edge normal points away from, -1 for the cell on the other side
+    inner = np.nonzero(SUPE[:, 1] >= 0)[0]
+    return coo_matrix((np.hstack([np.ones(len(SUPE)), -np.ones(len(inner))]),
+                       (np.hstack([SUPE[:, 0], SUPE[inner, 1]]), np.hstack([np.arange(len(SUPE)), inner]))),
+                      shape=(num_cells, len(SUPE))).tocsr()
+
+
 class NumericalConvectiveFluxInterface(ImmutableInterface, Parametric):
     """Interface for numerical convective fluxes for finite volume schemes.
 
@@ -52,6 +92,10 @@ class NumericalConvectiveFluxInterface(ImmutableInterface, Parametric):
 
          `evaluate_stage2` returns a |NumPy array| of the flux evaluations
          for each edge.
+
+    Optionally, numerical fluxes can implement `evaluate_derivatives`, which
+    is used by :meth:`NonlinearAdvectionOperator.jacobian` to compute the
+    exact Jacobian of the operator.
     """
 
     @abstractmethod
@@ -62,6 +106,33 @@ class NumericalConvectiveFluxInterface(ImmutableInterface, Parametric):
     def evaluate_stage2(self, stage1_data, unit_outer_normals, volumes, mu=None):
         pass
 
+    def evaluate_derivatives(self, U, unit_outer_normals, volumes, mu=None):
+        """Evaluate the partial derivatives of the flux w.r.t. `U_inner` and `U_outer`.
+
+        Parameters
+        ----------
+        U
+            |NumPy array| of shape `(num_edges, 2)` containing the values
+            `U_inner` and `U_outer` for each edge.
+        unit_outer_normals
+            The unit outer normals of the edges.
+        volumes
+            The volumes of the edges.
+        mu
+            The |Parameter| for which to evaluate the derivatives.
+
+        Returns
+        -------
+        Tuple of two |NumPy arrays| of length `num_edges` containing the
+        derivatives w.r.t. `U_inner` and `U_outer`.
+
+        Raises
+        ------
+        NotImplementedError
+            The flux does not provide its derivatives.
+        """
+        raise NotImplementedError
+
 
 class LaxFriedrichsFlux(NumericalConvectiveFluxInterface):
     """Lax-Friedrichs numerical flux.
@@ -77,12 +148,16 @@ class LaxFriedrichsFlux(NumericalConvectiveFluxInterface):
         |Function| defining the analytical flux `f`.
     lxf_lambda
         The stabilization parameter `λ`.
+    flux_derivative
+        If not `None`, |Function| defining the analytical flux derivative `f'`,
+        which is required for :meth:`~NumericalConvectiveFluxInterface.evaluate_derivatives`.
     """
 
-    def __init__(self, flux, lxf_lambda=1.0):
+    def __init__(self, flux, lxf_lambda=1.0, flux_derivative=None):
         self.flux = flux
         self.lxf_lambda = lxf_lambda
-        self.build_parameter_type(flux)
+        self.flux_derivative = flux_derivative
+        self.build_parameter_type(flux, flux_derivative)
 
     def evaluate_stage1(self, U, mu=None):
         return U, self.flux(U[..., np.newaxis], mu)
@@ -92,6 +167,13 @@ class LaxFriedrichsFlux(NumericalConvectiveFluxInterface):
         return (np.sum(np.sum(F, axis=1) * unit_outer_normals, axis=1) * 0.5
                 + (U[..., 0] - U[..., 1]) * (0.5 / self.lxf_lambda)) * volumes
 
+    def evaluate_derivatives(self, U, unit_outer_normals, volumes, mu=None):
+        if self.flux_derivative is None:
+            raise NotImplementedError
+        F_d = np.sum(self.flux_derivative(U[..., np.newaxis], mu) * unit_outer_normals[:, np.newaxis, :], axis=2)
+        return ((F_d[:, 0] * 0.5 + 0.5 / self.lxf_lambda) * volumes,
+                (F_d[:, 1] * 0.5 - 0.5 / self.lxf_lambda) * volumes)
+
 
 class SimplifiedEngquistOsherFlux(NumericalConvectiveFluxInterface):
     """Engquist-Osher numerical flux. Simplified Implementation for special case.
@@ -127,6 +209,9 @@ class SimplifiedEngquistOsherFlux(NumericalConvectiveFluxInterface):
         F_edge *= volumes
         return F_edge
 
+    def evaluate_derivatives(self, U, unit_outer_normals, volumes, mu=None):
+        return _engquist_osher_derivatives(self.flux_derivative, U, unit_outer_normals, volumes, mu)
+
 
 class EngquistOsherFlux(NumericalConvectiveFluxInterface):
     """Engquist-Osher numerical flux.
@@ -185,12 +270,32 @@ class EngquistOsherFlux(NumericalConvectiveFluxInterface):
         Fs *= volumes
         return Fs
 
+    def evaluate_derivatives(self, U, unit_outer_normals, volumes, mu=None):
+        return _engquist_osher_derivatives(self.flux_derivative, U, unit_outer_normals, volumes, mu)
+
+
+def _engquist_osher_derivatives(flux_derivative, U, unit_outer_normals, volumes, mu):
+    # by the fundamental theorem of calculus, the derivatives of the Engquist-Osher flux are
+    # given by the positive/negative parts of f'(U_inner)⋅normal and f'(U_outer)⋅normal
+    F_d = np.sum(flux_derivative(U[..., np.newaxis], mu) * unit_outer_normals[:, np.newaxis, :], axis=2)
+    return np.maximum(F_d[:, 0], 0) * volumes, np.minimum(F_d[:, 1], 0) * volumes
+
 
 @defaults('delta')
 def jacobian_options(delta=1e-7):
     return {'delta': delta}
 
 
+@defaults('max_edge_values')
+def apply_options(max_edge_values=100000):
+    """Options for :meth:`NonlinearAdvectionOperator.apply`.
+
+    `max_edge_values` bounds the number of edge flux values which are
+    evaluated at once when the operator is applied to multiple vectors.
+    """
+    return {'max_edge_values': max_edge_values}
+
+
 class NonlinearAdvectionOperator(OperatorBase):
     """Nonlinear finite volume advection |Operator|.
 
@@ -213,7 +318,7 @@ class NonlinearAdvectionOperator(OperatorBase):
         The name of the operator.
     """
 
-    sid_ignore = OperatorBase.sid_ignore | {'_grid_data'}
+    sid_ignore = OperatorBase.sid_ignore | {'_grid_data', '_last_dirichlet_values'}
 
     linear = False
 
@@ -247,16 +352,13 @@ class NonlinearAdvectionOperator(OperatorBase):
         return super().with_(**kwargs)
 
     def restricted(self, dofs):
-        source_dofs = np.setdiff1d(np.union1d(self.grid.neighbours(0, 0)[dofs].ravel(), dofs),
-                                   np.array([-1], dtype=np.int32),
-                                   assume_unique=True)
-        sub_grid = SubGrid(self.grid, entities=source_dofs)
-        sub_boundary_info = SubGridBoundaryInfo(sub_grid, self.grid, self.boundary_info)
-        op = self.with_(grid=sub_grid, boundary_info=sub_boundary_info, space_id=None,
-                        name='{}_restricted'.format(self.name))
-        sub_grid_indices = sub_grid.indices_from_parent_indices(dofs, codim=0)
-        proj = ComponentProjection(sub_grid_indices, op.range)
-        return Concatenation([proj, op]), sub_grid.parent_indices(0)
+        if not hasattr(self, '_grid_data'):
+            self._fetch_grid_data()
+        stencil, source_dofs = _restrict_stencil(self._grid_data, dofs)
+        op = RestrictedNonlinearAdvectionOperator(self.numerical_flux, stencil, self.dirichlet_data,
+                                                  solver_options=self.solver_options,
+                                                  name='{}_restricted'.format(self.name))
+        return op, source_dofs
 
     def _fetch_grid_data(self):
         # pre-fetch all grid-associated data to avoid searching the cache for each operator application
@@ -271,7 +373,22 @@ class NonlinearAdvectionOperator(OperatorBase):
                                DIRICHLET_BOUNDARIES=bi.dirichlet_boundaries(1) if bi.has_dirichlet else None,
                                NEUMANN_BOUNDARIES=bi.neumann_boundaries(1) if bi.has_neumann else None)
         self._grid_data.update(UNIT_OUTER_NORMALS=g.unit_outer_normals()[self._grid_data['SUPE'][:, 0],
-                                                                         self._grid_data['SUPI'][:, 0]])
+                                                                         self._grid_data['SUPI'][:, 0]],
+                               DIRICHLET_CENTERS=(self._grid_data['CENTERS'][bi.dirichlet_boundaries(1)]
+                                                  if bi.has_dirichlet else None),
+                               RANGE_CELLS=np.arange(g.size(0)),
+                               RANGE_VOLUMES=self._grid_data['VOLS0'],
+                               DIVERGENCE=divergence_matrix(g))
+
+    def _get_dirichlet_values(self, mu):
+        if not self.boundary_info.has_dirichlet:
+            return None
+        elif hasattr(self, '_dirichlet_values'):
+            return self._dirichlet_values
+        elif self.dirichlet_data is not None:
+            return _parametric_dirichlet_values(self, self._grid_data['DIRICHLET_CENTERS'], mu)
+        else:
+            return np.zeros_like(self._grid_data['DIRICHLET_BOUNDARIES'])
 
     def apply(self, U, mu=None):
         assert U in self.source
@@ -280,169 +397,339 @@ class NonlinearAdvectionOperator(OperatorBase):
         if not hasattr(self, '_grid_data'):
             self._fetch_grid_data()
 
-        U = U.data
-        R = np.zeros((len(U), self.source.dim))
+        R = _apply_stencil(self.numerical_flux, self._grid_data, U.data, self._get_dirichlet_values(mu), mu)
+        return self.range.make_array(R)
 
-        bi = self.boundary_info
+    def jacobian(self, U, mu=None):
+        assert U in self.source and len(U) == 1
+        mu = self.parse_parameter(mu)
+
+        if not hasattr(self, '_grid_data'):
+            self._fetch_grid_data()
+
+        g = self.grid
         gd = self._grid_data
         SUPE = gd['SUPE']
         VOLS0 = gd['VOLS0']
-        VOLS1 = gd['VOLS1']
-        BOUNDARIES = gd['BOUNDARIES']
-        CENTERS = gd['CENTERS']
-        DIRICHLET_BOUNDARIES = gd['DIRICHLET_BOUNDARIES']
-        NEUMANN_BOUNDARIES = gd['NEUMANN_BOUNDARIES']
-        UNIT_OUTER_NORMALS = gd['UNIT_OUTER_NORMALS']
-
-        if bi.has_dirichlet:
-            if hasattr(self, '_dirichlet_values'):
-                dirichlet_values = self._dirichlet_values
-            elif self.dirichlet_data is not None:
-                dirichlet_values = self.dirichlet_data(CENTERS[DIRICHLET_BOUNDARIES], mu=mu)
-            else:
-                dirichlet_values = np.zeros_like(DIRICHLET_BOUNDARIES)
-            F_dirichlet = self.numerical_flux.evaluate_stage1(dirichlet_values, mu)
-
-        for i, j in enumerate(range(len(U))):
-            Ui = U[j]
-            Ri = R[i]
-
-            F = self.numerical_flux.evaluate_stage1(Ui, mu)
-            F_edge = [f[SUPE] for f in F]
-
-            for f in F_edge:
-                f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
-            if bi.has_dirichlet:
-                for f, f_d in zip(F_edge, F_dirichlet):
-                    f[DIRICHLET_BOUNDARIES, 1] = f_d
 
-            NUM_FLUX = self.numerical_flux.evaluate_stage2(F_edge, UNIT_OUTER_NORMALS, VOLS1, mu)
+        D_NUM_FLUX_0, D_NUM_FLUX_1 = _stencil_flux_derivatives(self.numerical_flux, gd, U.data.ravel(),
+                                                               self._get_dirichlet_values(mu), mu,
+                                                               self.solver_options)
+        dofs = _edge_dofs(g)
 
-            if bi.has_neumann:
-                NUM_FLUX[NEUMANN_BOUNDARIES] = 0
+        def local_matrices(s):
+            # the flux over edge e leaves cell SUPE[e, 0] and enters cell SUPE[e, 1]
+            A = np.empty((s.stop - s.start, 2, 2))
+            A[:, 0, 0] = D_NUM_FLUX_0[s]
+            A[:, 0, 1] = D_NUM_FLUX_1[s]
+            A[:, 1, 0] = -D_NUM_FLUX_0[s]
+            A[:, 1, 1] = -D_NUM_FLUX_1[s]
+            A[SUPE[s, 1] < 0, 1, :] = 0
+            A /= VOLS0[dofs[s]][:, :, np.newaxis]
+            return A
 
-            iadd_masked(Ri, NUM_FLUX, SUPE[:, 0])
-            isub_masked(Ri, NUM_FLUX, SUPE[:, 1])
+        A = assemble_csc(g, local_matrices, g.size(1), 'fv_edges', lambda: dofs, size=g.size(0))
 
-        R /= VOLS0
+        return NumpyMatrixOperator(A, source_id=self.source.id, range_id=self.range.id)
 
-        return self.range.make_array(R)
+    def jacobian_diagonal(self, U, mu=None):
+        """Diagonal of the :meth:`jacobian` at `U`, computed without assembling the Jacobian.
 
-    def jacobian(self, U, mu=None):
+        Used by :func:`~pymor.algorithms.timestepping.explicit_ssp_runge_kutta` to
+        determine CFL-conforming time step sizes.
+        """
         assert U in self.source and len(U) == 1
         mu = self.parse_parameter(mu)
 
         if not hasattr(self, '_grid_data'):
             self._fetch_grid_data()
 
-        U = U.data.ravel()
-
-        g = self.grid
-        bi = self.boundary_info
         gd = self._grid_data
         SUPE = gd['SUPE']
-        VOLS0 = gd['VOLS0']
-        VOLS1 = gd['VOLS1']
-        BOUNDARIES = gd['BOUNDARIES']
-        CENTERS = gd['CENTERS']
-        DIRICHLET_BOUNDARIES = gd['DIRICHLET_BOUNDARIES']
-        NEUMANN_BOUNDARIES = gd['NEUMANN_BOUNDARIES']
-        UNIT_OUTER_NORMALS = gd['UNIT_OUTER_NORMALS']
-        INNER = np.setdiff1d(np.arange(g.size(1)), BOUNDARIES)
-
-        solver_options = self.solver_options
+        num_cells = len(gd['VOLS0'])
+
+        D_NUM_FLUX_0, D_NUM_FLUX_1 = _stencil_flux_derivatives(self.numerical_flux, gd, U.data.ravel(),
+                                                               self._get_dirichlet_values(mu), mu,
+                                                               self.solver_options)
+        # D_NUM_FLUX_1 vanishes at boundary edges, where SUPE[:, 1] is negative
+        INNER = SUPE[:, 1] >= 0
+        D = np.bincount(SUPE[:, 0], weights=D_NUM_FLUX_0, minlength=num_cells)
+        D -= np.bincount(SUPE[INNER, 1], weights=D_NUM_FLUX_1[INNER], minlength=num_cells)
+        D /= gd['VOLS0']
+        return D
+
+
+class RestrictedNonlinearAdvectionOperator(OperatorBase):
+    """Restriction of a :class:`NonlinearAdvectionOperator` to a set of DOFs.
+
+    Instead of a |Grid| and a |BoundaryInfo|, this operator only stores flat
+    arrays describing the edges adjacent to the selected DOFs (a 'stencil'),
+    so that its evaluation only costs a few vectorized |NumPy| operations
+    on arrays whose size is proportional to the number of DOFs. Instances
+    are usually created by :meth:`NonlinearAdvectionOperator.restricted`.
+
+    Parameters
+    ----------
+    numerical_flux
+        The :class:`NumericalConvectiveFlux <NumericalConvectiveFluxInterface>` to use.
+    stencil
+        Dict with the following |NumPy arrays|, where edge indices refer to the
+        edges of the stencil and cell indices refer to the DOFs of the source
+        space:
+
+        :SUPE:                 cells on both sides of each edge (`-1` outside the domain).
+        :UNIT_OUTER_NORMALS:   unit normals of the edges pointing away from `SUPE[:, 0]`.
+        :VOLS1:                volumes of the edges.
+        :BOUNDARIES:           boundary edges.
+        :DIRICHLET_BOUNDARIES: Dirichlet boundary edges or `None`.
+        :DIRICHLET_CENTERS:    centers of the Dirichlet boundary edges or `None`.
+        :NEUMANN_BOUNDARIES:   Neumann boundary edges or `None`.
+        :RANGE_CELLS:          the cell corresponding to each DOF of the range.
+        :RANGE_VOLUMES:        volumes of the cells in `RANGE_CELLS`.
+    dirichlet_data
+        |Function| providing the Dirichlet boundary values. If `None`, constant-zero
+        boundary is assumed.
+    name
+        The name of the operator.
+    """
+
+    sid_ignore = OperatorBase.sid_ignore | {'_grid_data', '_last_dirichlet_values'}
+
+    linear = False
+
+    def __init__(self, numerical_flux, stencil, dirichlet_data=None, solver_options=None, name=None):
+        assert dirichlet_data is None or isinstance(dirichlet_data, FunctionInterface)
+        self.numerical_flux = numerical_flux
+        self.stencil = stencil
+        self.dirichlet_data = dirichlet_data
+        self.solver_options = solver_options
+        self.name = name
+        self.build_parameter_type(numerical_flux, dirichlet_data)
+        self.source = NumpyVectorSpace(int(stencil['SUPE'].max()) + 1 if len(stencil['SUPE']) else 0)
+        self.range = NumpyVectorSpace(len(stencil['RANGE_CELLS']))
+        if (stencil['DIRICHLET_BOUNDARIES'] is not None and dirichlet_data is not None
+                and not dirichlet_data.parametric):
+            self._dirichlet_values = dirichlet_data(stencil['DIRICHLET_CENTERS']).ravel()
+
+    def restricted(self, dofs):
+        stencil, source_dofs = _restrict_stencil(self.stencil, dofs)
+        return self.with_(stencil=stencil), source_dofs
+
+    def _get_dirichlet_values(self, mu):
+        if self.stencil['DIRICHLET_BOUNDARIES'] is None:
+            return None
+        elif hasattr(self, '_dirichlet_values'):
+            return self._dirichlet_values
+        elif self.dirichlet_data is not None:
+            return _parametric_dirichlet_values(self, self.stencil['DIRICHLET_CENTERS'], mu)
+        else:
+            return np.zeros_like(self.stencil['DIRICHLET_BOUNDARIES'])
+
+    def _get_grid_data(self):
+        gd = getattr(self, '_grid_data', None)
+        if gd is None:
+            gd = self._grid_data = dict(self.stencil, DIVERGENCE=_stencil_divergence(self.stencil, self.source.dim))
+        return gd
+
+    def apply(self, U, mu=None):
+        assert U in self.source
+        mu = self.parse_parameter(mu)
+        R = _apply_stencil(self.numerical_flux, self._get_grid_data(), U.data, self._get_dirichlet_values(mu), mu)
+        return self.range.make_array(R)
+
+    def jacobian(self, U, mu=None):
+        assert U in self.source and len(U) == 1
+        mu = self.parse_parameter(mu)
+        gd = self._get_grid_data()
+        SUPE = gd['SUPE']
+        D_NUM_FLUX_0, D_NUM_FLUX_1 = _stencil_flux_derivatives(self.numerical_flux, gd, U.data.ravel(),
+                                                               self._get_dirichlet_values(mu), mu,
+                                                               self.solver_options)
+        # derivatives of the edge fluxes w.r.t. the source DOFs
+        inner = np.nonzero(SUPE[:, 1] >= 0)[0]
+        D = coo_matrix((np.hstack([D_NUM_FLUX_0, D_NUM_FLUX_1[inner]]),
+                        (np.hstack([np.arange(len(SUPE)), inner]), np.hstack([SUPE[:, 0], SUPE[inner, 1]]))),
+                       shape=(len(SUPE), self.source.dim)).tocsr()
+        return NumpyMatrixOperator(gd['DIVERGENCE'].dot(D).tocsc(), source_id=self.source.id, range_id=self.range.id)
+
+
+def _parametric_dirichlet_values(op, centers, mu):
+    # the values for the last parameter are kept, so that they are not recomputed
+    # in each step of a time-stepping scheme where only the time changes
+    mu = op.dirichlet_data.strip_parameter(mu)
+    last = getattr(op, '_last_dirichlet_values', None)
+    if last is None or last[0] != mu:
+        last = op._last_dirichlet_values = (mu, op.dirichlet_data(centers, mu=mu))
+    return last[1]
+
+
+def _restrict_stencil(stencil, dofs):
+    """Compute the stencil of the edges adjacent to the range DOFs `dofs`."""
+    SUPE = stencil['SUPE']
+    cells = stencil['RANGE_CELLS'][dofs]
+    cell_mask = np.zeros(SUPE.max() + 2, dtype=bool)  # last entry for SUPE == -1
+    cell_mask[cells] = True
+    edges = np.nonzero(cell_mask[SUPE[:, 0]] | cell_mask[SUPE[:, 1]])[0]
+
+    SUPE = SUPE[edges]
+    source_dofs = np.unique(SUPE[SUPE >= 0])
+    SUPE = np.where(SUPE >= 0, np.searchsorted(source_dofs, SUPE), -1)
+
+    edge_positions = np.full(len(stencil['SUPE']), -1)
+    edge_positions[edges] = np.arange(len(edges))
+
+    def restrict_edges(E):
+        if E is None:
+            return None, None
+        positions = edge_positions[E]
+        selected = np.nonzero(positions >= 0)[0]
+        return positions[selected], selected
+
+    BOUNDARIES, _ = restrict_edges(stencil['BOUNDARIES'])
+    NEUMANN_BOUNDARIES, _ = restrict_edges(stencil['NEUMANN_BOUNDARIES'])
+    DIRICHLET_BOUNDARIES, selected = restrict_edges(stencil['DIRICHLET_BOUNDARIES'])
+    DIRICHLET_CENTERS = None if selected is None else stencil['DIRICHLET_CENTERS'][selected]
+
+    restricted_stencil = dict(SUPE=SUPE,
+                              UNIT_OUTER_NORMALS=stencil['UNIT_OUTER_NORMALS'][edges],
+                              VOLS1=stencil['VOLS1'][edges],
+                              BOUNDARIES=BOUNDARIES,
+                              DIRICHLET_BOUNDARIES=DIRICHLET_BOUNDARIES,
+                              DIRICHLET_CENTERS=DIRICHLET_CENTERS,
+                              NEUMANN_BOUNDARIES=NEUMANN_BOUNDARIES,
+                              RANGE_CELLS=np.searchsorted(source_dofs, cells),
+                              RANGE_VOLUMES=stencil['RANGE_VOLUMES'][dofs])
+    return restricted_stencil, source_dofs
+
+
+def _stencil_divergence(stencil, num_cells):
+    """Volume-scaled incidence matrix mapping the edge fluxes of a stencil to its range DOFs."""
+    range_cells = stencil['RANGE_CELLS']
+    D = _incidence_matrix(stencil['SUPE'], num_cells)[range_cells]
+    return dia_matrix(([1. / stencil['RANGE_VOLUMES']], [0]), shape=(len(range_cells),) * 2) * D
+
+
+def _apply_stencil(numerical_flux, gd, U, dirichlet_values, mu):
+    """Evaluate the divergence of the numerical fluxes for each row of the |NumPy array| `U`."""
+    SUPE = gd['SUPE']
+    VOLS1 = gd['VOLS1']
+    BOUNDARIES = gd['BOUNDARIES']
+    DIRICHLET_BOUNDARIES = gd['DIRICHLET_BOUNDARIES']
+    NEUMANN_BOUNDARIES = gd['NEUMANN_BOUNDARIES']
+    UNIT_OUTER_NORMALS = gd['UNIT_OUTER_NORMALS']
+    DIVERGENCE = gd['DIVERGENCE']
+
+    R = np.zeros((len(U), DIVERGENCE.shape[0]))
+
+    if dirichlet_values is not None:
+        F_dirichlet = numerical_flux.evaluate_stage1(dirichlet_values, mu)
+
+    # all vectors of a chunk are processed at once by treating them as the values
+    # of a single vector on len(chunk) disjoint copies of the grid
+    num_edges = len(SUPE)
+    chunk_size = max(apply_options()['max_edge_values'] // max(num_edges, 1), 1)
+    for s in chunk_slices(len(U), chunk_size):
+        Ui = U[s]
+        k = len(Ui)
+
+        F = numerical_flux.evaluate_stage1(Ui.ravel(), mu)
+        F_edge = [f.reshape(Ui.shape + f.shape[1:])[:, SUPE] for f in F]
+
+        for f in F_edge:
+            f[:, BOUNDARIES, 1] = f[:, BOUNDARIES, 0]
+        if dirichlet_values is not None:
+            for f, f_d in zip(F_edge, F_dirichlet):
+                f[:, DIRICHLET_BOUNDARIES, 1] = f_d
+        F_edge = [f.reshape((k * num_edges,) + f.shape[2:]) for f in F_edge]
+
+        NUM_FLUX = numerical_flux.evaluate_stage2(F_edge, np.tile(UNIT_OUTER_NORMALS, (k, 1)),
+                                                  np.tile(VOLS1, k), mu)
+        NUM_FLUX = NUM_FLUX.reshape((k, num_edges))
+
+        if NEUMANN_BOUNDARIES is not None:
+            NUM_FLUX[:, NEUMANN_BOUNDARIES] = 0
+
+        R[s] = DIVERGENCE.dot(NUM_FLUX.T).T
+
+    return R
+
+
+def _stencil_flux_derivatives(numerical_flux, gd, U, dirichlet_values, mu, solver_options):
+    """Derivatives of the numerical fluxes w.r.t. the values in the cells on both sides of each edge.
+
+    The derivatives w.r.t. the outer values are zero at boundary edges. At non-Dirichlet
+    boundary edges, where the outer value is a copy of the inner value, the derivatives
+    w.r.t. the inner values contain the derivatives w.r.t. both values.
+    """
+    try:
+        D_NUM_FLUX_0, D_NUM_FLUX_1 = _exact_flux_derivatives(numerical_flux, gd, U, dirichlet_values, mu)
+    except NotImplementedError:
         delta = solver_options.get('jacobian_delta') if solver_options else None
         if delta is None:
             delta = jacobian_options()['delta']
-
-        if bi.has_dirichlet:
-            if hasattr(self, '_dirichlet_values'):
-                dirichlet_values = self._dirichlet_values
-            elif self.dirichlet_data is not None:
-                dirichlet_values = self.dirichlet_data(CENTERS[DIRICHLET_BOUNDARIES], mu=mu)
-            else:
-                dirichlet_values = np.zeros_like(DIRICHLET_BOUNDARIES)
-            F_dirichlet = self.numerical_flux.evaluate_stage1(dirichlet_values, mu)
-
-        UP = U + delta
-        UM = U - delta
-        F = self.numerical_flux.evaluate_stage1(U, mu)
-        FP = self.numerical_flux.evaluate_stage1(UP, mu)
-        FM = self.numerical_flux.evaluate_stage1(UM, mu)
-        del UP, UM
-
-        F_edge = [f[SUPE] for f in F]
-        FP_edge = [f[SUPE] for f in FP]
-        FM_edge = [f[SUPE] for f in FM]
-        del F, FP, FM
-
-        F0P_edge = [f.copy() for f in F_edge]
-        for f, ff in zip(F0P_edge, FP_edge):
-            f[:, 0] = ff[:, 0]
-            f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
-        if bi.has_dirichlet:
-            for f, f_d in zip(F0P_edge, F_dirichlet):
-                f[DIRICHLET_BOUNDARIES, 1] = f_d
-        NUM_FLUX_0P = self.numerical_flux.evaluate_stage2(F0P_edge, UNIT_OUTER_NORMALS, VOLS1, mu)
-        del F0P_edge
-
-        F0M_edge = [f.copy() for f in F_edge]
-        for f, ff in zip(F0M_edge, FM_edge):
-            f[:, 0] = ff[:, 0]
-            f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
-        if bi.has_dirichlet:
-            for f, f_d in zip(F0M_edge, F_dirichlet):
-                f[DIRICHLET_BOUNDARIES, 1] = f_d
-        NUM_FLUX_0M = self.numerical_flux.evaluate_stage2(F0M_edge, UNIT_OUTER_NORMALS, VOLS1, mu)
-        del F0M_edge
-
-        D_NUM_FLUX_0 = (NUM_FLUX_0P - NUM_FLUX_0M)
-        D_NUM_FLUX_0 /= (2 * delta)
-        if bi.has_neumann:
-            D_NUM_FLUX_0[NEUMANN_BOUNDARIES] = 0
-        del NUM_FLUX_0P, NUM_FLUX_0M
-
-        F1P_edge = [f.copy() for f in F_edge]
-        for f, ff in zip(F1P_edge, FP_edge):
-            f[:, 1] = ff[:, 1]
-            f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
-        if bi.has_dirichlet:
-            for f, f_d in zip(F1P_edge, F_dirichlet):
-                f[DIRICHLET_BOUNDARIES, 1] = f_d
-        NUM_FLUX_1P = self.numerical_flux.evaluate_stage2(F1P_edge, UNIT_OUTER_NORMALS, VOLS1, mu)
-        del F1P_edge, FP_edge
-
-        F1M_edge = F_edge
-        for f, ff in zip(F1M_edge, FM_edge):
-            f[:, 1] = ff[:, 1]
-            f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
-        if bi.has_dirichlet:
-            for f, f_d in zip(F1M_edge, F_dirichlet):
-                f[DIRICHLET_BOUNDARIES, 1] = f_d
-        NUM_FLUX_1M = self.numerical_flux.evaluate_stage2(F1M_edge, UNIT_OUTER_NORMALS, VOLS1, mu)
-        del F1M_edge, FM_edge
-        D_NUM_FLUX_1 = (NUM_FLUX_1P - NUM_FLUX_1M)
-        D_NUM_FLUX_1 /= (2 * delta)
-        if bi.has_neumann:
-            D_NUM_FLUX_1[NEUMANN_BOUNDARIES] = 0
-        del NUM_FLUX_1P, NUM_FLUX_1M
-
-        I1 = np.hstack([SUPE[INNER, 0], SUPE[INNER, 0], SUPE[INNER, 1], SUPE[INNER, 1], SUPE[BOUNDARIES, 0]])
-        I0 = np.hstack([SUPE[INNER, 0], SUPE[INNER, 1], SUPE[INNER, 0], SUPE[INNER, 1], SUPE[BOUNDARIES, 0]])
-        V = np.hstack([D_NUM_FLUX_0[INNER], -D_NUM_FLUX_0[INNER], D_NUM_FLUX_1[INNER], -D_NUM_FLUX_1[INNER],
-                       D_NUM_FLUX_0[BOUNDARIES]])
-
-        A = coo_matrix((V, (I0, I1)), shape=(g.size(0), g.size(0)))
-        A = csc_matrix(A).copy()   # See pymor.operators.cg.DiffusionOperatorP1 for why copy() is necessary
-        A = dia_matrix(([1. / VOLS0], [0]), shape=(g.size(0),) * 2) * A
-
-        return NumpyMatrixOperator(A, source_id=self.source.id, range_id=self.range.id)
+        D_NUM_FLUX_0, D_NUM_FLUX_1 = _flux_difference_quotients(numerical_flux, gd, U, dirichlet_values, mu, delta)
+    NEUMANN_BOUNDARIES = gd['NEUMANN_BOUNDARIES']
+    if NEUMANN_BOUNDARIES is not None:
+        D_NUM_FLUX_0[NEUMANN_BOUNDARIES] = 0
+        D_NUM_FLUX_1[NEUMANN_BOUNDARIES] = 0
+    D_NUM_FLUX_1[gd['BOUNDARIES']] = 0
+    return D_NUM_FLUX_0, D_NUM_FLUX_1
+
+
+def _exact_flux_derivatives(numerical_flux, gd, U, dirichlet_values, mu):
+    BOUNDARIES = gd['BOUNDARIES']
+    DIRICHLET_BOUNDARIES = gd['DIRICHLET_BOUNDARIES']
+
+    U_edge = U[gd['SUPE']]
+    U_edge[BOUNDARIES, 1] = U_edge[BOUNDARIES, 0]
+    if dirichlet_values is not None:
+        U_edge[DIRICHLET_BOUNDARIES, 1] = dirichlet_values
+    D_NUM_FLUX_0, D_NUM_FLUX_1 = numerical_flux.evaluate_derivatives(U_edge, gd['UNIT_OUTER_NORMALS'],
+                                                                     gd['VOLS1'], mu)
+
+    # at non-Dirichlet boundary edges, the outer value is a copy of the inner value
+    OUTFLOW_BOUNDARIES = (BOUNDARIES if dirichlet_values is None else
+                          np.setdiff1d(BOUNDARIES, DIRICHLET_BOUNDARIES, assume_unique=True))
+    D_NUM_FLUX_0[OUTFLOW_BOUNDARIES] += D_NUM_FLUX_1[OUTFLOW_BOUNDARIES]
+    return D_NUM_FLUX_0, D_NUM_FLUX_1
+
+
+def _flux_difference_quotients(numerical_flux, gd, U, dirichlet_values, mu, delta):
+    # central difference quotients of the numerical flux for fluxes not providing their derivatives
+    SUPE = gd['SUPE']
+    VOLS1 = gd['VOLS1']
+    BOUNDARIES = gd['BOUNDARIES']
+    DIRICHLET_BOUNDARIES = gd['DIRICHLET_BOUNDARIES']
+    UNIT_OUTER_NORMALS = gd['UNIT_OUTER_NORMALS']
+
+    if dirichlet_values is not None:
+        F_dirichlet = numerical_flux.evaluate_stage1(dirichlet_values, mu)
+
+    F_edge = [f[SUPE] for f in numerical_flux.evaluate_stage1(U, mu)]
+    derivatives = []
+    for side in (0, 1):
+        NUM_FLUXES = []
+        for UD in (U + delta, U - delta):
+            FD_edge = [f.copy() for f in F_edge]
+            for f, ff in zip(FD_edge, numerical_flux.evaluate_stage1(UD, mu)):
+                f[:, side] = ff[SUPE[:, side]]
+                f[BOUNDARIES, 1] = f[BOUNDARIES, 0]
+            if dirichlet_values is not None:
+                for f, f_d in zip(FD_edge, F_dirichlet):
+                    f[DIRICHLET_BOUNDARIES, 1] = f_d
+            NUM_FLUXES.append(numerical_flux.evaluate_stage2(FD_edge, UNIT_OUTER_NORMALS, VOLS1, mu))
+            del FD_edge
+        D_NUM_FLUX = NUM_FLUXES[0] - NUM_FLUXES[1]
+        D_NUM_FLUX /= (2 * delta)
+        derivatives.append(D_NUM_FLUX)
+    return tuple(derivatives)
 
 
 def nonlinear_advection_lax_friedrichs_operator(grid, boundary_info, flux, lxf_lambda=1.0,
-                                                dirichlet_data=None, solver_options=None, name=None):
+                                                dirichlet_data=None, solver_options=None, name=None,
+                                                flux_derivative=None):
     """Instantiate a :class:`NonlinearAdvectionOperator` using :class:`LaxFriedrichsFlux`."""
-    num_flux = LaxFriedrichsFlux(flux, lxf_lambda)
+    num_flux = LaxFriedrichsFlux(flux, lxf_lambda, flux_derivative=flux_derivative)
     return NonlinearAdvectionOperator(grid, boundary_info, num_flux, dirichlet_data, solver_options, name=name)
 
 
@@ -494,44 +781,66 @@ class LinearAdvectionLaxFriedrichs(NumpyMatrixBasedOperator):
         self.source = self.range = FVVectorSpace(grid)
 
     def _assemble(self, mu=None):
+        g = self.grid
+        local_matrices = self._local_matrices([mu])
+        return assemble_csc(g, lambda s: local_matrices(s)[0], g.size(1), 'fv_edges', lambda: _edge_dofs(g),
+                            size=g.size(0))
+
+    def assemble_data(self, mus):
+        """Assemble the operator's matrix for a batch of |Parameters| in a single pass.
+
+        Parameters
+        ----------
+        mus
+            List of |Parameters| for which to assemble the matrix.
+
+        Returns
+        -------
+        See :func:`~pymor.operators.assembly.assemble_csc_data`. `data[i]` is the
+        `data` array of the matrix of `self.assemble(mus[i])`.
+        """
+        return _assemble_edge_data(self, mus)
+
+    def _local_matrices(self, mus):
         g = self.grid
         bi = self.boundary_info
         SUPE = g.superentities(1, 0)
         SUPI = g.superentity_indices(1, 0)
         assert SUPE.ndim == 2
         edge_volumes = g.volumes(1)
-        boundary_edges = g.boundaries(1)
-        inner_edges = np.setdiff1d(np.arange(g.size(1)), boundary_edges)
-        dirichlet_edges = bi.dirichlet_boundaries(1) if bi.has_dirichlet else np.array([], ndmin=1, dtype=np.int)
-        neumann_edges = bi.neumann_boundaries(1) if bi.has_neumann else np.array([], ndmin=1, dtype=np.int)
-        outflow_edges = np.setdiff1d(boundary_edges, np.hstack([dirichlet_edges, neumann_edges]))
-        normal_velocities = np.einsum('ei,ei->e',
-                                      self.velocity_field(g.centers(1), mu=mu),
-                                      g.unit_outer_normals()[SUPE[:, 0], SUPI[:, 0]])
-
-        nv_inner = normal_velocities[inner_edges]
-        l_inner = np.ones_like(nv_inner) * (1. / self.lxf_lambda)
-        I0_inner = np.hstack([SUPE[inner_edges, 0], SUPE[inner_edges, 0], SUPE[inner_edges, 1], SUPE[inner_edges, 1]])
-        I1_inner = np.hstack([SUPE[inner_edges, 0], SUPE[inner_edges, 1], SUPE[inner_edges, 0], SUPE[inner_edges, 1]])
-        V_inner = np.hstack([nv_inner, nv_inner, -nv_inner, -nv_inner])
-        V_inner += np.hstack([l_inner, -l_inner, -l_inner, l_inner])
-        V_inner *= np.tile(0.5 * edge_volumes[inner_edges], 4)
-
-        I_out = SUPE[outflow_edges, 0]
-        V_out = edge_volumes[outflow_edges] * normal_velocities[outflow_edges]
-
-        I_dir = SUPE[dirichlet_edges, 0]
-        V_dir = edge_volumes[dirichlet_edges] * (0.5 * normal_velocities[dirichlet_edges] + 0.5 / self.lxf_lambda)
-
-        I0 = np.hstack([I0_inner, I_out, I_dir])
-        I1 = np.hstack([I1_inner, I_out, I_dir])
-        V = np.hstack([V_inner, V_out, V_dir])
-
-        A = coo_matrix((V, (I0, I1)), shape=(g.size(0), g.size(0)))
-        A = csc_matrix(A).copy()   # See pymor.operators.cg.DiffusionOperatorP1 for why copy() is necessary
-        A = dia_matrix(([1. / g.volumes(0)], [0]), shape=(g.size(0),) * 2) * A
-
-        return A
+        boundary_mask = g.boundary_mask(1)
+        dirichlet_mask = bi.dirichlet_mask(1) if bi.has_dirichlet else np.zeros_like(boundary_mask)
+        neumann_mask = bi.neumann_mask(1) if bi.has_neumann else np.zeros_like(boundary_mask)
+        outflow_mask = boundary_mask & ~dirichlet_mask & ~neumann_mask
+        edge_centers = g.centers(1)
+        outer_normals = g.unit_outer_normals()
+        cell_volumes = g.volumes(0)
+        dofs = _edge_dofs(g)
+        lxf = 1. / self.lxf_lambda
+        velocity_field = self.velocity_field
+
+        def local_matrices(s):
+            # local 2x2 matrices coupling the cells on both sides of each edge, for each parameter
+            normals = outer_normals[SUPE[s, 0], SUPI[s, 0]]
+            if velocity_field.parametric:
+                nv = np.array([np.einsum('ei,ei->e', velocity_field(edge_centers[s], mu=mu), normals) for mu in mus])
+            else:
+                nv = np.einsum('ei,ei->e', velocity_field(edge_centers[s]), normals)[np.newaxis, :]
+            inner = ~boundary_mask[s]
+            outflow = outflow_mask[s]
+            dirichlet = dirichlet_mask[s]
+            A = np.zeros((len(mus), nv.shape[1], 2, 2))
+            A[:, :, 0, 0] = np.where(inner, 0.5 * (nv + lxf), 0.)
+            A[:, :, 0, 1] = np.where(inner, 0.5 * (nv - lxf), 0.)
+            A[:, :, 1, 0] = np.where(inner, 0.5 * (-nv - lxf), 0.)
+            A[:, :, 1, 1] = np.where(inner, 0.5 * (-nv + lxf), 0.)
+            A[:, outflow, 0, 0] = nv[:, outflow]
+            A[:, dirichlet, 0, 0] = 0.5 * nv[:, dirichlet] + 0.5 * lxf
+            A *= edge_volumes[s, np.newaxis, np.newaxis]
+            A /= cell_volumes[dofs[s]][:, :, np.newaxis]
+            return A
+
+        return local_matrices
 
 
 class L2Product(NumpyMatrixBasedOperator):
@@ -560,6 +869,46 @@ class L2Product(NumpyMatrixBasedOperator):
         return A
 
 
+class ProlongationOperator(NumpyMatrixBasedOperator):
+    """Transfer of finite volume functions onto another grid.
+
+    The value of the resulting function on a codim-0 entity of `range_grid` is
+    the value of the given function on the codim-0 entity of `source_grid`
+    containing its center. The centers are located using
+    :meth:`~pymor.grids.interfaces.AffineGridInterface.locate`. The values on
+    entities whose centers lie outside of `source_grid` are set to zero.
+
+    For nested grids (e.g. a grid and its refinement), the operator is the natural
+    embedding of the coarse space into the fine space.
+
+    Parameters
+    ----------
+    source_grid
+        The |Grid| of the source space.
+    range_grid
+        The |Grid| of the range space.
+    name
+        The name of the operator.
+    """
+
+    sparse = True
+    linear = True
+
+    def __init__(self, source_grid, range_grid, name=None):
+        assert range_grid.dim == source_grid.dim
+        self.source = FVVectorSpace(source_grid)
+        self.range = FVVectorSpace(range_grid)
+        self.source_grid = source_grid
+        self.range_grid = range_grid
+        self.name = name
+
+    def _assemble(self, mu=None):
+        E, _ = self.source_grid.locate(self.range_grid.centers(0))
+        found = np.flatnonzero(E >= 0)
+        return csc_matrix((np.ones(len(found)), (found, E[found])),
+                          shape=(self.range_grid.size(0), self.source_grid.size(0)))
+
+
 class ReactionOperator(NumpyMatrixBasedOperator):
     """Finite Volume reaction |Operator|.
 
@@ -721,9 +1070,10 @@ class L2ProductFunctional(NumpyMatrixBasedOperator):
                 neumann_mask = bi.neumann_mask(1)
                 FLUXES[neumann_mask] -= VOLS[neumann_mask] * self.neumann_data(centers[neumann_mask], mu=mu)
 
-            F_INTS += np.bincount(SE_I0, weights=FLUXES, minlength=len(F_INTS))
-
-        F_INTS /= g.volumes(0)
+            F_INTS /= g.volumes(0)
+            F_INTS += divergence_matrix(g).dot(FLUXES)
+        else:
+            F_INTS /= g.volumes(0)
 
         return F_INTS.reshape((1, -1))
 
@@ -771,6 +1121,27 @@ class DiffusionOperator(NumpyMatrixBasedOperator):
 
     def _assemble(self, mu=None):
         grid = self.grid
+        local_matrices = self._local_matrices([mu])
+        return assemble_csc(grid, lambda s: local_matrices(s)[0], grid.size(1), 'fv_edges',
+                            lambda: _edge_dofs(grid), size=grid.size(0))
+
+    def assemble_data(self, mus):
+        """Assemble the operator's matrix for a batch of |Parameters| in a single pass.
+
+        Parameters
+        ----------
+        mus
+            List of |Parameters| for which to assemble the matrix.
+
+        Returns
+        -------
+        See :func:`~pymor.operators.assembly.assemble_csc_data`. `data[i]` is the
+        `data` array of the matrix of `self.assemble(mus[i])`.
+        """
+        return _assemble_edge_data(self, mus)
+
+    def _local_matrices(self, mus):
+        grid = self.grid
 
         # compute the local coordinates of the codim-1 subentity centers in the reference element
         reference_element = grid.reference_element(0)
@@ -779,65 +1150,82 @@ class DiffusionOperator(NumpyMatrixBasedOperator):
                                        subentity_embedding[0], reference_element.sub_reference_element(1).center())
                              + subentity_embedding[1])
 
-        # compute shift for periodic boundaries
         embeddings = grid.embeddings(0)
         superentities = grid.superentities(1, 0)
         superentity_indices = grid.superentity_indices(1, 0)
         boundary_mask = grid.boundary_mask(1)
-        inner_mask = ~boundary_mask
-        SE_I0 = superentities[:, 0]
-        SE_I1 = superentities[:, 1]
-        SE_I0_I = SE_I0[inner_mask]
-        SE_I1_I = SE_I1[inner_mask]
-
-        SHIFTS = (np.einsum('eij,ej->ei',
-                            embeddings[0][SE_I0_I, :, :],
-                            subentity_centers[superentity_indices[:, 0][inner_mask]])
-                  + embeddings[1][SE_I0_I, :])
-        SHIFTS -= (np.einsum('eij,ej->ei',
-                             embeddings[0][SE_I1_I, :, :],
-                             subentity_centers[superentity_indices[:, 1][inner_mask]])
-                   + embeddings[1][SE_I1_I, :])
-
-        # comute distances for gradient approximations
+        dirichlet_mask = (self.boundary_info.dirichlet_mask(1) if self.boundary_info.has_dirichlet
+                          else np.zeros_like(boundary_mask))
         centers = grid.centers(1)
         orthogonal_centers = grid.orthogonal_centers()
+        outer_normals = grid.unit_outer_normals()
         VOLS = grid.volumes(1)
+        cell_volumes = grid.volumes(0)
+        dofs = _edge_dofs(grid)
+
+        def local_matrices(s):
+            inner_mask = ~boundary_mask[s]
+            SE_I0 = superentities[s, 0]
+            SE_I0_I = SE_I0[inner_mask]
+            SE_I1_I = superentities[s, 1][inner_mask]
+            SEI = superentity_indices[s]
+
+            # compute shift for periodic boundaries
+            SHIFTS = (np.einsum('eij,ej->ei',
+                                embeddings[0][SE_I0_I, :, :],
+                                subentity_centers[SEI[:, 0][inner_mask]])
+                      + embeddings[1][SE_I0_I, :])
+            SHIFTS -= (np.einsum('eij,ej->ei',
+                                 embeddings[0][SE_I1_I, :, :],
+                                 subentity_centers[SEI[:, 1][inner_mask]])
+                       + embeddings[1][SE_I1_I, :])
+
+            # comute distances for gradient approximations
+            INNER_DISTS = np.linalg.norm(orthogonal_centers[SE_I0_I, :] - orthogonal_centers[SE_I1_I, :] - SHIFTS,
+                                         axis=1)
+            del SHIFTS
+
+            FLUXES = np.zeros(len(SE_I0))
+            FLUXES[inner_mask] = VOLS[s][inner_mask] / INNER_DISTS
+            del INNER_DISTS
+
+            DIRICHLET_FLUXES = np.zeros(len(SE_I0))
+            dirichlet = dirichlet_mask[s]
+            if np.any(dirichlet):
+                SE_I0_D = SE_I0[dirichlet]
+                boundary_normals = outer_normals[SE_I0_D, SEI[:, 0][dirichlet]]
+                BOUNDARY_DISTS = np.sum((centers[s][dirichlet, :] - orthogonal_centers[SE_I0_D, :]) * boundary_normals,
+                                        axis=-1)
+                DIRICHLET_FLUXES[dirichlet] = VOLS[s][dirichlet] / BOUNDARY_DISTS
 
-        INNER_DISTS = np.linalg.norm(orthogonal_centers[SE_I0_I, :] - orthogonal_centers[SE_I1_I, :] - SHIFTS,
-                                     axis=1)
-        del SHIFTS
-
-        # assemble matrix
-        FLUXES = VOLS[inner_mask] / INNER_DISTS
-        if self.diffusion_function is not None:
-            FLUXES *= self.diffusion_function(centers[inner_mask], mu=mu)
-        if self.diffusion_constant is not None:
-            FLUXES *= self.diffusion_constant
-        del INNER_DISTS
-
-        FLUXES = np.concatenate((-FLUXES, -FLUXES, FLUXES, FLUXES))
-        FLUXES_I0 = np.concatenate((SE_I0_I, SE_I1_I, SE_I0_I, SE_I1_I))
-        FLUXES_I1 = np.concatenate((SE_I1_I, SE_I0_I, SE_I0_I, SE_I1_I))
-
-        if self.boundary_info.has_dirichlet:
-            dirichlet_mask = self.boundary_info.dirichlet_mask(1)
-            SE_I0_D = SE_I0[dirichlet_mask]
-            boundary_normals = grid.unit_outer_normals()[SE_I0_D, superentity_indices[:, 0][dirichlet_mask]]
-            BOUNDARY_DISTS = np.sum((centers[dirichlet_mask, :] - orthogonal_centers[SE_I0_D, :]) * boundary_normals,
-                                    axis=-1)
-
-            DIRICHLET_FLUXES = VOLS[dirichlet_mask] / BOUNDARY_DISTS
+            # the geometric fluxes are shared by all parameters
+            FLUXES = np.tile(FLUXES, (len(mus), 1))
+            DIRICHLET_FLUXES = np.tile(DIRICHLET_FLUXES, (len(mus), 1))
             if self.diffusion_function is not None:
-                DIRICHLET_FLUXES *= self.diffusion_function(centers[dirichlet_mask], mu=mu)
+                if self.diffusion_function.parametric:
+                    D = np.array([self.diffusion_function(centers[s], mu=mu) for mu in mus])
+                else:
+                    D = self.diffusion_function(centers[s])
+                FLUXES *= D
+                DIRICHLET_FLUXES *= D
             if self.diffusion_constant is not None:
+                FLUXES *= self.diffusion_constant
                 DIRICHLET_FLUXES *= self.diffusion_constant
 
-            FLUXES = np.concatenate((FLUXES, DIRICHLET_FLUXES))
-            FLUXES_I0 = np.concatenate((FLUXES_I0, SE_I0_D))
-            FLUXES_I1 = np.concatenate((FLUXES_I1, SE_I0_D))
+            # local 2x2 matrices coupling the cells on both sides of each edge
+            A = np.empty((len(mus), len(SE_I0), 2, 2))
+            A[:, :, 0, 0] = FLUXES + DIRICHLET_FLUXES
+            A[:, :, 0, 1] = -FLUXES
+            A[:, :, 1, 0] = -FLUXES
+            A[:, :, 1, 1] = FLUXES
+            A /= cell_volumes[dofs[s]][:, :, np.newaxis]
+            return A
 
-        A = coo_matrix((FLUXES, (FLUXES_I0, FLUXES_I1)), shape=(self.source.dim, self.source.dim))
-        A = (dia_matrix(([1. / grid.volumes(0)], [0]), shape=(grid.size(0),) * 2) * A).tocsc()
+        return local_matrices
 
-        return A
+
+def _assemble_edge_data(op, mus):
+    mus = [op.parse_parameter(mu) for mu in mus]
+    g = op.grid
+    return assemble_csc_data(g, op._local_matrices(mus), g.size(1), 'fv_edges', lambda: _edge_dofs(g),
+                             size=g.size(0), batch_size=len(mus))
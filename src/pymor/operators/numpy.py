@@ -12,12 +12,15 @@
     |NumPy arrays| as an |Operator|.
 """
 
+from collections import OrderedDict
 from functools import reduce
+import zlib
 
 import numpy as np
 import scipy.sparse
 from scipy.sparse import issparse
 from scipy.io import mmwrite, savemat
+from scipy.linalg.lapack import get_lapack_funcs
 
 from pymor.core.config import config
 from pymor.core.defaults import defaults
@@ -26,6 +29,7 @@ from pymor.core.interfaces import abstractmethod
 from pymor.core.logger import getLogger
 from pymor.operators.basic import OperatorBase
 from pymor.operators.constructions import IdentityOperator, ZeroOperator
+from pymor.tools.chunking import map_chunks
 from pymor.vectorarrays.numpy import NumpyVectorSpace
 
 
@@ -58,12 +62,33 @@ class NumpyGenericOperator(OperatorBase):
         Set to `True` if the provided `mapping` and `transpose_mapping` are linear.
     parameter_type
         The |ParameterType| of the |Parameters| the mapping accepts.
+    vectorized
+        If `True`, `mapping` and `transpose_mapping` act independently on each row
+        of the given 2D array, i.e. `mapping(U)[i]` only depends on `U[i]`. In this
+        case, large arrays may be processed in chunks of size `chunk_size`.
+        If `False`, the mappings only accept a single vector given as 1D array and
+        are called separately for each vector.
+    chunk_size
+        If not `None` and `vectorized` is `True`, evaluate the mappings on at most
+        `chunk_size` vectors at once in order to bound memory usage.
+    num_threads
+        Number of threads used for evaluating the chunks. If `None`, the
+        `num_threads` |default| of :func:`~pymor.tools.chunking.map_chunks` is used.
+    restricted_mapping
+        If not `None`, a function `restricted_mapping(dofs)` returning a tuple
+        `(mapping, source_dofs)`, where `mapping` has the same signature as the
+        operator's `mapping` and evaluates the components `dofs` of the operator's
+        `mapping` given the components `source_dofs` of its argument. Used to
+        implement :meth:`~pymor.operators.interfaces.OperatorInterface.restricted`
+        (e.g. for empirical interpolation).
     name
         Name of the operator.
     """
 
     def __init__(self, mapping, transpose_mapping=None, dim_source=1, dim_range=1, linear=False, parameter_type=None,
-                 source_id=None, range_id=None, solver_options=None, name=None):
+                 source_id=None, range_id=None, solver_options=None, name=None,
+                 vectorized=True, chunk_size=None, num_threads=None, restricted_mapping=None):
+        assert chunk_size is None or chunk_size > 0
         self.source = NumpyVectorSpace(dim_source, source_id)
         self.range = NumpyVectorSpace(dim_range, range_id)
         self.solver_options = solver_options
@@ -75,25 +100,42 @@ class NumpyGenericOperator(OperatorBase):
             self.build_parameter_type(parameter_type)
         self.source_id = source_id  # needed for with_
         self.range_id = range_id
+        self.vectorized = vectorized
+        self.chunk_size = chunk_size
+        self.num_threads = num_threads
+        self.restricted_mapping = restricted_mapping
+
+    def _evaluate(self, mapping, U, dim, mu):
+        kwargs = {'mu': mu} if self.parametric else {}
+        if not self.vectorized:
+            return np.array([mapping(u, **kwargs) for u in U]).reshape((len(U), dim))
+        if self.chunk_size is None or len(U) <= self.chunk_size:
+            return mapping(U, **kwargs)
+        return np.vstack(map_chunks(lambda s: mapping(U[s], **kwargs), len(U), self.chunk_size,
+                                    num_threads=self.num_threads))
 
     def apply(self, U, mu=None):
         assert U in self.source
-        if self.parametric:
-            mu = self.parse_parameter(mu)
-            return self.range.make_array(self._mapping(U.data, mu=mu))
-        else:
-            return self.range.make_array(self._mapping(U.data))
+        mu = self.parse_parameter(mu) if self.parametric else None
+        return self.range.make_array(self._evaluate(self._mapping, U.data, self.range.dim, mu))
 
     def apply_transpose(self, V, mu=None):
         if self._transpose_mapping is None:
             raise ValueError('NumpyGenericOperator: transpose mapping was not defined.')
         assert V in self.range
-        V = V.data
-        if self.parametric:
-            mu = self.parse_parameter(mu)
-            return self.source.make_array(self._transpose_mapping(V, mu=mu))
-        else:
-            return self.source.make_array(self._transpose_mapping(V))
+        mu = self.parse_parameter(mu) if self.parametric else None
+        return self.source.make_array(self._evaluate(self._transpose_mapping, V.data, self.source.dim, mu))
+
+    def restricted(self, dofs):
+        if self.restricted_mapping is None:
+            raise NotImplementedError
+        mapping, source_dofs = self.restricted_mapping(dofs)
+        source_dofs = np.array(source_dofs, dtype=np.int32)
+        return (NumpyGenericOperator(mapping, dim_source=len(source_dofs), dim_range=len(dofs),
+                                     linear=self.linear, parameter_type=self.parameter_type,
+                                     vectorized=self.vectorized, chunk_size=self.chunk_size,
+                                     num_threads=self.num_threads, name='{}_restricted'.format(self.name)),
+                source_dofs)
 
 
 class NumpyMatrixBasedOperator(OperatorBase):
@@ -106,6 +148,8 @@ class NumpyMatrixBasedOperator(OperatorBase):
         operator assembles into a dense matrix, `None` if unknown.
     """
 
+    sid_ignore = OperatorBase.sid_ignore | {'_preconditioners', '_preconditioner_family', '_preconditioner_pools'}
+
     linear = True
     sparse = None
 
@@ -132,10 +176,14 @@ class NumpyMatrixBasedOperator(OperatorBase):
         -------
         The assembled parameter independent |Operator|.
         """
-        return NumpyMatrixOperator(self._assemble(self.parse_parameter(mu)),
-                                   source_id=self.source.id,
-                                   range_id=self.range.id,
-                                   solver_options=self.solver_options)
+        mu = self.parse_parameter(mu)
+        op = NumpyMatrixOperator(self._assemble(mu),
+                                 source_id=self.source.id,
+                                 range_id=self.range.id,
+                                 solver_options=self.solver_options)
+        coordinates = np.hstack([np.ravel(mu[k]) for k in sorted(mu)]) if mu else np.zeros(0)
+        op._preconditioner_family = (_preconditioner_pool(self, ()), coordinates)
+        return op
 
     def apply(self, U, mu=None):
         return self.assemble(mu).apply(U)
@@ -176,6 +224,11 @@ class NumpyMatrixBasedOperator(OperatorBase):
         else:
             mmwrite(filename, matrix, comment=matrix_name)
 
+    def __getstate__(self):
+        # remove (possibly unpicklable) cached preconditioners
+        return {k: v for k, v in self.__dict__.items()
+                if k not in {'_preconditioners', '_preconditioner_family', '_preconditioner_pools'}}
+
 
 class NumpyMatrixOperator(NumpyMatrixBasedOperator):
     """Wraps a 2D |NumPy Array| as an |Operator|.
@@ -188,6 +241,8 @@ class NumpyMatrixOperator(NumpyMatrixBasedOperator):
         Name of the operator.
     """
 
+    sid_ignore = NumpyMatrixBasedOperator.sid_ignore | {'_lu_factors', '_lincomb_stack', '_cache_lu'}
+
     def __init__(self, matrix, source_id=None, range_id=None, solver_options=None, name=None):
         assert matrix.ndim <= 2
         if matrix.ndim == 1:
@@ -200,6 +255,8 @@ class NumpyMatrixOperator(NumpyMatrixBasedOperator):
         self.source_id = source_id
         self.range_id = range_id
         self.sparse = issparse(matrix)
+        self._cache_lu = (not self.sparse and matrix.shape[0] == matrix.shape[1]
+                          and matrix.size <= dense_lu_options()['max_cached_size'])
 
     @classmethod
     def from_file(cls, path, key=None, source_id=None, range_id=None, solver_options=None, name=None):
@@ -313,6 +370,8 @@ class NumpyMatrixOperator(NumpyMatrixBasedOperator):
                 except np.linalg.LinAlgError as e:
                     raise InversionError('{}: {}'.format(str(type(e)), str(e)))
                 R = R.T
+            elif self.source.dim == self.range.dim:
+                R = self._lu_solve(V.data.T).T
             else:
                 try:
                     R = np.linalg.solve(self._matrix, V.data.T).T
@@ -325,16 +384,144 @@ class NumpyMatrixOperator(NumpyMatrixBasedOperator):
 
             return self.source.make_array(R)
 
+    @defaults('max_size', 'reuse_distance',
+              qualname='pymor.operators.numpy.NumpyMatrixOperator.cached_preconditioner')
+    def cached_preconditioner(self, key, options, build, max_size=3, reuse_distance=0.):
+        """Return a cached preconditioner for the operator's matrix.
+
+        Preconditioners (e.g. ILU factorizations or AMG hierarchies) are stored in a
+        LRU cache of size `max_size` attached to the operator. A cache entry is only
+        used when the matrix has not been modified since the entry was built.
+
+        If the operator has been obtained by assembling a parametric operator (see
+        :meth:`NumpyMatrixBasedOperator.assemble`) or a linear combination of
+        |NumpyMatrixOperators| (see :meth:`assemble_lincomb`), preconditioners built
+        for other parameter values (linear coefficients) of the same operator are
+        reused, as long as the relative sup-norm distance between the parameter
+        values (coefficients) does not exceed `reuse_distance`.
+
+        Parameters
+        ----------
+        key
+            Hashable key identifying the type of the preconditioner.
+        options
+            The options used for building the preconditioner. Cache entries
+            are only used if their options agree with `options`.
+        build
+            Function which builds the preconditioner for a given matrix.
+        max_size
+            Maximum number of preconditioners which are kept in each cache.
+        reuse_distance
+            Maximum relative distance between parameter values for which
+            a preconditioner is reused. Set to `None` to disable reusing
+            preconditioners for different parameter values.
+
+        Returns
+        -------
+        The preconditioner returned by `build`.
+        """
+        fingerprint = _matrix_fingerprint(self._matrix)
+        cache = self.__dict__.setdefault('_preconditioners', OrderedDict())
+
+        entry = cache.pop(key, None)
+        if entry is not None and entry[0] == fingerprint and entry[1] == options:
+            cache[key] = entry
+            return entry[2]
+
+        family = getattr(self, '_preconditioner_family', None)
+        precond = None
+        if family is not None and reuse_distance is not None:
+            pool, coordinates = family
+            candidates = [(_relative_distance(coordinates, c), p) for c, o, p in pool.get(key, [])
+                          if o == options and c.shape == coordinates.shape]
+            if candidates:
+                distance, p = min(candidates, key=lambda x: x[0])
+                if distance <= reuse_distance:
+                    self.logger.debug('Reusing preconditioner (distance {:.2e}).'.format(distance))
+                    precond = p
+
+        if precond is None:
+            precond = build(self._matrix)
+            if family is not None:
+                entries = family[0].setdefault(key, [])
+                entries.append((family[1], options, precond))
+                del entries[:-max_size]
+
+        cache[key] = (fingerprint, options, precond)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+        return precond
+
+    def _lu_solve(self, B, trans=0):
+        """Solve with the dense square matrix using a cached LU decomposition.
+
+        The LAPACK routines are called directly to avoid the (for small matrices
+        significant) overhead of :func:`scipy.linalg.lu_solve`. The LU decomposition
+        is only cached for matrices with at most `max_cached_size` entries (see
+        :func:`dense_lu_options`). Larger systems are solved using
+        :func:`numpy.linalg.solve` without caching. As for cached preconditioners,
+        the decomposition is recomputed when the matrix has been modified.
+        """
+        if not self._cache_lu:
+            try:
+                return np.linalg.solve(self._matrix.T if trans else self._matrix, B)
+            except np.linalg.LinAlgError as e:
+                raise InversionError('{}: {}'.format(str(type(e)), str(e)))
+        fingerprint = _matrix_fingerprint(self._matrix)
+        lu = getattr(self, '_lu_factors', None)
+        if lu is None or lu[0] != fingerprint:
+            getrf, _ = _lapack_lu_routines(self._matrix.dtype)
+            factors, piv, info = getrf(self._matrix)
+            if info != 0:
+                raise InversionError('LAPACK getrf failed with info = {}'.format(info))
+            lu = self._lu_factors = (fingerprint, factors, piv)
+        _, factors, piv = lu
+        if factors.dtype != B.dtype:
+            dtype = np.promote_types(factors.dtype, B.dtype)
+            factors, B = factors.astype(dtype), B.astype(dtype)
+        _, getrs = _lapack_lu_routines(factors.dtype)
+        X, info = getrs(factors, piv, B, trans=trans)
+        assert info == 0
+        return X
+
     def apply_inverse_transpose(self, U, mu=None, least_squares=False):
+        if not (self.sparse or least_squares or U.dim == 0) and self.source.dim == self.range.dim:
+            assert U in self.source
+            R = self._lu_solve(U.data.T, trans=1).T
+            if not np.isfinite(np.sum(R)):
+                raise InversionError('Result contains non-finite values')
+            return self.range.make_array(R)
+
         options = {'inverse': self.solver_options.get('inverse_transpose') if self.solver_options else None}
         transpose_op = NumpyMatrixOperator(self._matrix.T, source_id=self.range.id, range_id=self.source.id,
                                            solver_options=options)
         return transpose_op.apply_inverse(U, mu=mu, least_squares=least_squares)
 
-    def assemble_lincomb(self, operators, coefficients, solver_options=None, name=None):
+    @defaults('max_stack_size', qualname='pymor.operators.numpy.NumpyMatrixOperator.assemble_lincomb')
+    def assemble_lincomb(self, operators, coefficients, solver_options=None, name=None, max_stack_size=1000000):
+        """Assemble a linear combination of |NumpyMatrixOperators|.
+
+        If all `operators` are dense |NumpyMatrixOperators| with at most
+        `max_stack_size` matrix entries in total, the matrices are stacked
+        into a single |NumPy array| (one raveled matrix per row), which is
+        cached and contracted with the `coefficients` by a single matrix-vector
+        product. This considerably speeds up the assembly of (small) reduced
+        operators.
+        """
         if not all(isinstance(op, (NumpyMatrixOperator, ZeroOperator, IdentityOperator)) for op in operators):
             return None
 
+        if all(type(op) is NumpyMatrixOperator and not op.sparse for op in operators) \
+                and len(operators) * self._matrix.size <= max_stack_size:
+            key = tuple(op.uid for op in operators)
+            stack = getattr(self, '_lincomb_stack', None)
+            if stack is None or stack[0] != key:
+                stack = self._lincomb_stack = (key, np.array([op._matrix.ravel() for op in operators]))
+            return NumpyMatrixOperator(np.dot(coefficients, stack[1]).reshape(self._matrix.shape),
+                                       source_id=self.source.id,
+                                       range_id=self.range.id,
+                                       solver_options=solver_options)
+
         common_mat_dtype = reduce(np.promote_types,
                                   (op._matrix.dtype for op in operators if hasattr(op, '_matrix')))
         common_coef_dtype = reduce(np.promote_types, (type(c) for c in coefficients))
@@ -373,12 +560,66 @@ class NumpyMatrixOperator(NumpyMatrixBasedOperator):
                     matrix += (op._matrix * c)
                 except NotImplementedError:
                     matrix = matrix + (op._matrix * c)
-        return NumpyMatrixOperator(matrix,
-                                   source_id=self.source.id,
-                                   range_id=self.range.id,
-                                   solver_options=solver_options)
+        op = NumpyMatrixOperator(matrix,
+                                 source_id=self.source.id,
+                                 range_id=self.range.id,
+                                 solver_options=solver_options)
+        op._preconditioner_family = (_preconditioner_pool(self, tuple(o.uid for o in operators)),
+                                     np.array(coefficients))
+        return op
 
     def __getstate__(self):
         if hasattr(self._matrix, 'factorization'):  # remove unplicklable SuperLU factorization
             del self._matrix.factorization
-        return self.__dict__
+        state = super().__getstate__()
+        state.pop('_lu_factors', None)
+        state.pop('_lincomb_stack', None)
+        return state
+
+
+@defaults('max_cached_size')
+def dense_lu_options(max_cached_size=1000000):
+    """Options for the LU decompositions cached by dense |NumpyMatrixOperators|.
+
+    The decomposition is only cached for square matrices with at most `max_cached_size`
+    entries. The option is read when the operator is created.
+    """
+    return {'max_cached_size': max_cached_size}
+
+
+_lapack_lu_cache = {}
+
+
+def _lapack_lu_routines(dtype):
+    routines = _lapack_lu_cache.get(dtype)
+    if routines is None:
+        routines = _lapack_lu_cache[dtype] = get_lapack_funcs(('getrf', 'getrs'), dtype=dtype)
+    return routines
+
+
+def _preconditioner_pool(op, key):
+    """Pool of preconditioners shared by all operators assembled from `op`."""
+    pools = op.__dict__.setdefault('_preconditioner_pools', {})
+    return pools.setdefault(key, {})
+
+
+def _matrix_fingerprint(matrix):
+    """Cheap checksum of a matrix used to detect modifications of its data."""
+    if issparse(matrix):
+        arrays = [getattr(matrix, a) for a in ('data', 'indices', 'indptr', 'offsets', 'row', 'col')
+                  if hasattr(matrix, a)]
+    else:
+        arrays = [matrix]
+    checksum = 1
+    for a in arrays:
+        if isinstance(a, np.ndarray) and a.dtype != object:
+            checksum = zlib.adler32(np.ascontiguousarray(a).view(np.uint8), checksum)
+    return matrix.shape, matrix.dtype, checksum
+
+
+def _relative_distance(x, y):
+    if len(x) == 0:
+        return 0.
+    norm = np.max(np.abs(y))
+    distance = np.max(np.abs(x - y))
+    return distance / norm if norm > 0 else distance
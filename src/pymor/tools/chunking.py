@@ -0,0 +1,84 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Helpers for processing large arrays in memory-bounded chunks."""
+
+from pymor.core.defaults import defaults
+
+
+def chunk_slices(size, chunk_size):
+    """Return a list of consecutive slices of length `chunk_size` covering `range(size)`.
+
+    If `chunk_size` is `None`, a single slice covering everything is returned.
+    """
+    if chunk_size is None or chunk_size >= size:
+        return [slice(0, size)]
+    assert chunk_size > 0
+    return [slice(i, min(i + chunk_size, size)) for i in range(0, size, chunk_size)]
+
+
+@defaults('num_threads')
+def map_chunks(function, size, chunk_size, num_threads=1):
+    """Evaluate `function` on consecutive chunks of `range(size)`.
+
+    Parameters
+    ----------
+    function
+        Function taking a `slice` as its single argument.
+    size
+        Total number of items to process.
+    chunk_size
+        Maximum number of items per chunk. If `None`, `function`
+        is called once for all items.
+    num_threads
+        If larger than one, chunks are processed concurrently using a
+        thread pool of the given size. This only pays off if `function`
+        spends most of its time in code releasing the GIL (e.g. |NumPy|
+        operations on large arrays).
+
+    Returns
+    -------
+    List of the return values of `function` in the order of the chunks.
+    """
+    return list(iterate_chunks(function, size, chunk_size, num_threads))
+
+
+def iterate_chunks(function, size, chunk_size, num_threads=1):
+    """Lazily evaluate `function` on consecutive chunks of `range(size)`.
+
+    Same as :func:`map_chunks`, but returns a generator. When a thread pool
+    is used, at most `num_threads` chunks are processed ahead of the consumer,
+    so that only a bounded number of results is kept in memory at any time.
+
+    Parameters
+    ----------
+    function
+        Function taking a `slice` as its single argument.
+    size
+        Total number of items to process.
+    chunk_size
+        Maximum number of items per chunk. If `None`, `function`
+        is called once for all items.
+    num_threads
+        See :func:`map_chunks`.
+
+    Returns
+    -------
+    Generator yielding the return values of `function` in the order of the chunks.
+    """
+    slices = chunk_slices(size, chunk_size)
+    if num_threads is None or num_threads <= 1 or len(slices) == 1:
+        for s in slices:
+            yield function(s)
+        return
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        pending = deque()
+        for s in slices:
+            if len(pending) == num_threads:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, s))
+        while pending:
+            yield pending.popleft().result()
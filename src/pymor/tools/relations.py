@@ -1,4 +1,10 @@
-raise ImportError('''
-Cython extension module 'pymor.tools.relations' has not been built.
-Please run 'python setup.py build_ext --inplace' in the root
-directory of the pyMOR repository.''')
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+# This module is only imported when the Cython extension module 'pymor.tools.relations'
+# has not been built. In this case, the pure NumPy implementation is used. To build the
+# extension, run 'python setup.py build_ext --inplace' in the root directory of the
+# pyMOR repository.
+
+from pymor.tools.relations_numpy import inverse_relation, inverse_relation_csr  # NOQA
@@ -53,3 +53,42 @@ def inverse_relation(np.ndarray[DTYPE_t, ndim=2] R, size_rhs=None, with_indices=
                     RINVI[<unsigned int>x, RINV_COL_COUNTS[<unsigned int>x]] = j
                     RINV_COL_COUNTS[<unsigned int>x] += 1
         return RINV, RINVI
+
+
+@cython.boundscheck(False)
+def inverse_relation_csr(R, size_rhs=None, unsafe=False):
+    cdef np.ndarray[DTYPE_t, ndim=2] RR = np.asarray(R, dtype=DTYPE)
+    cdef int i
+    cdef int j
+    cdef int x
+    cdef long k
+    cdef np.ndarray[np.int64_t, ndim=1] OFFSETS
+    cdef np.ndarray[np.int64_t, ndim=1] POSITIONS
+    cdef np.ndarray[DTYPE_t, ndim=1] ROWS
+    cdef np.ndarray[DTYPE_t, ndim=1] COLUMNS
+
+    if size_rhs is None:
+        size_rhs = RR.max() + 1
+    elif not unsafe:
+        assert size_rhs >= RR.max() + 1
+
+    OFFSETS = np.zeros(size_rhs + 1, dtype=np.int64)
+    for i in xrange(RR.shape[0]):
+        for j in xrange(RR.shape[1]):
+            x = RR[<unsigned int>i, <unsigned int>j]
+            if x >= 0:
+                OFFSETS[<unsigned int>x + 1] += 1
+    np.cumsum(OFFSETS, out=OFFSETS)
+
+    POSITIONS = OFFSETS[:-1].copy()
+    ROWS = np.empty(OFFSETS[size_rhs], dtype=DTYPE)
+    COLUMNS = np.empty(OFFSETS[size_rhs], dtype=DTYPE)
+    for i in xrange(RR.shape[0]):
+        for j in xrange(RR.shape[1]):
+            x = RR[<unsigned int>i, <unsigned int>j]
+            if x >= 0:
+                k = POSITIONS[<unsigned int>x]
+                ROWS[k] = i
+                COLUMNS[k] = j
+                POSITIONS[<unsigned int>x] = k + 1
+    return OFFSETS, ROWS, COLUMNS
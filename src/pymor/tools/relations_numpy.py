@@ -0,0 +1,116 @@
+# This file is part of the pyMOR project (http://www.pymor.org).
+# Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
+# License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
+
+"""Pure |NumPy| implementation of the Cython extension module :mod:`pymor.tools.relations`.
+
+If the extension module has not been built, :mod:`pymor.tools.relations` falls
+back to the functions defined here. In addition, this module contains helpers
+for converting relations between index arrays padded with -1 and the compact
+CSR format (offsets + values).
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def inverse_relation(R, size_rhs=None, with_indices=False, unsafe=False):
+    """Compute the inverse of a relation given as an index array padded with -1.
+
+    For each `x`, the `x`-th row of the returned array `RINV` contains, in
+    ascending order, all `i` with `x` in `R[i]`, padded with -1.
+
+    Parameters
+    ----------
+    R
+        Two-dimensional integer array, where negative entries are ignored.
+    size_rhs
+        Number of rows of the inverse relation. If `None`, `R.max() + 1` is used.
+    with_indices
+        If `True`, also compute the array `RINVI` such that `R[RINV[x, k], RINVI[x, k]] == x`.
+    unsafe
+        If `True`, do not check that `size_rhs` is large enough.
+
+    Returns
+    -------
+    RINV
+        The inverse relation as an int32 array of shape `(size_rhs, maximum valence)`.
+    RINVI
+        The column indices of `x` in `R` if `with_indices` is `True`, otherwise `None`.
+    """
+    offsets, rows, columns = inverse_relation_csr(R, size_rhs=size_rhs, unsafe=unsafe)
+    RINV = padded_relation(offsets, rows)
+    return RINV, (padded_relation(offsets, columns) if with_indices else None)
+
+
+def inverse_relation_csr(R, size_rhs=None, unsafe=False):
+    """Compute the inverse of a relation given as an index array padded with -1 in CSR format.
+
+    Parameters
+    ----------
+    R
+        Two-dimensional integer array, where negative entries are ignored.
+    size_rhs
+        Number of rows of the inverse relation. If `None`, `R.max() + 1` is used.
+    unsafe
+        If `True`, do not check that `size_rhs` is large enough.
+
+    Returns
+    -------
+    offsets
+        Array of length `size_rhs + 1`. The `x`-th row of the inverse relation
+        is stored at `offsets[x]:offsets[x+1]` of `rows` and `columns`.
+    rows
+        The int32 array of all `i` with `x` in `R[i]`, in ascending order for each `x`.
+    columns
+        The corresponding int32 array of column indices `j` with `R[i, j] == x`.
+    """
+    assert R.ndim == 2
+    if size_rhs is None:
+        size_rhs = R.max() + 1
+    elif not unsafe:
+        assert size_rhs >= R.max() + 1
+
+    # the positions of the valid entries of R are sorted by their values using SciPy's
+    # linear-time COO to CSR conversion, which keeps the positions of each row in
+    # ascending order
+    if R.size and R.min() >= 0:
+        positions, values = np.arange(R.size), R.ravel()
+    else:
+        positions = np.nonzero(R.ravel() >= 0)[0]
+        values = R.ravel()[positions]
+    RINV = csr_matrix((np.ones(len(values), dtype=np.int8), (values, positions)), shape=(size_rhs, R.size))
+    return (RINV.indptr.astype(np.int64), (RINV.indices // R.shape[1]).astype(np.int32),
+            (RINV.indices % R.shape[1]).astype(np.int32))
+
+
+def relation_csr(R):
+    """Convert a relation given as an index array padded with -1 to CSR format.
+
+    Returns
+    -------
+    offsets
+        Array of length `len(R) + 1`. The valid entries of `R[i]` are stored
+        at `offsets[i]:offsets[i+1]` of `values`.
+    values
+        The int32 array of all non-negative entries of `R`, in row-major order.
+    """
+    assert R.ndim == 2
+    counts = np.count_nonzero(R >= 0, axis=1)
+    offsets = np.zeros(len(R) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, R[R >= 0].astype(np.int32)
+
+
+def padded_relation(offsets, values):
+    """Convert a relation in CSR format to an int32 index array padded with -1.
+
+    Inverse of :func:`relation_csr`. The number of columns of the returned
+    array is the maximum number of entries per row.
+    """
+    counts = np.diff(offsets)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    R = np.empty((len(counts), counts.max() if len(counts) else 0), dtype=np.int32)
+    R.fill(-1)
+    R[rows, np.arange(len(values)) - offsets[rows]] = values
+    return R
@@ -309,5 +309,50 @@ def test_orthogonal_centers(grid_with_orthogonal_centers):
         SPROD = EMB[s].dot(SEGMENT)
         np.testing.assert_allclose(SPROD, 0)
 
+
+def test_locate(grid):
+    g = grid
+    A, B = g.embeddings(0)
+    E, X = g.locate(g.centers(0))
+    np.testing.assert_array_equal(E, np.arange(g.size(0)))
+    np.testing.assert_allclose(X, np.tile(g.reference_element.center(), (g.size(0), 1)))
+
+    lower, upper = g.bounding_box()
+    points = np.random.RandomState(0).uniform(lower - 0.1, upper + 0.1, size=(50, g.dim))
+    E, X = g.locate(points)
+    found = E >= 0
+    np.testing.assert_allclose(np.einsum('eij,ej->ei', A[E[found]], X[found]) + B[E[found]], points[found])
+    assert np.all(np.isnan(X[~found]))
+    # brute force test of the points which have not been found
+    Y = np.einsum('eji,pej->pei', g.jacobian_inverse_transposed(0), points[~found][:, np.newaxis, :] - B)
+    if g.reference_element.size(g.dim) == g.dim + 1:
+        assert not np.any(np.all(Y >= 1e-8, axis=2) & (np.sum(Y, axis=2) <= 1 - 1e-8))
+    else:
+        assert not np.any(np.all((Y >= 1e-8) & (Y <= 1 - 1e-8), axis=2))
+
+
+def test_geometry_options():
+    from pymor.grids.geometry import cached_geometry_memory
+    from pymor.grids.tria import TriaGrid
+    from pymortests.base import changed_defaults
+    g64, g32 = TriaGrid((10, 10)), TriaGrid((10, 10))
+    centers = [g64.centers(codim) for codim in range(g64.dim + 1)]
+    with changed_defaults({'pymor.grids.geometry.geometry_options.dtype': 'float32'}):
+        for codim in range(g32.dim + 1):
+            assert g32.volumes(codim).dtype == np.float32
+            np.testing.assert_allclose(g32.centers(codim), centers[codim])
+    assert g32.geometry(0).nbytes < g64.geometry(0).nbytes
+    assert g64.volumes(0) is g64.geometry(0).volumes
+
+    with changed_defaults({'pymor.grids.geometry.geometry_options.max_memory': g64.geometry(0).nbytes * 3 // 2}):
+        grids = [TriaGrid((10, 10)) for _ in range(3)]
+        bundles = [g.geometry(0) for g in grids]
+        assert cached_geometry_memory() <= bundles[0].nbytes * 3 // 2
+        # only the most recently used bundle is kept, the others are recomputed
+        assert grids[-1].geometry(0) is bundles[-1]
+        assert grids[0].geometry(0) is not bundles[0]
+        np.testing.assert_array_equal(grids[0].volumes(0), bundles[0].volumes)
+
+
 if __name__ == "__main__":
     runmodule(filename=__file__)
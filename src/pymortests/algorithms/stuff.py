@@ -29,5 +29,47 @@ def test_newton_fail():
         _ = _newton(0, maxiter=10, stagnation_threshold=np.inf)
 
 
+def test_explicit_ssp_runge_kutta_order():
+    from pymor.algorithms.timestepping import explicit_ssp_runge_kutta
+    from pymor.operators.numpy import NumpyMatrixOperator
+    A = NumpyMatrixOperator(np.diag([1., 2., 3.]))
+    U0 = A.source.from_data(np.ones(3))
+    exact = np.exp(-np.array([1., 2., 3.]))
+    for order in (1, 2, 3):
+        errors = [np.max(np.abs(explicit_ssp_runge_kutta(A, None, U0, 0., 1., nt=nt, order=order).data[-1] - exact))
+                  for nt in (20, 40)]
+        assert 0.9 * order < np.log2(errors[0] / errors[1]) < 1.1 * order
+
+
+def test_explicit_ssp_runge_kutta_cfl():
+    from pymor.algorithms.timestepping import ExplicitSSPRungeKuttaTimeStepper, explicit_ssp_runge_kutta
+    from pymor.analyticalproblems.burgers import burgers_problem
+    from pymor.discretizers.fv import discretize_instationary_fv
+    p = burgers_problem(circle=False)
+    for order in (1, 3):
+        d, _ = discretize_instationary_fv(p, diameter=1. / 50, num_values=7,
+                                          time_stepper=ExplicitSSPRungeKuttaTimeStepper(order=order, cfl=1.))
+        U = d.solve(1.)
+        assert len(U) == 7
+        # for exponent 1 the Lax-Friedrichs scheme is monotone and satisfies a
+        # discrete maximum principle under the CFL condition
+        assert np.all(U.data >= -1e-10) and np.all(U.data <= 1. + 1e-10)
+    op, mu = d.operator, d.parse_parameter(1.)
+    U = d.solution_space.from_data(np.random.RandomState(0).rand(d.solution_space.dim))
+    assert np.allclose(op.jacobian_diagonal(U, mu=mu), op.jacobian(U, mu=mu)._matrix.diagonal())
+    assert len(explicit_ssp_runge_kutta(op, None, d.initial_data.as_vector(mu), 0., 0.5, cfl=1., mu=mu)) == 2
+
+
+def test_explicit_ssp_runge_kutta_cfl_linear():
+    from pymor.algorithms.timestepping import explicit_ssp_runge_kutta
+    from pymor.operators.numpy import NumpyMatrixOperator
+    A = NumpyMatrixOperator(np.diag([1., 2., 4.]))
+    U0 = A.source.from_data(np.ones(3))
+    U = explicit_ssp_runge_kutta(A, None, U0, 0., 1., nt=4, order=1, cfl=0.5)
+    assert len(U) == 5
+    # dt = 0.5 / 4 for all steps
+    assert np.allclose(U.data[-1], (1 - np.array([1., 2., 4.]) / 8) ** 8)
+
+
 if __name__ == "__main__":
     runmodule(filename=__file__)
@@ -3,10 +3,13 @@
 # License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
 
 import hashlib
+import importlib
+import inspect
 import pprint
 import pkgutil
 import os
 import sys
+from contextlib import contextmanager
 import numpy as np
 from numpy.polynomial.polynomial import Polynomial
 from math import factorial
@@ -14,6 +17,7 @@ from pickle import dumps, dump, load
 from pkg_resources import resource_filename, resource_stream
 
 from pymor.core import logger
+from pymor.core.defaults import set_defaults
 from pymor.operators.basic import OperatorBase
 from pymor.vectorarrays.numpy import NumpyVectorSpace
 
@@ -65,6 +69,32 @@ def runmodule(filename):
     sys.exit(pytest.main(sys.argv[1:] + [filename]))
 
 
+@contextmanager
+def changed_defaults(values):
+    """Temporarily set |defaults| and restore the previous values afterwards."""
+    old_values = {k: _current_default(k) for k in values}
+    set_defaults(values)
+    try:
+        yield
+    finally:
+        set_defaults(old_values)
+
+
+def _current_default(key):
+    # the signature of a function decorated with `defaults` reflects the current default values
+    path, argname = key.rsplit('.', 1)
+    parts = path.split('.')
+    for i in range(len(parts) - 1, 0, -1):
+        try:
+            obj = importlib.import_module('.'.join(parts[:i]))
+        except ImportError:
+            continue
+        for name in parts[i:]:
+            obj = getattr(obj, name)
+        return inspect.signature(obj).parameters[argname].default
+    raise KeyError(key)
+
+
 def polynomials(max_order):
     for n in range(max_order + 1):
         def f(x):
@@ -2,8 +2,195 @@
 # Copyright 2013-2017 pyMOR developers and contributors. All rights reserved.
 # License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
 
-from pymortests.base import runmodule
+"""Benchmarks of grid algorithms.
+
+The `benchmark_*` functions measure the run time of grid algorithms for growing
+grid sizes. They are not run by the test suite, which only checks the results of
+the benchmarked algorithms on small grids. Run ::
+
+    python pymortests/benchmarks.py
+
+to print the timings of all benchmarks.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+
+def _rect_grid(n):
+    from pymor.grids.rect import RectGrid
+    return RectGrid((n, n))
+
+
+def _tria_grid(n):
+    from pymor.grids.tria import TriaGrid
+    return TriaGrid((n, n))
+
+
+def _unstructured_grid(n):
+    from pymor.grids.tria import TriaGrid
+    from pymor.grids.unstructured import UnstructuredTriangleGrid
+    g = TriaGrid((n, n))
+    return UnstructuredTriangleGrid(g.centers(2), g.subentities(0, 2))
+
+
+GRID_FACTORIES = {'rect': _rect_grid, 'tria': _tria_grid, 'unstructured': _unstructured_grid}
+
+
+def benchmark_neighbours(grid_type, sizes):
+    """Measure the time needed to compute all neighbour relations of freshly created grids.
+
+    Returns a list of tuples `(number of codim-0 entities, seconds)`, one for each entry of `sizes`.
+    """
+    results = []
+    for n in sizes:
+        g = GRID_FACTORIES[grid_type](n)
+        tic = time.time()
+        for e in range(g.dim + 1):
+            for s in range(e + 1, g.dim + 1):
+                g.neighbours(e, e, s)
+        results.append((g.size(0), time.time() - tic))
+    return results
+
+
+@pytest.mark.parametrize('grid_type', sorted(GRID_FACTORIES))
+def test_neighbours(grid_type):
+    g = GRID_FACTORIES[grid_type](4)
+    for e in range(g.dim + 1):
+        for s in range(e + 1, g.dim + 1):
+            N = g.neighbours(e, e, s)
+            SE = g.subentities(e, s)
+            for i in range(g.size(e)):
+                expected = {j for j in range(g.size(e)) if j != i and set(SE[j]) & set(SE[i]) - {-1}}
+                assert set(N[i]) - {-1} == expected
+
+
+def benchmark_inverse_relation(sizes):
+    """Compare the Cython and |NumPy| implementations of `inverse_relation`.
+
+    Inverts the element-vertex relation of `TriaGrids` of the given `sizes`. Returns
+    a list of tuples `(number of elements, seconds Cython, seconds NumPy)`, where the
+    Cython timing is `None` if the extension module has not been built.
+    """
+    from pymor.tools import relations
+    from pymor.tools.relations_numpy import inverse_relation
+    compiled = not relations.__file__.endswith('.py')
+    results = []
+    for n in sizes:
+        R = _tria_grid(n).subentities(0, 2)
+        timings = []
+        for f in ((relations.inverse_relation, inverse_relation) if compiled else (inverse_relation,)):
+            tic = time.time()
+            f(R, size_rhs=R.max() + 1, with_indices=True)
+            timings.append(time.time() - tic)
+        results.append((len(R),) + (tuple(timings) if compiled else (None,) + tuple(timings)))
+    return results
+
+
+def test_inverse_relation():
+    from pymor.tools import relations
+    from pymor.tools.relations_numpy import inverse_relation, padded_relation
+    R = _unstructured_grid(5).subentities(0, 2)
+    RINV, RINVI = inverse_relation(R, size_rhs=R.max() + 1, with_indices=True)
+    # the Cython implementation (if built) gives the same result
+    assert all(np.all(A == B) for A, B in zip(relations.inverse_relation(R, size_rhs=R.max() + 1, with_indices=True),
+                                              (RINV, RINVI)))
+    R = np.vstack((R, [[-1, 3, 7]]))
+    RINV, RINVI = inverse_relation(R, size_rhs=R.max() + 2, with_indices=True)
+    for x in range(R.max() + 2):
+        assert list(RINV[x][RINV[x] >= 0]) == [i for i in range(len(R)) if x in R[i]]
+        assert all(R[i, j] == x for i, j in zip(RINV[x], RINVI[x]) if i >= 0)
+    offsets, rows, columns = relations.inverse_relation_csr(R, size_rhs=R.max() + 2)
+    assert np.all(padded_relation(offsets, rows) == RINV) and np.all(padded_relation(offsets, columns) == RINVI)
+
+
+def benchmark_locate(grid_type, sizes, num_points=100000):
+    """Measure the time needed to build the spatial index of a grid and to locate random points.
+
+    Returns a list of tuples `(number of codim-0 entities, seconds index, seconds query)`.
+    """
+    results = []
+    points = np.random.RandomState(0).rand(num_points, 2)
+    for n in sizes:
+        g = GRID_FACTORIES[grid_type](n)
+        g.jacobian_inverse_transposed(0)
+        tic = time.time()
+        g.locate(points[:1])
+        seconds_index = time.time() - tic
+        tic = time.time()
+        g.locate(points)
+        results.append((g.size(0), seconds_index, time.time() - tic))
+    return results
+
+
+@pytest.mark.parametrize('grid_type', sorted(GRID_FACTORIES))
+def test_locate(grid_type):
+    g = GRID_FACTORIES[grid_type](7)
+    points = np.vstack((np.random.RandomState(0).rand(1000, 2), [[1.5, 0.5], [0.5, -0.1]]))
+    elements, coordinates = g.locate(points)
+    assert np.all(elements[:-2] >= 0) and np.all(elements[-2:] == -1)
+    assert np.all(np.isnan(coordinates[-2:]))
+    A, B = g.embeddings(0)
+    E, X = elements[:-2], coordinates[:-2]
+    assert np.allclose(np.einsum('eij,ej->ei', A[E], X) + B[E], points[:-2])
+    assert np.all(X >= -1e-10) and np.all(X <= 1 + 1e-10)
+    if grid_type != 'rect':
+        assert np.all(X.sum(axis=1) <= 1 + 1e-10)
+
+
+def benchmark_refine(grid_type, sizes):
+    """Measure the time needed to uniformly refine a grid and to refine every tenth codim-0 entity.
+
+    Returns a list of tuples `(number of codim-0 entities, seconds uniform, seconds marked)`.
+    """
+    from pymor.grids.refinement import refine_grid
+    results = []
+    for n in sizes:
+        g = GRID_FACTORIES[grid_type](n)
+        g.subentities(0, 1)
+        tic = time.time()
+        refine_grid(g)
+        seconds_uniform = time.time() - tic
+        tic = time.time()
+        refine_grid(g, np.arange(0, g.size(0), 10))
+        results.append((g.size(0), seconds_uniform, time.time() - tic))
+    return results
+
+
+@pytest.mark.parametrize('grid_type', ['tria', 'unstructured'])
+def test_refine(grid_type):
+    from pymor.grids.refinement import refine_grid
+    g = GRID_FACTORIES[grid_type](6)
+    for marked in (None, np.arange(0, g.size(0), 10)):
+        refined, _, data = refine_grid(g, marked)
+        assert np.isclose(refined.volumes(0).sum(), g.volumes(0).sum())
+        assert np.allclose(np.bincount(data['parents'], weights=refined.volumes(0)), g.volumes(0))
+        if marked is None:
+            assert refined.size(0) == 4 * g.size(0)
+        # piecewise linear functions are interpolated exactly
+        U = g.centers(2).dot([2., -1.]) + 0.5
+        assert np.allclose(data['cg_prolongation'].apply(data['cg_prolongation'].source.from_data(U)).data[0],
+                           refined.centers(2).dot([2., -1.]) + 0.5)
+
+
+def main():
+    for grid_type in sorted(GRID_FACTORIES):
+        for num_elements, seconds in benchmark_neighbours(grid_type, (25, 50, 100)):
+            print('neighbours {:>12} {:>8} elements: {:.3f}s'.format(grid_type, num_elements, seconds))
+    for num_elements, seconds_cython, seconds_numpy in benchmark_inverse_relation((100, 200, 400)):
+        print('inverse_relation {:>8} elements: Cython {}, NumPy {:.3f}s'.format(
+            num_elements, 'n/a' if seconds_cython is None else '{:.3f}s'.format(seconds_cython), seconds_numpy))
+    for grid_type in sorted(GRID_FACTORIES):
+        for num_elements, seconds_index, seconds_query in benchmark_locate(grid_type, (100, 200, 400)):
+            print('locate {:>12} {:>8} elements: index {:.3f}s, query {:.3f}s'.format(
+                grid_type, num_elements, seconds_index, seconds_query))
+    for grid_type in ('tria', 'unstructured'):
+        for num_elements, seconds_uniform, seconds_marked in benchmark_refine(grid_type, (100, 200, 400)):
+            print('refine {:>12} {:>8} elements: uniform {:.3f}s, marked {:.3f}s'.format(
+                grid_type, num_elements, seconds_uniform, seconds_marked))
 
 
 if __name__ == "__main__":
-    runmodule(filename=__file__)
+    main()
@@ -3,6 +3,7 @@
 # License: BSD 2-Clause License (http://opensource.org/licenses/BSD-2-Clause)
 
 import numpy as np
+import pytest
 
 from pymor.algorithms.basic import almost_equal
 from pymor.core.pickle import dumps, loads
@@ -28,5 +29,36 @@ def test_pickle_by_solving(discretization):
         assert np.all(almost_equal(d.solve(mu), d2.solve(mu)))
 
 
+@pytest.mark.parametrize('grid_type', ['tria', 'rect'])
+def test_discretize_cg_interpolate_coefficients(grid_type):
+    from pymor.domaindescriptions.basic import RectDomain
+    from pymor.analyticalproblems.elliptic import StationaryProblem
+    from pymor.discretizers.cg import discretize_stationary_cg
+    from pymor.functions.basic import ConstantFunction, ExpressionFunction
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.constructions import LincombOperator
+    from pymor.parameters.spaces import CubicParameterSpace
+
+    p = StationaryProblem(
+        domain=RectDomain(),
+        diffusion=ExpressionFunction('1. + c[0]**2 * x[..., 0] + exp(c[1]) * x[..., 1]**2', 2, (), {'c': (2,)}),
+        rhs=ConstantFunction(1., 2),
+        parameter_space=CubicParameterSpace({'c': (2,)}, 0.1, 1.)
+    )
+    grid_type = {'tria': TriaGrid, 'rect': RectGrid}[grid_type]
+    d, _ = discretize_stationary_cg(p, diameter=1. / 10, grid_type=grid_type)
+    d_ei, _ = discretize_stationary_cg(
+        p, diameter=1. / 10, grid_type=grid_type,
+        interpolate_coefficients={'parameter_sample': p.parameter_space.sample_uniformly(5), 'rtol': 1e-10}
+    )
+
+    assert isinstance(d_ei.operator, LincombOperator)
+    assert not any(op.parametric for op in d_ei.operator.operators)
+    for mu in p.parameter_space.sample_randomly(3, seed=1):
+        U, U_ei = d.solve(mu), d_ei.solve(mu)
+        assert np.all((U - U_ei).l2_norm() <= 1e-10 * U.l2_norm())
+
+
 if __name__ == "__main__":
     runmodule(filename=__file__)
@@ -290,7 +290,7 @@ thermalblock_fixedparam_operator_with_arrays_and_products_generators = \
     [lambda args=args: thermalblock_fixedparam_factory(*args) for args in thermalblock_factory_arguments]
 
 
-num_misc_operators = 10
+num_misc_operators = 11
 
 
 def misc_operator_with_arrays_and_products_factory(n):
@@ -350,6 +350,13 @@ def misc_operator_with_arrays_and_products_factory(n):
         U = op.source.make_array([U0, U1])
         V = op.range.make_array([V0, V1])
         return op, None, U, V, sp, rp
+    elif n == 10:
+        from pymor.operators.constructions import LowRankOperator, LowRankUpdatedOperator
+        op0, _, U, V, sp, rp = numpy_matrix_operator_with_arrays_and_products_factory(30, 30, 4, 3, n)
+        left = op0.range.make_array(np.random.random((2, 30)))
+        right = op0.source.make_array(np.random.random((2, 30)))
+        op = LowRankUpdatedOperator(op0, LowRankOperator(left, np.random.random((2, 2)), right))
+        return op, None, U, V, sp, rp
     else:
         assert False
 
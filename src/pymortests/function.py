@@ -73,3 +73,25 @@ def test_pickle_by_evaluation(function):
     for arg in function_argument(f, 10, 42):
         mu = next(mus)
         assert np.all(f.evaluate(arg, mu) == f2.evaluate(arg, mu))
+
+
+def test_interpolate_function():
+    from pymor.algorithms.ei import interpolate_function
+    from pymor.functions.basic import ExpressionFunction, LincombFunction
+    from pymor.parameters.spaces import CubicParameterSpace
+    f = ExpressionFunction('array([c[0] * x[..., 0], c[0] * c[1] + x[..., 1]**2]).T', 2, (2,), {'c': (2,)})
+    space = CubicParameterSpace(f.parameter_type, 0.1, 1.)
+    X = np.random.random((50, 2))
+    fi, data = interpolate_function(f, space.sample_uniformly(3), X, rtol=1e-10)
+    assert isinstance(fi, LincombFunction) and len(fi.functions) == 3
+    assert not any(g.parametric for g in fi.functions)
+    assert all(c.coefficients is fi.coefficients[0].coefficients for c in fi.coefficients)
+    for mu in space.sample_randomly(5, seed=0):
+        assert np.allclose(fi(X, mu), f(X, mu))
+    assert_picklable(fi)
+    # the interpolation points are those selected by ei_greedy w.r.t. the maximum norm
+    from pymor.algorithms.ei import ei_greedy
+    from pymor.vectorarrays.numpy import NumpyVectorSpace
+    R = NumpyVectorSpace.make_array(np.array([f(X, mu).ravel() for mu in space.sample_uniformly(3)]))
+    dofs, _, _ = ei_greedy(R, error_norm=lambda U: U.sup_norm(), rtol=1e-10)
+    assert np.all(data['interpolation_points'] == X[dofs // 2])
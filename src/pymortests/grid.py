@@ -242,6 +242,29 @@ def test_superentity_indices_valid_entries(grid):
                     assert SUBE[superentity, SEI[index]] == index[0]
 
 
+def test_superentities_csr(grid):
+    g = grid
+    for e in range(g.dim + 1):
+        for s in range(e + 1):
+            offsets, SE, SEI = g.superentities_csr(e, s)
+            assert len(offsets) == g.size(e) + 1
+            SE_PADDED = g.superentities(e, s)
+            SEI_PADDED = g.superentity_indices(e, s)
+            np.testing.assert_array_equal(np.diff(offsets), np.sum(SE_PADDED >= 0, axis=1))
+            np.testing.assert_array_equal(SE, SE_PADDED[SE_PADDED >= 0])
+            np.testing.assert_array_equal(SEI, SEI_PADDED[SE_PADDED >= 0])
+
+
+def test_neighbours_csr(grid):
+    g = grid
+    for e, n in product(range(g.dim + 1), range(g.dim + 1)):
+        for s in range(max(e, n), g.dim + 1):
+            offsets, N = g.neighbours_csr(e, n, s)
+            N_PADDED = g.neighbours(e, n, s)
+            np.testing.assert_array_equal(np.diff(offsets), np.sum(N_PADDED >= 0, axis=1))
+            np.testing.assert_array_equal(N, N_PADDED[N_PADDED >= 0])
+
+
 def test_neighbours_wrong_arguments(grid):
     g = grid
     for e in range(g.dim + 1):
@@ -450,3 +473,305 @@ def test_visualize(grids_with_visualize):
         pytest.xfail("Qt missing")
     finally:
         stop_gui_processes()
+
+
+def _write_msh(path, version, binary, vertices, faces, lines, line_tags):
+    """Write a minimal MSH-file with node tags 2, 4, 6, ... and physical groups 'bottom' (1) and 'other' (2)."""
+    node_tags = 2 * np.arange(1, len(vertices) + 1)
+    coordinates = np.hstack([vertices, np.zeros((len(vertices), 1))])
+    faces, lines = node_tags[faces], node_tags[lines]
+    with open(path, 'wb') as f:
+        def w(s):
+            f.write(s.encode())
+
+        def b(a, dtype):
+            f.write(np.asarray(a, dtype=dtype).tobytes())
+        w('$MeshFormat\n{} {} 8\n'.format(version, int(binary)))
+        if binary:
+            b(1, '<i4')
+            w('\n')
+        w('$EndMeshFormat\n$PhysicalNames\n3\n1 1 "bottom"\n1 2 "other"\n2 3 "domain"\n$EndPhysicalNames\n')
+        if version == '2.2':
+            w('$Nodes\n{}\n'.format(len(vertices)))
+            if binary:
+                for t, x in zip(node_tags, coordinates):
+                    b(t, '<i4')
+                    b(x, '<f8')
+                w('\n')
+            else:
+                for t, x in zip(node_tags, coordinates):
+                    w('{} {!r} {!r} {!r}\n'.format(t, *x))
+            w('$EndNodes\n$Elements\n{}\n'.format(len(lines) + len(faces)))
+            if binary:
+                b([1, len(lines), 2], '<i4')
+                b(np.hstack([np.arange(len(lines))[:, np.newaxis] + 1, line_tags[:, np.newaxis],
+                             np.zeros((len(lines), 1)), lines]), '<i4')
+                b([2, len(faces), 2], '<i4')
+                b(np.hstack([np.arange(len(faces))[:, np.newaxis] + 100, np.full((len(faces), 2), 3), faces]), '<i4')
+                w('\n')
+            else:
+                for i, (l, t) in enumerate(zip(lines, line_tags)):
+                    w('{} 1 2 {} 0 {} {}\n'.format(i + 1, t, *l))
+                for i, t in enumerate(faces):
+                    w('{} 2 2 3 3 {} {} {}\n'.format(i + 100, *t))
+            w('$EndElements\n')
+        else:
+            # one curve entity per physical group and a single surface entity
+            n = len(vertices)
+            if binary:
+                w('$Entities\n')
+                b([0, 2, 1, 0], '<u8')
+                for tag in (1, 2):
+                    b(tag, '<i4'), b(np.zeros(6), '<f8'), b(1, '<u8'), b(tag, '<i4'), b(0, '<u8')
+                b(1, '<i4'), b(np.zeros(6), '<f8'), b(1, '<u8'), b(3, '<i4'), b(0, '<u8')
+                w('\n$EndEntities\n$Nodes\n')
+                b([1, n, 2, 2 * n], '<u8'), b([2, 1, 0], '<i4'), b(n, '<u8'), b(node_tags, '<u8')
+                b(coordinates, '<f8')
+                w('\n$EndNodes\n$Elements\n')
+                b([3, len(lines) + len(faces), 1, 99 + len(faces)], '<u8')
+                for tag in (1, 2):
+                    ls = lines[line_tags == tag]
+                    b([1, tag, 1], '<i4'), b(len(ls), '<u8')
+                    b(np.hstack([np.arange(len(ls))[:, np.newaxis] + 1, ls]), '<u8')
+                b([2, 1, 2], '<i4'), b(len(faces), '<u8')
+                b(np.hstack([np.arange(len(faces))[:, np.newaxis] + 100, faces]), '<u8')
+                w('\n$EndElements\n')
+            else:
+                w('$Entities\n0 2 1 0\n1 0 0 0 0 0 0 1 1 0\n2 0 0 0 0 0 0 1 2 0\n1 0 0 0 0 0 0 1 3 0\n$EndEntities\n')
+                w('$Nodes\n1 {} 2 {}\n2 1 0 {}\n'.format(n, 2 * n, n))
+                w(''.join('{}\n'.format(t) for t in node_tags))
+                w(''.join('{!r} {!r} {!r}\n'.format(*x) for x in coordinates))
+                w('$EndNodes\n$Elements\n3 {} 1 {}\n'.format(len(lines) + len(faces), 99 + len(faces)))
+                for tag in (1, 2):
+                    ls = lines[line_tags == tag]
+                    w('1 {} 1 {}\n'.format(tag, len(ls)))
+                    w(''.join('{} {} {}\n'.format(i + 1, *l) for i, l in enumerate(ls)))
+                w('2 1 2 {}\n'.format(len(faces)))
+                w(''.join('{} {} {} {}\n'.format(i + 100, *t) for i, t in enumerate(faces)))
+                w('$EndElements\n')
+
+
+@pytest.mark.parametrize('version', ['2.2', '4.1'])
+@pytest.mark.parametrize('binary', [False, True])
+def test_load_gmsh(tmpdir, version, binary):
+    from pymor.grids.gmsh import load_gmsh
+    from pymor.grids.tria import TriaGrid
+    g = TriaGrid((3, 2))
+    vertices, faces = g.centers(2).round(12), g.subentities(0, 2)
+    bottom = g.boundary_mask(1) & (g.centers(1)[:, 1] < 1e-10)
+    lines = g.subentities(1, 2)[g.boundaries(1)]
+    line_tags = np.where(bottom[g.boundaries(1)], 1, 2)
+    path = str(tmpdir.join('grid.msh'))
+    _write_msh(path, version, binary, vertices, faces, lines, line_tags)
+
+    for cache in (False, True, True):
+        grid, bi = load_gmsh(path, cache=cache)
+        np.testing.assert_array_equal(grid.centers(2), vertices)
+        np.testing.assert_array_equal(grid.subentities(0, 2), faces)
+        assert bi.boundary_types == ['bottom', 'other']
+        np.testing.assert_array_equal(bi.mask('bottom', 1), bottom[_edge_permutation(g, grid)])
+        np.testing.assert_array_equal(bi.mask('other', 1) | bi.mask('bottom', 1), grid.boundary_mask(1))
+        np.testing.assert_array_equal(bi.mask('bottom', 2), grid.centers(2)[:, 1] == 0)
+        np.testing.assert_array_equal(bi.mask('other', 2) | bi.mask('bottom', 2), grid.boundary_mask(2))
+
+
+def test_load_gmsh_malformed(tmpdir):
+    from pymor.core.exceptions import GmshError
+    from pymor.grids.gmsh import load_gmsh
+    from pymor.grids.tria import TriaGrid
+    g = TriaGrid((3, 2))
+    path = str(tmpdir.join('grid.msh'))
+    _write_msh(path, '2.2', False, g.centers(2).round(12), g.subentities(0, 2), np.zeros((0, 2), dtype=np.int32),
+               np.zeros(0, dtype=np.int32))
+    with open(path, 'rb') as f:
+        content = f.read()
+    with open(path, 'wb') as f:
+        f.write(content.replace(b'\n2 0.0 0.0 0.0\n', b'\n2 x 0.0 0.0\n'))
+    with pytest.raises(GmshError):
+        load_gmsh(path)
+
+
+def _edge_permutation(g, h):
+    """Indices of the edges of `g` in the edge numbering of `h` (both having the same vertices)."""
+    def keys(x):
+        e = np.sort(x.subentities(1, 2), axis=1).astype(np.int64)
+        return e[:, 0] * x.size(2) + e[:, 1]
+    kg, kh = keys(g), keys(h)
+    return np.argsort(kg)[np.argsort(np.argsort(kh))]
+
+
+@pytest.mark.parametrize('grid_type', ['rect', 'tria'])
+def test_structured_fast_paths(grid_type):
+    from pymor.grids.defaultimpl import AffineGridDefaultImplementations
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+
+    G = {'rect': RectGrid, 'tria': TriaGrid}[grid_type]
+
+    class GenericGrid(G):
+        def _structured_layout(self, codim):
+            return None
+
+        def _embedding_classes(self, codim):
+            return None
+
+        def _embeddings(self, codim):
+            return AffineGridDefaultImplementations._embeddings(self, codim)
+
+    g, h = G((9, 7)), GenericGrid((9, 7))
+    assert g._is_structured() and not h._is_structured()
+    for e in range(g.dim + 1):
+        for s in range(e + 1):
+            np.testing.assert_array_equal(g.superentities(e, s), h.superentities(e, s))
+            np.testing.assert_array_equal(g.superentity_indices(e, s), h.superentity_indices(e, s))
+        np.testing.assert_array_equal(g.embeddings(e)[0], h.embeddings(e)[0])
+        np.testing.assert_array_equal(g.embeddings(e)[1], h.embeddings(e)[1])
+        np.testing.assert_allclose(g.volumes(e), h.volumes(e))
+        np.testing.assert_allclose(g.centers(e), h.centers(e))
+        np.testing.assert_array_equal(g.boundaries(e), h.boundaries(e))
+        assert g.boundaries(e).dtype == h.boundaries(e).dtype
+    for s in range(1, g.dim + 1):
+        np.testing.assert_array_equal(g.neighbours(0, 0, s), h.neighbours(0, 0, s))
+    np.testing.assert_allclose(g.unit_outer_normals(), h.unit_outer_normals())
+
+
+@pytest.mark.parametrize('method', ['rcm', 'hilbert'])
+def test_reorder_grid(method):
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.reordering import matrix_bandwidth, reorder_grid
+    from pymor.grids.tria import TriaGrid
+    from pymor.grids.unstructured import UnstructuredTriangleGrid
+    g = TriaGrid((12, 10))
+    random = np.random.RandomState(0)
+    vertex_permutation, face_permutation = random.permutation(g.size(2)), random.permutation(g.size(0))
+    g = UnstructuredTriangleGrid(g.centers(2)[vertex_permutation],
+                                 np.argsort(vertex_permutation)[g.subentities(0, 2)][face_permutation])
+    bi = BoundaryInfoFromIndicators(g, {'dirichlet': lambda X: X[:, 0] == 0, 'neumann': lambda X: X[:, 0] > 0})
+
+    h, bi_h, data = reorder_grid(g, bi, method)
+    for codim, permutation in enumerate(data['permutations']):
+        np.testing.assert_array_equal(np.sort(permutation), np.arange(g.size(codim)))
+        np.testing.assert_allclose(h.centers(codim), g.centers(codim)[permutation])
+        if codim > 0:
+            for t in bi.boundary_types:
+                np.testing.assert_array_equal(bi_h.mask(t, codim), bi.mask(t, codim)[permutation])
+    np.testing.assert_allclose(h.volumes(0), g.volumes(0)[data['permutations'][0]])
+    for op, codim in ((data['cg_operator'], 2), (data['fv_operator'], 0)):
+        U = op.source.from_data(g.centers(codim).T)
+        np.testing.assert_allclose(op.apply(U).data, h.centers(codim).T)
+        np.testing.assert_allclose(op.apply_transpose(op.apply(U)).data, U.data)
+    assert data['bandwidth'] == (matrix_bandwidth(g, 2)[0], matrix_bandwidth(h, 2)[0])
+    assert data['profile'][1] < data['profile'][0] / 2
+    if method == 'rcm':
+        assert data['bandwidth'][1] < data['bandwidth'][0] / 5
+
+    # structured grids are not renumbered
+    from pymor.domaindescriptions.basic import LineDomain, RectDomain
+    from pymor.domaindiscretizers.default import discretize_domain_default
+    from pymor.grids.rect import RectGrid
+    for domain, grid_type in ((RectDomain(), None), (RectDomain(), RectGrid), (LineDomain(), None)):
+        with pytest.raises(NotImplementedError):
+            discretize_domain_default(domain, 1 / 8, grid_type=grid_type, reorder=method)
+    for g in (RectGrid((4, 4)), TriaGrid((4, 4), identify_left_right=True)):
+        with pytest.raises(NotImplementedError):
+            reorder_grid(g, method=method)
+
+
+def test_load_gmsh_reorder(tmpdir):
+    from pymor.grids.gmsh import load_gmsh
+    from pymor.grids.reordering import matrix_bandwidth
+    from pymor.grids.tria import TriaGrid
+    g = TriaGrid((8, 6))
+    vertices, faces = g.centers(2).round(12), g.subentities(0, 2)
+    bottom = g.boundary_mask(1) & (g.centers(1)[:, 1] < 1e-10)
+    lines = g.subentities(1, 2)[g.boundaries(1)]
+    line_tags = np.where(bottom[g.boundaries(1)], 1, 2)
+    path = str(tmpdir.join('grid.msh'))
+    _write_msh(path, '4.1', False, vertices, faces, lines, line_tags)
+
+    grid, bi = load_gmsh(path)
+    reordered_grid, reordered_bi = load_gmsh(path, reorder='rcm')
+    assert matrix_bandwidth(reordered_grid, 2)[0] < matrix_bandwidth(grid, 2)[0]
+    np.testing.assert_allclose(np.sort(reordered_grid.volumes(0)), np.sort(grid.volumes(0)))
+    for t in ('bottom', 'other'):
+        for codim in (1, 2):
+            C = grid.centers(codim)[bi.mask(t, codim)]
+            reordered_C = reordered_grid.centers(codim)[reordered_bi.mask(t, codim)]
+            np.testing.assert_allclose(C[np.lexsort(C.T)], reordered_C[np.lexsort(reordered_C.T)])
+
+
+def test_subgrid_extend():
+    from pymor.grids.subgrid import SubGrid
+    from pymor.grids.tria import TriaGrid
+    g = TriaGrid((10, 8))
+    random = np.random.RandomState(0)
+    E, F = random.choice(g.size(0), 60, replace=False), random.choice(g.size(0), 40, replace=False)
+    s = SubGrid(g, E)
+    t = s.extend(F)
+    u = SubGrid(g, np.hstack((E, F)))
+    np.testing.assert_array_equal(s.parent_indices(0), np.unique(E))
+    for codim in range(g.dim + 1):
+        # the entities of the extended subgrid keep their indices
+        np.testing.assert_array_equal(t.parent_indices(codim)[:s.size(codim)], s.parent_indices(codim))
+        np.testing.assert_array_equal(np.sort(t.parent_indices(codim)), u.parent_indices(codim))
+        np.testing.assert_array_equal(t.indices_from_parent_indices(t.parent_indices(codim), codim),
+                                      np.arange(t.size(codim)))
+        np.testing.assert_array_equal(t.parent_indices(codim)[t.subentities(0, codim)],
+                                      g.subentities(0, codim)[t.parent_indices(0)])
+        np.testing.assert_allclose(t.centers(codim), g.centers(codim)[t.parent_indices(codim)])
+    np.testing.assert_allclose(np.sort(t.volumes(1)[t.boundaries(1)]), np.sort(u.volumes(1)[u.boundaries(1)]))
+    for codim in range(g.dim + 1):
+        # s rebuilds the map taken over by t
+        np.testing.assert_array_equal(s.indices_from_parent_indices(s.parent_indices(codim), codim),
+                                      np.arange(s.size(codim)))
+    missing = np.setdiff1d(np.arange(g.size(0)), t.parent_indices(0))
+    with pytest.raises(ValueError):
+        t.indices_from_parent_indices(missing[:1], 0)
+
+    # the dense maps are not pickled and are rebuilt without the parent grid
+    from pymor.core.pickle import dumps, loads
+    assert all(child is None for child in t.__getstate__()['_SubGrid__child_indices'])
+    v = loads(dumps(t))
+    assert v.parent_grid is None
+    for codim in range(g.dim + 1):
+        np.testing.assert_array_equal(v.indices_from_parent_indices(t.parent_indices(codim), codim),
+                                      np.arange(t.size(codim)))
+    with pytest.raises(ValueError):
+        v.indices_from_parent_indices([g.size(0)], 0)
+
+
+@pytest.mark.parametrize('marked', [None, [0, 7, 30, 31]])
+def test_refine_grid(marked):
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.refinement import refine_grid
+    from pymor.grids.tria import TriaGrid
+    g = TriaGrid((6, 4))
+    indicators = {'dirichlet': lambda X: X[:, 0] < 1e-10, 'neumann': lambda X: X[:, 0] > 1e-10}
+    bi = BoundaryInfoFromIndicators(g, indicators)
+
+    h, bi_h, data = refine_grid(g, marked, bi)
+    if marked is None:
+        assert h.size(0) == 4 * g.size(0)
+    else:
+        assert np.all(np.bincount(data['parents'], minlength=g.size(0))[marked] == 4)
+    assert np.all(np.linalg.det(h.embeddings(0)[0]) > 0)
+    np.testing.assert_allclose(np.bincount(data['parents'], h.volumes(0)), g.volumes(0))
+    # the refined grid is conforming if its boundary has the same length as the boundary of g
+    np.testing.assert_allclose(h.volumes(1)[h.boundaries(1)].sum(), g.volumes(1)[g.boundaries(1)].sum())
+    np.testing.assert_allclose(h.centers(2)[:g.size(2)], g.centers(2))
+    bi_ref = BoundaryInfoFromIndicators(h, indicators)
+    for t in bi.boundary_types:
+        for codim in (1, 2):
+            np.testing.assert_array_equal(bi_h.mask(t, codim), bi_ref.mask(t, codim))
+
+    def f(X):
+        return 2 * X[:, 0] - X[:, 1] + 1
+    for codim, P, R in ((2, data['cg_prolongation'], data['cg_restriction']),
+                        (0, data['fv_prolongation'], data['fv_restriction'])):
+        U = P.source.from_data(f(g.centers(codim)))
+        np.testing.assert_allclose(R.apply(P.apply(U)).data, U.data)
+        if codim == 2:
+            np.testing.assert_allclose(P.apply(U).data, f(h.centers(2))[np.newaxis, :])
+        else:
+            W = P.range.from_data(f(h.centers(0)))
+            np.testing.assert_allclose(R.apply(W).data.dot(g.volumes(0)), W.data.dot(h.volumes(0)))
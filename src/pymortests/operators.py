@@ -6,19 +6,24 @@ import numpy as np
 import pytest
 
 from pymor.algorithms.basic import almost_equal
+from pymor.algorithms.preassemble import fuse_matrices
 from pymor.algorithms.projection import project
 from pymor.core.exceptions import InversionError, LinAlgError
-from pymor.operators.constructions import SelectionOperator, InverseOperator, InverseTransposeOperator
+from pymor.operators.constructions import (SelectionOperator, InverseOperator, InverseTransposeOperator,
+                                           ComponentProjection, Concatenation, LincombOperator)
+from pymor.operators.numpy import NumpyGenericOperator, NumpyMatrixOperator
 from pymor.parameters.base import ParameterType
 from pymor.parameters.functionals import GenericParameterFunctional
-from pymor.vectorarrays.numpy import NumpyVectorArray
+from pymor.vectorarrays.numpy import NumpyVectorArray, NumpyVectorSpace
 from pymortests.algorithms.stuff import MonomOperator
+from pymortests.base import changed_defaults
 from pymortests.fixtures.operator import (operator, operator_with_arrays, operator_with_arrays_and_products,
                                           picklable_operator)
 from pymortests.pickling import assert_picklable, assert_picklable_without_dumps_function
 from pymortests.vectorarray import valid_inds, valid_inds_of_same_length, invalid_inds
 from pymor.core.config import is_windows_platform
 
+
 def test_selection_op():
     p1 = MonomOperator(1)
     select_rhs_functional = GenericParameterFunctional(
@@ -75,6 +80,352 @@ def test_lincomb_op():
         assert almost_equal(pa, p.apply(vx)).all()
 
 
+def test_fuse_matrices():
+    from scipy.sparse import diags
+    A = NumpyMatrixOperator(diags([np.ones(9), np.arange(1., 11.)], [-1, 0]).tocsc())
+    B = NumpyMatrixOperator(np.random.random((10, 10)))
+    op = LincombOperator([Concatenation([ComponentProjection([1, 3, 5], A.range), A, B]),
+                          Concatenation([ComponentProjection([0, 2, 4], A.range), A])],
+                         [1., 2.])
+    fused = fuse_matrices(op)
+    assert isinstance(fused, NumpyMatrixOperator)
+    U = op.source.make_array(np.random.random((3, 10)))
+    assert np.allclose(fused.apply(U).data, op.apply(U).data)
+    for components, fusable in (([1, 3, 5], False), ([0, 1, 2, 3, 5, 6, 7, 9], True)):
+        P = ComponentProjection(components, NumpyVectorSpace(10))
+        op = Concatenation([NumpyMatrixOperator(np.random.random((4, len(components)))), P])
+        fused = fuse_matrices(op)
+        assert isinstance(fused, NumpyMatrixOperator) == fusable
+        assert fused.source == op.source and fused.range == op.range
+        assert np.allclose(fused.apply(U).data, op.apply(U).data)
+        if fusable:
+            assert fused._matrix.dtype == np.float64 and fused._matrix.shape == (4, 10)
+
+
+def test_numpy_generic_operator_chunked():
+    op = NumpyGenericOperator(lambda U, mu: U[:, ::-1] ** 2 * mu['c'], dim_source=10, dim_range=10,
+                              parameter_type={'c': ()}, chunk_size=3, num_threads=2,
+                              restricted_mapping=lambda dofs: (lambda U, mu: U ** 2 * mu['c'], 9 - dofs))
+    U = op.source.make_array(np.random.random((8, 10)))
+    mu = op.parse_parameter(2.)
+    assert np.allclose(op.apply(U, mu=mu).data, 2 * U.data[:, ::-1] ** 2)
+    dofs = np.array([1, 4])
+    rop, source_dofs = op.restricted(dofs)
+    assert np.allclose(rop.apply(rop.source.make_array(U.data[:, source_dofs]), mu=mu).data,
+                       op.apply(U, mu=mu).data[:, dofs])
+    op = NumpyGenericOperator(lambda u: u[::-1], dim_source=10, dim_range=10, vectorized=False)
+    assert np.allclose(op.apply(U).data, U.data[:, ::-1])
+
+    # without num_threads, the default of map_chunks is used
+    import threading
+    threads = set()
+
+    def mapping(U):
+        threads.add(threading.current_thread())
+        return U
+    op = NumpyGenericOperator(mapping, dim_source=10, dim_range=10, chunk_size=3)
+    with changed_defaults({'pymor.tools.chunking.map_chunks.num_threads': 2}):
+        op.apply(U)
+    assert threading.main_thread() not in threads
+
+
+def test_low_rank_projection():
+    from pymor.algorithms.projection import project_to_subbasis
+    from pymor.algorithms.to_matrix import to_matrix
+    from pymor.operators.constructions import LowRankOperator
+    space = NumpyVectorSpace(10)
+    op = LowRankOperator(space.make_array(np.random.random((2, 10))), np.random.random((2, 3)),
+                         space.make_array(np.random.random((3, 10))))
+    range_basis = space.make_array(np.random.random((4, 10)))
+    source_basis = space.make_array(np.random.random((5, 10)))
+    projected = project(op, range_basis, source_basis)
+    assert isinstance(projected, LowRankOperator)
+    assert np.allclose(to_matrix(projected), range_basis.data.dot(to_matrix(op)).dot(source_basis.data.T))
+    sub = project_to_subbasis(projected, 3, 2)
+    assert isinstance(sub, LowRankOperator)
+    assert np.allclose(to_matrix(sub), to_matrix(projected)[:3, :2])
+
+
+def test_numpy_matrix_operator_dense_fast_path():
+    ops = [NumpyMatrixOperator(np.random.random((10, 10)) + 10 * np.eye(10)) for _ in range(3)]
+    coefficients = [1., -2., 0.5 + 1j]
+    op = ops[0].assemble_lincomb(ops, coefficients)
+    assert np.allclose(op._matrix, sum(c * o._matrix for c, o in zip(coefficients, ops)))
+    assert np.allclose(ops[0].assemble_lincomb(ops, [2., 0., 0.])._matrix, 2 * ops[0]._matrix)
+    U = op.source.make_array(np.random.random((3, 10)))
+    for _ in range(2):  # second pass uses the cached LU decomposition
+        assert np.allclose(op.apply(op.apply_inverse(U)).data, U.data)
+        assert np.allclose(op.apply_transpose(op.apply_inverse_transpose(U)).data, U.data)
+    with pytest.raises(InversionError):
+        NumpyMatrixOperator(np.zeros((3, 3))).apply_inverse(NumpyVectorSpace(3).zeros())
+    with changed_defaults({'pymor.operators.numpy.dense_lu_options.max_cached_size': 50}):
+        op = NumpyMatrixOperator(op._matrix)
+        assert np.allclose(op.apply(op.apply_inverse(U)).data, U.data)
+        assert np.allclose(op.apply_transpose(op.apply_inverse_transpose(U)).data, U.data)
+        assert not hasattr(op, '_lu_factors')
+        with pytest.raises(InversionError):
+            NumpyMatrixOperator(np.zeros((10, 10))).apply_inverse(NumpyVectorSpace(10).zeros())
+    # the cached decomposition is recomputed after modifications of the matrix
+    op = NumpyMatrixOperator(op._matrix.copy())
+    op.apply_inverse(U)
+    op._matrix *= 2
+    assert np.allclose(op.apply(op.apply_inverse(U)).data, U.data)
+
+
+def test_cg_assembly_reuses_structure():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import AllDirichletBoundaryInfo, EmptyBoundaryInfo
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.assembly import _grid_structures
+    from pymor.operators.cg import DiffusionOperatorP1
+    grid = TriaGrid((4, 4))
+    diffusion = ExpressionFunction('1 + c * x[..., 0]', 2, (), {'c': ()})
+    op = DiffusionOperatorP1(grid, EmptyBoundaryInfo(grid), diffusion)
+    A1, A2 = (op.assemble(op.parse_parameter(c))._matrix for c in (0., 1.))
+    assert len(_grid_structures[grid]) == 1
+    assert np.all(A1.indices == A2.indices) and np.all(A1.indptr == A2.indptr)
+    assert np.allclose(A1.dot(np.ones(A1.shape[0])), 0.)
+    assert abs(A1 - A1.T).max() < 1e-14 and abs(A2 - A2.T).max() < 1e-14
+    bi = AllDirichletBoundaryInfo(grid)
+    A = DiffusionOperatorP1(grid, bi, dirichlet_clear_columns=True).assemble()._matrix.toarray()
+    D = bi.dirichlet_boundaries(2)
+    assert np.all(A[D] == np.eye(A.shape[0])[D]) and np.all(A[:, D] == np.eye(A.shape[0])[:, D])
+    assert len(_grid_structures[grid]) == 2
+    # at most max_keys structures are kept per grid
+    with changed_defaults({'pymor.operators.assembly.cached_grid_structure.max_keys': 2}):
+        for _ in range(3):
+            DiffusionOperatorP1(grid, AllDirichletBoundaryInfo(grid)).assemble()
+    assert len(_grid_structures[grid]) == 2
+
+
+def test_cg_quadrature_order_and_chunking():
+    from pymor.functions.basic import ConstantFunction, ExpressionFunction
+    from pymor.grids.boundaryinfos import EmptyBoundaryInfo
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.cg import DiffusionOperatorP1, DiffusionOperatorQ1, L2ProductP1
+    for grid, op_class, arg in ((TriaGrid((4, 4)), DiffusionOperatorP1, 'diffusion_function'),
+                                (TriaGrid((4, 4)), L2ProductP1, 'coefficient_function'),
+                                (RectGrid((4, 4)), DiffusionOperatorQ1, 'diffusion_function')):
+        bi = EmptyBoundaryInfo(grid)
+        constant = ConstantFunction(2., 2)
+        rough = ExpressionFunction('1 + x[..., 0]**3 * x[..., 1]', 2, ())
+
+        def assemble(f, order):
+            return op_class(grid, bi, order=order, **{arg: f}).assemble()._matrix.toarray()
+
+        A = assemble(constant, None if op_class is not DiffusionOperatorQ1 else 2)
+        assert all(np.allclose(assemble(constant, o), A) for o in (3, 4))
+        A4 = assemble(rough, 4)
+        A2 = assemble(rough, 2)
+        assert not np.allclose(A2, A4)
+        assert np.linalg.norm(assemble(rough, 3) - A4) <= np.linalg.norm(A2 - A4)
+        with changed_defaults({'pymor.operators.assembly.accumulate_chunks.chunk_size': 7}):
+            assert np.allclose(assemble(rough, 4), A4)
+        if op_class is not DiffusionOperatorQ1:
+            with pytest.raises(NotImplementedError):
+                assemble(rough, 5)
+
+
+def test_chunked_assembly():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.cg import DiffusionOperatorP1, L2ProductFunctionalP1
+    from pymor.operators.fv import DiffusionOperator, LinearAdvectionLaxFriedrichs
+    d = ExpressionFunction('1 + x[..., 0] * x[..., 1]', 2, ())
+    v = ExpressionFunction('0.5 * x[..., ::-1] - 0.3', 2, (2,))
+    ops = []
+    for grid in (TriaGrid((5, 3)), RectGrid((6, 4)), RectGrid((6, 4), identify_left_right=True)):
+        bi = BoundaryInfoFromIndicators(grid, {'dirichlet': lambda X: X[:, 0] < 1e-10,
+                                               'neumann': lambda X: X[:, 1] > 1 - 1e-10})
+        ops.extend([DiffusionOperator(grid, bi, d, diffusion_constant=0.5), LinearAdvectionLaxFriedrichs(grid, bi, v)])
+        if isinstance(grid, TriaGrid):
+            ops.extend([DiffusionOperatorP1(grid, bi, d, diffusion_constant=2.), L2ProductFunctionalP1(grid, d, bi)])
+    matrices = [op.assemble()._matrix for op in ops]
+    with changed_defaults({'pymor.operators.assembly.accumulate_chunks.chunk_size': 5,
+                           'pymor.operators.assembly.accumulate_chunks.num_threads': 3}):
+        for op, M in zip(ops, matrices):
+            M_chunked = op.assemble()._matrix
+            if hasattr(M, 'toarray'):
+                assert M_chunked.nnz == M.nnz
+                M, M_chunked = M.toarray(), M_chunked.toarray()
+            assert np.allclose(M_chunked, M)
+
+
+def test_accumulate_chunks_scattered_positions():
+    from pymor.operators.assembly import accumulate_chunks
+    rs = np.random.RandomState(0)
+    num_local, k, size = 300, 4, 5000
+    scatter = rs.randint(0, size, num_local * k)
+    for batch_size in (None, 3):
+        shape = (num_local, k) if batch_size is None else (batch_size, num_local, k)
+        values = rs.randn(*shape) + 1j * rs.randn(*shape)
+        expected = np.array([np.bincount(scatter, weights=V.real.ravel(), minlength=size)
+                             + 1j * np.bincount(scatter, weights=V.imag.ravel(), minlength=size)
+                             for V in values.reshape((-1, num_local * k))])
+        for num_threads in (1, 3):
+            result = accumulate_chunks(lambda s: values[..., s, :], num_local, scatter, size,
+                                       batch_size=batch_size, chunk_size=7, num_threads=num_threads)
+            assert np.allclose(result, expected[0] if batch_size is None else expected)
+
+
+def test_fv_divergence_matrix():
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.fv import divergence_matrix
+    for grid in (RectGrid((5, 3), identify_left_right=True, identify_bottom_top=True), TriaGrid((4, 4))):
+        D = divergence_matrix(grid)
+        assert divergence_matrix(grid) is D
+        SUPE, SUPI = grid.superentities(1, 0), grid.superentity_indices(1, 0)
+        normals = grid.unit_outer_normals()[SUPE[:, 0], SUPI[:, 0]]
+        # fluxes of two constant vector fields
+        fluxes = normals.dot(np.array([[1., 0.5], [-2., 1.]]).T) * grid.volumes(1)[:, np.newaxis]
+        div = D.dot(fluxes)
+        assert div.shape == (grid.size(0), 2)
+        boundaries = grid.boundaries(1)
+        interior = np.ones(grid.size(0), bool)
+        interior[SUPE[boundaries, 0]] = False
+        assert np.allclose(div[interior], 0)
+        assert np.allclose(grid.volumes(0).dot(div), fluxes[boundaries].sum(axis=0))
+
+
+def test_fv_assemble_data():
+    from scipy.sparse import csc_matrix
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.rect import RectGrid
+    from pymor.operators.fv import DiffusionOperator, LinearAdvectionLaxFriedrichs
+    grid = RectGrid((6, 4))
+    bi = BoundaryInfoFromIndicators(grid, {'dirichlet': lambda X: X[:, 0] < 1e-10,
+                                           'neumann': lambda X: X[:, 1] > 1 - 1e-10})
+    velocity = ExpressionFunction('c[0] * array([1., 0.5]) + c[1] * x', 2, (2,), {'c': (2,)})
+    diffusion = ExpressionFunction('1. + c[0] * x[..., 0] + c[1]**2', 2, (), {'c': (2,)})
+    ops = [LinearAdvectionLaxFriedrichs(grid, bi, velocity, lxf_lambda=0.5),
+           DiffusionOperator(grid, bi, diffusion_function=diffusion, diffusion_constant=0.3)]
+    mus = [ops[0].parse_parameter(mu) for mu in ([1., 0.], [-0.5, 2.], [0.3, 0.7])]
+    for op in ops:
+        with changed_defaults({'pymor.operators.assembly.accumulate_chunks.chunk_size': 25}):
+            data, indices, indptr = op.assemble_data(mus)
+        assert data.shape == (len(mus), len(indices))
+        for d, mu in zip(data, mus):
+            M = op.assemble(mu)._matrix
+            assert np.allclose(csc_matrix((d, indices, indptr), shape=M.shape).toarray(), M.toarray())
+
+
+def test_prolongation_operators():
+    from pymor.grids.rect import RectGrid
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.cg import ProlongationOperatorP1, ProlongationOperatorQ1
+    from pymor.operators.fv import ProlongationOperator
+
+    def affine(X):
+        return 1 + 2 * X[:, 0] - 3 * X[:, 1]
+
+    for P, coarse, fine in ((ProlongationOperatorP1, TriaGrid((3, 2)), TriaGrid((9, 5), domain=((0, 0), (1, 1.5)))),
+                            (ProlongationOperatorQ1, RectGrid((3, 2)), RectGrid((9, 5), domain=((0, 0), (1, 1.5))))):
+        op = P(coarse, fine)
+        U = op.apply(op.source.from_data(affine(coarse.centers(2))))
+        inside = fine.centers(2)[:, 1] <= 1 + 1e-10
+        assert np.allclose(U.data[0, inside], affine(fine.centers(2)[inside]))
+        assert np.all(U.data[0, ~inside] == 0)
+
+    coarse, fine = TriaGrid((2, 2)), TriaGrid((4, 4))
+    op = ProlongationOperator(coarse, fine)
+    E, _ = coarse.locate(fine.centers(0))
+    assert np.all(op.apply(op.source.from_data(np.arange(coarse.size(0)))).data[0] == E)
+    # a function which is constant on the coarse cells keeps its integral
+    U = op.source.from_data(np.random.RandomState(0).rand(coarse.size(0)))
+    assert np.isclose(U.data[0].dot(coarse.volumes(0)), op.apply(U).data[0].dot(fine.volumes(0)))
+
+
+def test_nonlinear_advection_multiple_vectors():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.rect import RectGrid
+    from pymor.operators.fv import (nonlinear_advection_engquist_osher_operator,
+                                    nonlinear_advection_lax_friedrichs_operator,
+                                    nonlinear_advection_simplified_engquist_osher_operator)
+    grid = RectGrid((6, 4))
+    bi = BoundaryInfoFromIndicators(grid, {'dirichlet': lambda X: X[:, 0] < 1e-10,
+                                           'neumann': lambda X: X[:, 1] > 1 - 1e-10})
+    flux = ExpressionFunction('x**2 * array([1., 0.5]) * c', 1, (2,), {'c': ()})
+    flux_derivative = ExpressionFunction('2 * x * array([1., 0.5]) * c', 1, (2,), {'c': ()})
+    dirichlet_data = ExpressionFunction('c * x[..., 1]', 2, (), {'c': ()})
+    ops = [nonlinear_advection_lax_friedrichs_operator(grid, bi, flux, dirichlet_data=dirichlet_data),
+           nonlinear_advection_simplified_engquist_osher_operator(grid, bi, flux, flux_derivative),
+           nonlinear_advection_engquist_osher_operator(grid, bi, flux, flux_derivative, dirichlet_data=dirichlet_data)]
+    for op in ops:
+        U = op.source.make_array(np.random.RandomState(0).random_sample((7, op.source.dim)))
+        mu = op.parse_parameter(0.7)
+        R = op.apply(U, mu=mu).data
+        assert np.allclose(np.vstack([op.apply(U[i], mu=mu).data for i in range(len(U))]), R)
+        with changed_defaults({'pymor.operators.fv.apply_options.max_edge_values': 100}):
+            assert np.allclose(op.apply(U, mu=mu).data, R)
+
+
+def test_nonlinear_advection_restricted():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.rect import RectGrid
+    from pymor.operators.fv import RestrictedNonlinearAdvectionOperator, nonlinear_advection_lax_friedrichs_operator
+    grid = RectGrid((8, 5))
+    bi = BoundaryInfoFromIndicators(grid, {'dirichlet': lambda X: X[:, 0] < 1e-10,
+                                           'neumann': lambda X: X[:, 1] > 1 - 1e-10})
+    flux = ExpressionFunction('x**2 * array([1., 0.5]) * c', 1, (2,), {'c': ()})
+    flux_derivative = ExpressionFunction('2 * x * array([1., 0.5]) * c', 1, (2,), {'c': ()})
+    for dirichlet_data in (ExpressionFunction('c * x[..., 1]', 2, (), {'c': ()}),
+                           ExpressionFunction('x[..., 1]', 2, ())):
+        op = nonlinear_advection_lax_friedrichs_operator(grid, bi, flux, dirichlet_data=dirichlet_data,
+                                                         flux_derivative=flux_derivative)
+        mu = op.parse_parameter(0.7)
+        U = op.source.make_array(np.random.RandomState(0).random_sample((3, op.source.dim)))
+        dofs = np.array([0, 17, 39, 17, 8])
+        rop, source_dofs = op.restricted(dofs)
+        assert isinstance(rop, RestrictedNonlinearAdvectionOperator)
+        assert len(source_dofs) <= 5 * len(dofs)
+        U_dofs = rop.source.make_array(U.data[:, source_dofs])
+        assert np.allclose(rop.apply(U_dofs, mu=mu).data, op.apply(U, mu=mu).data[:, dofs])
+        J = op.jacobian(U[0], mu=mu).assemble()._matrix.toarray()
+        assert np.allclose(rop.jacobian(U_dofs[0], mu=mu).assemble()._matrix.toarray(), J[dofs][:, source_dofs])
+        # restrict the restricted operator to some of its DOFs
+        rrop, rsource_dofs = rop.restricted(np.array([1, 2]))
+        assert np.allclose(rrop.apply(rrop.source.make_array(U_dofs.data[:, rsource_dofs]), mu=mu).data,
+                           op.apply(U, mu=mu).data[:, dofs[1:3]])
+        assert_picklable(rop)
+
+
+def test_nonlinear_advection_jacobian():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import BoundaryInfoFromIndicators
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.fv import (nonlinear_advection_engquist_osher_operator,
+                                    nonlinear_advection_lax_friedrichs_operator,
+                                    nonlinear_advection_simplified_engquist_osher_operator)
+    grid = TriaGrid((4, 3))
+    bi = BoundaryInfoFromIndicators(grid, {'dirichlet': lambda X: X[:, 0] < 1e-10,
+                                           'neumann': lambda X: X[:, 1] > 1 - 1e-10})
+    flux = ExpressionFunction('x**2 * array([1., -0.5]) * c', 1, (2,), {'c': ()})
+    flux_derivative = ExpressionFunction('2 * x * array([1., -0.5]) * c', 1, (2,), {'c': ()})
+    dirichlet_data = ExpressionFunction('c * x[..., 1]', 2, (), {'c': ()})
+    ops = [nonlinear_advection_lax_friedrichs_operator(grid, bi, flux, dirichlet_data=dirichlet_data),
+           nonlinear_advection_lax_friedrichs_operator(grid, bi, flux, dirichlet_data=dirichlet_data,
+                                                       flux_derivative=flux_derivative),
+           nonlinear_advection_simplified_engquist_osher_operator(grid, bi, flux, flux_derivative),
+           nonlinear_advection_engquist_osher_operator(grid, bi, flux, flux_derivative, dirichlet_data=dirichlet_data)]
+    for op in ops:
+        mu = op.parse_parameter(0.7)
+        U = op.source.make_array(0.1 + np.random.RandomState(0).random_sample((1, op.source.dim)))
+        J = op.jacobian(U, mu=mu).assemble()._matrix.toarray()
+        # central difference quotients of the operator, computed for all directions at once
+        delta = 1e-6
+        E = np.eye(op.source.dim) * delta
+        J_fd = (op.apply(op.source.make_array(U.data + E), mu=mu).data
+                - op.apply(op.source.make_array(U.data - E), mu=mu).data).T / (2 * delta)
+        assert np.allclose(J, J_fd, rtol=1e-6, atol=1e-6)
+
+
 def test_pickle(operator):
     assert_picklable(operator)
 
@@ -10,12 +10,17 @@ from types import FunctionType, MethodType
 from pymor.core.config import config
 from pymor.core.interfaces import BasicInterface
 from pymor.core.pickle import dumps, loads, dumps_function, PicklingError
+from pymor.functions.ei import EmpiricalInterpolationCoefficients
 from pymor.grids.subgrid import SubGrid
 from pymor.operators.numpy import NumpyMatrixBasedOperator
 
 is_equal_ignored_attributes = \
-    ((SubGrid, {'_uid', '_CacheableInterface__cache_region', '_SubGrid__parent_grid'}),
-     (NumpyMatrixBasedOperator, {'_uid', '_CacheableInterface__cache_region', '_assembled_operator'}),
+    ((SubGrid, {'_uid', '_CacheableInterface__cache_region', '_SubGrid__parent_grid',
+                '_SubGrid__child_indices'}),
+     (NumpyMatrixBasedOperator, {'_uid', '_CacheableInterface__cache_region', '_assembled_operator',
+                                  '_preconditioners', '_preconditioner_family', '_preconditioner_pools',
+                                  '_lu_factors', '_lincomb_stack'}),
+     (EmpiricalInterpolationCoefficients, {'_uid', '_CacheableInterface__cache_region', '_last_coefficients'}),
      (BasicInterface, {'_name', '_uid', '_CacheableInterface__cache_region'}))
 
 is_equal_dispatch_table = {}
@@ -11,6 +11,7 @@ from pymor.core.config import config
 from pymor.operators.basic import OperatorBase
 from pymor.operators.numpy import NumpyMatrixOperator
 from pymor.vectorarrays.numpy import NumpyVectorSpace
+from pymortests.base import changed_defaults
 
 
 class GenericOperator(OperatorBase):
@@ -65,3 +66,43 @@ def test_numpy_sparse_solvers(numpy_sparse_solver):
     rhs = op.range.make_array(np.ones(10))
     solution = op.apply_inverse(rhs)
     assert ((op.apply(solution) - rhs).l2_norm() / rhs.l2_norm())[0] < 1e-8
+
+
+def test_cached_preconditioner():
+    op = NumpyMatrixOperator(diags([np.arange(1., 11.)], [0]).tocsc(),
+                             solver_options={'inverse': 'scipy_bicgstab_spilu'})
+    rhs = op.range.make_array(np.ones(10))
+    op.apply_inverse(rhs)
+    ilu = op._preconditioners['scipy_spilu'][2]
+    op.apply_inverse(rhs)
+    assert op._preconditioners['scipy_spilu'][2] is ilu
+    op._matrix.data[0] = 2.
+    solution = op.apply_inverse(rhs)
+    assert op._preconditioners['scipy_spilu'][2] is not ilu
+    assert ((op.apply(solution) - rhs).l2_norm() / rhs.l2_norm())[0] < 1e-8
+
+
+def test_cached_preconditioner_parameter_reuse():
+    from pymor.functions.basic import ExpressionFunction
+    from pymor.grids.boundaryinfos import AllDirichletBoundaryInfo
+    from pymor.grids.tria import TriaGrid
+    from pymor.operators.cg import DiffusionOperatorP1
+    grid = TriaGrid((10, 10))
+    op = DiffusionOperatorP1(grid, AllDirichletBoundaryInfo(grid),
+                             ExpressionFunction('1 + c * x[..., 0]', 2, (), {'c': ()}),
+                             solver_options={'inverse': 'scipy_bicgstab_spilu'})
+    key = 'pymor.operators.numpy.NumpyMatrixOperator.cached_preconditioner.reuse_distance'
+    with changed_defaults({key: 0.1}):
+        A1 = op.assemble(op.parse_parameter(1.))
+        rhs = A1.range.make_array(np.ones(A1.range.dim))
+        A1.apply_inverse(rhs)
+        ilu = A1._preconditioners['scipy_spilu'][2]
+        A2 = op.assemble(op.parse_parameter(1.05))
+        solution = A2.apply_inverse(rhs)
+        assert A2._preconditioners['scipy_spilu'][2] is ilu
+        assert len(op._preconditioner_pools[()]['scipy_spilu']) == 1
+        assert ((A2.apply(solution) - rhs).l2_norm() / rhs.l2_norm())[0] < 1e-8
+        A3 = op.assemble(op.parse_parameter(3.))
+        A3.apply_inverse(rhs)
+        assert A3._preconditioners['scipy_spilu'][2] is not ilu
+        assert len(op._preconditioner_pools[()]['scipy_spilu']) == 2
@@ -11,7 +11,8 @@ import scipy.sparse as sps
 from pymor.algorithms.to_matrix import to_matrix
 from pymor.operators.block import BlockOperator, BlockDiagonalOperator
 from pymor.operators.constructions import (AdjointOperator, Concatenation, ComponentProjection, IdentityOperator,
-                                           LincombOperator, VectorArrayOperator, ZeroOperator)
+                                           LincombOperator, LowRankOperator, LowRankUpdatedOperator,
+                                           VectorArrayOperator, ZeroOperator)
 from pymor.operators.numpy import NumpyMatrixOperator
 from pymor.vectorarrays.numpy import NumpyVectorSpace
 
@@ -202,6 +203,33 @@ def test_to_matrix_LincombOperator():
     assert_type_and_allclose(C, Cop, 'sparse')
 
 
+def test_to_matrix_LowRankOperator():
+    np.random.seed(0)
+    L = np.random.randn(5, 2)
+    C = np.random.randn(2, 3)
+    R = np.random.randn(4, 3)
+    A = L.dot(C).dot(R.T)
+
+    LRop = LowRankOperator(NumpyVectorSpace.make_array(L.T), C, NumpyVectorSpace.make_array(R.T))
+    assert_type_and_allclose(A, LRop, 'dense')
+
+
+def test_to_matrix_LowRankUpdatedOperator():
+    np.random.seed(0)
+    A = np.random.randn(4, 4)
+    L = np.random.randn(4, 2)
+    C = np.random.randn(2, 2)
+    R = np.random.randn(4, 2)
+    B = A + L.dot(C).dot(R.T)
+
+    LRop = LowRankOperator(NumpyVectorSpace.make_array(L.T), C, NumpyVectorSpace.make_array(R.T))
+    Bop = LowRankUpdatedOperator(NumpyMatrixOperator(A), LRop)
+    assert_type_and_allclose(B, Bop, 'dense')
+
+    Bop = LowRankUpdatedOperator(NumpyMatrixOperator(sps.csc_matrix(A)), LRop)
+    assert_type_and_allclose(B, Bop, 'dense')
+
+
 def test_to_matrix_VectorArrayOperator():
     np.random.seed(0)
     V = np.random.randn(10, 2)
@@ -137,5 +137,21 @@ def testDeprecated():
         assert "DeprecationWarning" in str(w[-1].message)
 
 
+def test_inverse_relation_numpy():
+    from pymor.tools.relations import inverse_relation
+    from pymor.tools.relations_numpy import inverse_relation as inverse_relation_numpy
+    R = np.random.RandomState(0).randint(0, 30, size=(100, 3)).astype(np.int32)
+    for RINV, RINV_NUMPY in zip(inverse_relation(R, size_rhs=35, with_indices=True),
+                                inverse_relation_numpy(R, size_rhs=35, with_indices=True)):
+        assert RINV_NUMPY.dtype == np.int32
+        assert np.all(RINV == RINV_NUMPY)
+    R[::7, 1] = -1
+    RINV, RINVI = inverse_relation_numpy(R, with_indices=True)
+    for x in range(len(RINV)):
+        I = np.nonzero(R == x)
+        assert np.all(RINV[x, :len(I[0])] == I[0]) and np.all(RINV[x, len(I[0]):] == -1)
+        assert np.all(RINVI[x, :len(I[0])] == I[1]) and np.all(RINVI[x, len(I[0]):] == -1)
+
+
 if __name__ == "__main__":
     runmodule(filename=__file__)